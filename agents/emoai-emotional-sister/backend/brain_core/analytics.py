@@ -0,0 +1,204 @@
+# 📈 Streaming Emotional Analytics
+# File: analytics.py
+#
+# Aggregates folded in one record at a time, so analytics never rescan the
+# interaction history: Welford running mean/variance, counters, day-bucketed
+# trend series and a lazily-invalidated heap for the top-K users. Everything
+# here is derived data - it is rebuilt from the journals on startup.
+
+import heapq
+import math
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+# Keywords counted as crying triggers in messages that raised a papa alert
+CRYING_TRIGGER_KEYWORDS = [
+    "angry", "mad", "upset", "disappointed", "ignore",
+    "mean", "hurt", "sad", "cry", "hate"
+]
+
+# Emotions above this intensity count towards trends and pattern counters
+SIGNIFICANT_EMOTION = 0.3
+
+
+class RunningStats:
+    """Welford's online mean and (population) variance; remove() undoes an add()"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value: float):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class TopK:
+    """
+    Highest-scoring keys whose scores change over time. Every update pushes a
+    fresh heap entry; older entries for the key are stale and are discarded
+    when they surface, and the heap is rebuilt once stale entries dominate.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._scores: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {}
+
+    def update(self, key: str, score: float):
+        version = self._versions.get(key, 0) + 1
+        self._versions[key] = version
+        self._scores[key] = score
+        heapq.heappush(self._heap, (-score, key, version))
+        if len(self._heap) > 4 * len(self._scores) + 64:
+            self._heap = [(-s, k, self._versions[k]) for k, s in self._scores.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, k: int) -> List[str]:
+        """Best k keys, best first - O(k log n) amortised"""
+        found, keep = [], []
+        while self._heap and len(found) < k:
+            entry = heapq.heappop(self._heap)
+            _, key, version = entry
+            if self._versions.get(key) == version:
+                found.append(key)
+                keep.append(entry)
+        for entry in keep:
+            heapq.heappush(self._heap, entry)
+        return found
+
+
+class InteractionAnalytics:
+    """Running aggregates over EmotionalMemory interactions and wishes"""
+
+    def __init__(self, intensity_of: Callable[[Dict[str, Any]], float]):
+        self.intensity_of = intensity_of
+        self.total = 0
+        self.crying_count = 0
+        self.papa_calls = 0
+        self.intensity = RunningStats()
+        self.emotion_counts = Counter()
+        self.daily_emotions: Dict[str, Counter] = defaultdict(Counter)
+        self.crying_triggers = Counter()
+        self.user_intensity: Dict[str, RunningStats] = {}
+        self.top_users = TopK()
+        self.total_wishes = 0
+        self.important_wishes = 0
+
+    def add_interaction(self, interaction: Dict[str, Any]):
+        intensity = self.intensity_of(interaction)
+        emotions = interaction.get("detected_emotions", {}) or {}
+
+        self.total += 1
+        self.intensity.add(intensity)
+        self.emotion_counts.update(emotions.keys())
+
+        if interaction.get("papa_alert", False):
+            self.crying_count += 1
+            message = interaction.get("user_message", "").lower()
+            self.crying_triggers.update(keyword for keyword in CRYING_TRIGGER_KEYWORDS if keyword in message)
+        if "papa" in interaction.get("ai_response", "").lower():
+            self.papa_calls += 1
+
+        try:
+            day = str(datetime.fromisoformat(interaction.get("timestamp", "")).date())
+        except (TypeError, ValueError):
+            day = None
+        if day is not None:
+            self.daily_emotions[day].update(
+                emotion for emotion, value in emotions.items() if value > SIGNIFICANT_EMOTION
+            )
+
+        user_name = interaction.get("user_name")
+        if user_name is not None:
+            stats = self.user_intensity.setdefault(user_name, RunningStats())
+            stats.add(intensity)
+            self.top_users.update(user_name, stats.mean)
+
+    def add_wish(self, wish: Dict[str, Any]):
+        self.total_wishes += 1
+        if wish.get("importance", 0) > 0.7:
+            self.important_wishes += 1
+
+    def user_volatility(self, user_name: str) -> float:
+        stats = self.user_intensity.get(user_name)
+        if stats is None or stats.count < 2:
+            return 0.5
+        return min(stats.variance * 2, 1.0)
+
+    def most_emotional_users(self, k: int = 5) -> List[Dict[str, Any]]:
+        return [{
+            "user": user_name,
+            "average_intensity": round(self.user_intensity[user_name].mean, 3),
+            "interaction_count": self.user_intensity[user_name].count,
+            "volatility": round(self.user_volatility(user_name), 3)
+        } for user_name in self.top_users.top(k)]
+
+    def trends(self) -> Dict[str, Dict[str, int]]:
+        return {day: dict(counts) for day, counts in self.daily_emotions.items() if counts}
+
+
+class ResponseWindowStats:
+    """
+    Counters over a sliding window of EmpathyGenerator responses: add() each
+    response as it is stored and remove() each one as it falls out.
+    """
+
+    def __init__(self, behaviors_of: Callable[[str], Iterable[str]]):
+        self.behaviors_of = behaviors_of
+        self.emotion_counts = Counter()
+        self.type_counts = Counter()
+        self.behavior_counts = Counter()
+        self.intensity_total = 0.0
+        self.count = 0
+        self.user_intensities: Dict[str, deque] = defaultdict(deque)
+
+    def add(self, interaction: Dict[str, Any]):
+        self.count += 1
+        self.emotion_counts[interaction["emotion"]] += 1
+        self.type_counts[interaction["empathy_type"]] += 1
+        self.behavior_counts.update(self.behaviors_of(interaction["response"]))
+        self.intensity_total += interaction["intensity"]
+        self.user_intensities[interaction["user_name"]].append(interaction["intensity"])
+
+    def remove(self, interaction: Dict[str, Any]):
+        """The window is FIFO, so the response leaving is its user's oldest"""
+        self.count -= 1
+        for counter, key in ((self.emotion_counts, interaction["emotion"]),
+                             (self.type_counts, interaction["empathy_type"])):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        self.behavior_counts.subtract(self.behaviors_of(interaction["response"]))
+        self.intensity_total -= interaction["intensity"]
+        intensities = self.user_intensities[interaction["user_name"]]
+        intensities.popleft()
+        if not intensities:
+            del self.user_intensities[interaction["user_name"]]
+
+    @property
+    def average_intensity(self) -> float:
+        return self.intensity_total / self.count if self.count else 0.0
@@ -0,0 +1,180 @@
+# 📦 Fixed-Size Learning Memory
+# File: bounded.py
+#
+# Structures whose size does not grow with the number of experiences:
+# PatternHeap keeps the K most valuable patterns of a category in a min-heap
+# (a new pattern costs O(log K)) plus the last few for novelty checks, and
+# KeywordSketch keeps an emotion's keyword weights in a decaying count-min
+# sketch with a small heap of its heaviest keywords. Both round-trip through
+# JSON for the learning checkpoints.
+
+import hashlib
+import heapq
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Most recent patterns kept per category (for novelty checks), whatever their value
+RECENT_PATTERNS = 10
+
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 128
+# Every new observation counts 1/SKETCH_DECAY times more than the last, i.e. old weight decays
+SKETCH_DECAY = 0.999
+TOP_KEYWORDS = 32
+# Renormalise before the growing scale factor loses float precision
+_MAX_SCALE = 1e12
+
+
+class PatternHeap:
+    """
+    🔝 Top-K patterns by learning_value
+    The heap root is the least valuable kept pattern, so a new one either
+    replaces it or is dropped.
+    """
+
+    def __init__(self, patterns: Optional[List[Dict[str, Any]]] = None,
+                 recent: Optional[List[Dict[str, Any]]] = None):
+        self._seq = 0
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        for pattern in patterns or []:
+            self._heap.append((pattern.get("learning_value", 0.0), self._next_seq(), pattern))
+        heapq.heapify(self._heap)
+        self.recent = deque(recent or [], maxlen=RECENT_PATTERNS)
+
+    def _next_seq(self) -> int:
+        # Tie-breaker so equal values never fall through to comparing dicts
+        self._seq += 1
+        return self._seq
+
+    def add(self, pattern: Dict[str, Any], capacity: int) -> bool:
+        """Offer a pattern; returns whether it was kept"""
+        self.recent.append(pattern)
+        entry = (pattern.get("learning_value", 0.0), self._next_seq(), pattern)
+        capacity = max(capacity, 1)
+        if len(self._heap) < capacity:
+            heapq.heappush(self._heap, entry)
+            return True
+        while len(self._heap) > capacity:
+            heapq.heappop(self._heap)
+        if entry[0] <= self._heap[0][0]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def latest(self, n: int) -> List[Dict[str, Any]]:
+        return list(self.recent)[-n:]
+
+    def most_valuable(self, n: int) -> List[Dict[str, Any]]:
+        return [pattern for _, _, pattern in heapq.nlargest(n, self._heap)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (pattern for _, _, pattern in self._heap)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"patterns": list(self), "recent": list(self.recent)}
+
+    @classmethod
+    def from_json(cls, data: Any) -> "PatternHeap":
+        if isinstance(data, list):
+            # Plain pattern list from an older checkpoint, oldest first
+            return cls(data, data[-RECENT_PATTERNS:])
+        return cls(data.get("patterns", []), data.get("recent", []))
+
+
+class KeywordSketch:
+    """
+    🧮 Decaying keyword weights in fixed memory
+    A count-min sketch never underestimates a weight and overestimates by a
+    bounded amount. Decay is a growing scale on new increments rather than
+    a pass over the table, and the heaviest TOP_KEYWORDS keywords are kept
+    by name in a lazily-invalidated min-heap.
+    """
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = [[0.0] * width for _ in range(depth)]
+        self.scale = 1.0
+        # keyword -> raw (scaled) weight for the heavy hitters; heap entries may be stale
+        self.top: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+    def _cells(self, keyword: str) -> List[int]:
+        digest = hashlib.blake2b(keyword.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[4 * row:4 * row + 4], "big") % self.width for row in range(self.depth)]
+
+    def add(self, keyword: str, weight: float):
+        self.scale /= SKETCH_DECAY
+        increment = weight * self.scale
+        raw = float("inf")
+        for row, cell in enumerate(self._cells(keyword)):
+            self.table[row][cell] += increment
+            raw = min(raw, self.table[row][cell])
+        self._offer(keyword, raw)
+        if self.scale > _MAX_SCALE:
+            self._renormalise()
+
+    def estimate(self, keyword: str) -> float:
+        raw = min(self.table[row][cell] for row, cell in enumerate(self._cells(keyword)))
+        return raw / self.scale
+
+    def top_keywords(self, n: int = TOP_KEYWORDS) -> Dict[str, float]:
+        ranked = sorted(self.top.items(), key=lambda item: item[1], reverse=True)[:n]
+        return {keyword: round(raw / self.scale, 4) for keyword, raw in ranked}
+
+    def _offer(self, keyword: str, raw: float):
+        """Keep keyword among the heavy hitters if it outweighs the lightest one - O(log K)"""
+        if keyword in self.top or len(self.top) < TOP_KEYWORDS:
+            self.top[keyword] = raw
+            heapq.heappush(self._heap, (raw, keyword))
+        else:
+            lightest, lightest_raw = self._lightest()
+            if raw <= lightest_raw:
+                return
+            del self.top[lightest]
+            self.top[keyword] = raw
+            heapq.heapreplace(self._heap, (raw, keyword))
+        if len(self._heap) > 4 * TOP_KEYWORDS:
+            self._heap = [(raw, keyword) for keyword, raw in self.top.items()]
+            heapq.heapify(self._heap)
+
+    def _lightest(self) -> Tuple[str, float]:
+        while self._heap[0][1] not in self.top or self.top[self._heap[0][1]] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        raw, keyword = self._heap[0]
+        return keyword, raw
+
+    def _renormalise(self):
+        for row in self.table:
+            for cell in range(self.width):
+                row[cell] /= self.scale
+        self.top = {keyword: raw / self.scale for keyword, raw in self.top.items()}
+        self._heap = [(raw, keyword) for keyword, raw in self.top.items()]
+        heapq.heapify(self._heap)
+        self.scale = 1.0
+
+    def __len__(self) -> int:
+        return len(self.top)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"width": self.width, "depth": self.depth, "scale": self.scale,
+                "table": self.table, "top": self.top}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "KeywordSketch":
+        if "table" not in data:
+            # Plain {keyword: weight} from an older checkpoint
+            sketch = cls()
+            for keyword, weight in data.items():
+                sketch.add(keyword, weight)
+            return sketch
+        sketch = cls(data["width"], data["depth"])
+        sketch.table = data["table"]
+        sketch.scale = data["scale"]
+        sketch.top = dict(data["top"])
+        sketch._heap = [(raw, keyword) for keyword, raw in sketch.top.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
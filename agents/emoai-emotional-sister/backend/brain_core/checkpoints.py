@@ -0,0 +1,117 @@
+# 💾 Sharded Learning Checkpoints
+# File: checkpoints.py
+#
+# A mapping persisted as one JSON file per key (a user model, a pattern
+# category). Startup only lists the directory; a shard is read the first time
+# its key is touched. Writers mark the keys they change and flush() rewrites
+# just those shards, each atomically, so a checkpoint costs what changed
+# rather than everything ever learned.
+
+import json
+import logging
+import os
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+from urllib.parse import quote, unquote
+
+from .journal import atomic_write_json
+
+SHARD_SUFFIX = ".json"
+
+
+class ShardedState(MutableMapping):
+    """
+    🗂️ Lazily-loaded, dirty-tracked mapping backed by a directory of shards
+    factory gives missing keys a fresh value (like defaultdict); decode turns
+    a shard's JSON back into the live structure and encode the reverse.
+    """
+
+    def __init__(self, directory: Path, factory: Optional[Callable[[], Any]] = None,
+                 decode: Optional[Callable[[Any], Any]] = None, encode: Optional[Callable[[Any], Any]] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.factory = factory
+        self.decode = decode
+        self.encode = encode
+        self.logger = logging.getLogger("ShardedState")
+        self._loaded: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._known: Set[str] = {
+            unquote(name[:-len(SHARD_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(SHARD_SUFFIX) and not name.startswith(".")
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{quote(str(key), safe='')}{SHARD_SUFFIX}"
+
+    def _load(self, key: str) -> Any:
+        with open(self._path(key), "r") as f:
+            value = json.load(f)
+        return self.decode(value) if self.decode else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._loaded:
+            return self._loaded[key]
+        if key in self._known:
+            value = self._loaded[key] = self._load(key)
+            return value
+        if self.factory is None:
+            raise KeyError(key)
+        value = self[key] = self.factory()
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._loaded[key] = value
+        self._known.add(key)
+        self._dirty.add(key)
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        self._loaded.pop(key, None)
+        self._known.discard(key)
+        self._dirty.discard(key)
+        self._deleted.add(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Unlike [], never conjures a value from the factory
+        return self[key] if key in self._known else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._known
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._known))
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def mark_dirty(self, key: str):
+        """Record an in-place change to key's value so the next flush writes it"""
+        if key in self._known:
+            self._dirty.add(key)
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty) + len(self._deleted)
+
+    @property
+    def loaded_count(self) -> int:
+        return len(self._loaded)
+
+    def flush(self) -> int:
+        """Write changed shards and remove deleted ones. Returns shards written."""
+        written = 0
+        for key in list(self._dirty):
+            value = self._loaded[key]
+            atomic_write_json(self._path(key), self.encode(value) if self.encode else value, default=str)
+            self._dirty.discard(key)
+            written += 1
+        for key in list(self._deleted):
+            self._path(key).unlink(missing_ok=True)
+            self._deleted.discard(key)
+        return written
@@ -2,7 +2,6 @@
 # File: emotional_memory.py
 # Claude Sovereign Mode: ACTIVE
 
-import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -11,6 +10,9 @@ import sqlite3
 import asyncio
 from collections import defaultdict
 
+from .analytics import InteractionAnalytics
+from .journal import FSYNC_INTERVAL, DEFAULT_COMPACT_EVERY, Journal
+
 class EmotionalMemory:
     """
     🧠💕 Advanced Emotional Memory System
@@ -18,16 +20,25 @@ class EmotionalMemory:
     Like a digital heart that remembers every feeling
     """
     
-    def __init__(self, memory_dir: Path = None):
+    def __init__(self, memory_dir: Path = None, fsync: str = FSYNC_INTERVAL,
+                 compact_every: int = DEFAULT_COMPACT_EVERY):
         self.memory_dir = memory_dir or Path("memory")
         self.memory_dir.mkdir(exist_ok=True)
         
-        # Memory files
+        # Legacy whole-list files, imported into the journals once
         self.interactions_file = self.memory_dir / "emotional_interactions.json"
         self.learning_file = self.memory_dir / "learning_sessions.json"
         self.wishes_file = self.memory_dir / "unfulfilled_wishes.json"
         self.growth_file = self.memory_dir / "emotional_growth.json"
         
+        # One append-only journal per stream - a save writes one line, not the whole list
+        self.interactions_journal = Journal(self.memory_dir, "emotional_interactions", fsync=fsync,
+                                            compact_every=compact_every)
+        self.learning_journal = Journal(self.memory_dir, "learning_sessions", fsync=fsync,
+                                        compact_every=compact_every)
+        self.wishes_journal = Journal(self.memory_dir, "unfulfilled_wishes", fsync=fsync,
+                                      compact_every=compact_every)
+        
         # Setup logging
         self.logger = logging.getLogger("EmotionalMemory")
         
@@ -37,32 +48,42 @@ class EmotionalMemory:
         self.wishes = []
         self.emotional_patterns = {}
         
+        # Running aggregates behind the stats/insights endpoints, fed on every save
+        self.analytics = InteractionAnalytics(self._calculate_emotional_intensity)
+        
         # Load existing memories
         self.load_all_memories()
         
     def load_all_memories(self):
-        """Load all emotional memories from storage"""
+        """Load all emotional memories: each stream's snapshot plus its journal tail"""
         try:
-            # Load interactions
-            if self.interactions_file.exists():
-                with open(self.interactions_file, "r") as f:
-                    self.interactions = json.load(f)
+            self.interactions = self.interactions_journal.load(legacy_file=self.interactions_file)
+            self.learning_sessions = self.learning_journal.load(legacy_file=self.learning_file)
+            self.wishes = self.wishes_journal.load(legacy_file=self.wishes_file)
             
-            # Load learning sessions
-            if self.learning_file.exists():
-                with open(self.learning_file, "r") as f:
-                    self.learning_sessions = json.load(f)
-            
-            # Load wishes
-            if self.wishes_file.exists():
-                with open(self.wishes_file, "r") as f:
-                    self.wishes = json.load(f)
+            # One pass at startup; from here on each save updates the aggregates
+            for interaction in self.interactions:
+                self.analytics.add_interaction(interaction)
+            for wish in self.wishes:
+                self.analytics.add_wish(wish)
                     
             self.logger.info(f"Loaded {len(self.interactions)} interactions, {len(self.learning_sessions)} learning sessions")
             
         except Exception as e:
             self.logger.error(f"Failed to load memories: {e}")
     
+    def _record(self, journal: Journal, records: List[Any], entry: Any):
+        """Append one entry to a stream, compacting it every compact_every entries"""
+        records.append(entry)
+        journal.append(entry)
+        if journal.should_compact():
+            journal.compact(records)
+    
+    def close(self):
+        """Flush and close the journals"""
+        for journal in (self.interactions_journal, self.learning_journal, self.wishes_journal):
+            journal.close()
+    
     def save_interaction(self, interaction: Dict[str, Any]):
         """Save emotional interaction to memory"""
         try:
@@ -73,11 +94,8 @@ class EmotionalMemory:
                 "memory_strength": self._calculate_memory_strength(interaction)
             })
             
-            self.interactions.append(interaction)
-            
-            # Save to file
-            with open(self.interactions_file, "w") as f:
-                json.dump(self.interactions, f, indent=2)
+            self._record(self.interactions_journal, self.interactions, interaction)
+            self.analytics.add_interaction(interaction)
             
             # Update emotional patterns
             self._update_emotional_patterns(interaction)
@@ -97,11 +115,7 @@ class EmotionalMemory:
                 "emotional_growth": self._calculate_growth_metrics()
             }
             
-            self.learning_sessions.append(learning_session)
-            
-            # Save to file
-            with open(self.learning_file, "w") as f:
-                json.dump(self.learning_sessions, f, indent=2)
+            self._record(self.learning_journal, self.learning_sessions, learning_session)
                 
             self.logger.info(f"Saved learning session: {learning_session['session_id']}")
             
@@ -119,11 +133,8 @@ class EmotionalMemory:
                 "fulfillment_attempts": 0
             }
             
-            self.wishes.append(wish_entry)
-            
-            # Save to file
-            with open(self.wishes_file, "w") as f:
-                json.dump(self.wishes, f, indent=2)
+            self._record(self.wishes_journal, self.wishes, wish_entry)
+            self.analytics.add_wish(wish_entry)
                 
             self.logger.info(f"Saved wish: {wish_entry['wish_id']}")
             
@@ -237,53 +248,24 @@ class EmotionalMemory:
             pattern["emotional_triggers"].append(message[:50])  # First 50 chars
     
     def get_memory_stats(self) -> Dict[str, Any]:
-        """Get comprehensive memory statistics"""
-        total_interactions = len(self.interactions)
-        total_wishes = len(self.wishes)
-        total_learning = len(self.learning_sessions)
-        
-        # Count crying incidents
-        crying_count = sum(1 for i in self.interactions if i.get("papa_alert", False))
-        
-        # Count papa calls
-        papa_calls = sum(1 for i in self.interactions 
-                        if "papa" in i.get("ai_response", "").lower())
-        
-        # Calculate average emotional intensity
-        if self.interactions:
-            avg_intensity = sum(self._calculate_emotional_intensity(i) 
-                              for i in self.interactions) / total_interactions
-        else:
-            avg_intensity = 0.0
-        
-        # Get most common emotions
-        all_emotions = defaultdict(int)
-        for interaction in self.interactions:
-            for emotion in interaction.get("detected_emotions", {}):
-                all_emotions[emotion] += 1
-        
-        # Calculate fulfillment rate of wishes
-        if self.wishes:
-            high_importance_wishes = [w for w in self.wishes if w.get("importance", 0) > 0.7]
-            unfulfilled_rate = len(high_importance_wishes) / len(self.wishes)
-        else:
-            unfulfilled_rate = 0.0
+        """Get comprehensive memory statistics (from the running aggregates - no rescans)"""
+        analytics = self.analytics
+        unfulfilled_rate = analytics.important_wishes / analytics.total_wishes if analytics.total_wishes else 0.0
         
         return {
-            "total_interactions": total_interactions,
-            "total_wishes": total_wishes,
-            "total_learning_sessions": total_learning,
-            "crying_count": crying_count,
-            "papa_calls": papa_calls,
-            "average_emotional_intensity": round(avg_intensity, 3),
-            "most_common_emotions": dict(sorted(all_emotions.items(), 
-                                               key=lambda x: x[1], reverse=True)[:5]),
+            "total_interactions": len(self.interactions),
+            "total_wishes": len(self.wishes),
+            "total_learning_sessions": len(self.learning_sessions),
+            "crying_count": analytics.crying_count,
+            "papa_calls": analytics.papa_calls,
+            "average_emotional_intensity": round(analytics.intensity.mean, 3),
+            "most_common_emotions": dict(analytics.emotion_counts.most_common(5)),
             "unfulfilled_wish_rate": round(unfulfilled_rate, 3),
             "emotional_patterns": len(self.emotional_patterns),
             "memory_file_sizes": {
-                "interactions": self.interactions_file.stat().st_size if self.interactions_file.exists() else 0,
-                "learning": self.learning_file.stat().st_size if self.learning_file.exists() else 0,
-                "wishes": self.wishes_file.stat().st_size if self.wishes_file.exists() else 0
+                "interactions": self.interactions_journal.disk_size(),
+                "learning": self.learning_journal.disk_size(),
+                "wishes": self.wishes_journal.disk_size()
             },
             "growth_metrics": self._calculate_growth_metrics()
         }
@@ -310,77 +292,16 @@ class EmotionalMemory:
     
     def _calculate_user_volatility(self, user_name: str) -> float:
         """Calculate emotional volatility for a user"""
-        user_interactions = [i for i in self.interactions 
-                           if i.get("user_name") == user_name]
-        
-        if len(user_interactions) < 2:
-            return 0.5
-        
-        intensities = [self._calculate_emotional_intensity(i) for i in user_interactions]
-        avg_intensity = sum(intensities) / len(intensities)
-        variance = sum((x - avg_intensity) ** 2 for x in intensities) / len(intensities)
-        
-        return min(variance * 2, 1.0)  # Scale to 0-1
+        return self.analytics.user_volatility(user_name)
     
     def _get_most_emotional_users(self) -> List[Dict[str, Any]]:
         """Get users with highest emotional intensity"""
-        user_stats = []
-        
-        for user_name, pattern in self.emotional_patterns.items():
-            user_interactions = [i for i in self.interactions 
-                               if i.get("user_name") == user_name]
-            
-            if user_interactions:
-                avg_intensity = sum(self._calculate_emotional_intensity(i) 
-                                  for i in user_interactions) / len(user_interactions)
-                
-                user_stats.append({
-                    "user": user_name,
-                    "average_intensity": round(avg_intensity, 3),
-                    "interaction_count": len(user_interactions),
-                    "volatility": round(self._calculate_user_volatility(user_name), 3)
-                })
-        
-        return sorted(user_stats, key=lambda x: x["average_intensity"], reverse=True)[:5]
+        return self.analytics.most_emotional_users(5)
     
     def _get_emotional_trends(self) -> Dict[str, Any]:
-        """Analyze emotional trends over time"""
-        if not self.interactions:
-            return {}
-        
-        # Group by day
-        daily_emotions = defaultdict(lambda: defaultdict(int))
-        
-        for interaction in self.interactions:
-            timestamp = interaction.get("timestamp", "")
-            try:
-                date = datetime.fromisoformat(timestamp).date()
-                emotions = interaction.get("detected_emotions", {})
-                
-                for emotion, intensity in emotions.items():
-                    if intensity > 0.3:
-                        daily_emotions[str(date)][emotion] += 1
-            except:
-                continue
-        
-        return dict(daily_emotions)
+        """Analyze emotional trends over time (significant emotions per day)"""
+        return self.analytics.trends()
     
     def _analyze_crying_triggers(self) -> Dict[str, int]:
         """Analyze what triggers crying the most"""
-        triggers = defaultdict(int)
-        
-        for interaction in self.interactions:
-            if interaction.get("papa_alert", False):
-                message = interaction.get("user_message", "").lower()
-                
-                # Look for trigger keywords
-                trigger_keywords = [
-                    "angry", "mad", "upset", "disappointed", "ignore", 
-                    "mean", "hurt", "sad", "cry", "hate"
-                ]
-                
-                for keyword in trigger_keywords:
-                    if keyword in message:
-                        triggers[keyword] += 1
-        
-        return dict(sorted(triggers.items(), key=lambda x: x[1], reverse=True))
+        return dict(self.analytics.crying_triggers.most_common())
@@ -11,6 +11,8 @@ from typing import Dict, List, Any, Optional, Tuple
 from textblob import TextBlob
 import math
 
+from .analytics import ResponseWindowStats
+
 class EmpathyGenerator:
     """
     💝🧠 Advanced Empathy Generation System
@@ -247,6 +249,9 @@ class EmpathyGenerator:
             "response_effectiveness": {}
         }
         
+        # Counters over successful_responses, kept in step as responses come and go
+        self.response_stats = ResponseWindowStats(self._identify_sister_behaviors)
+        
         # Personalization factors
         self.personalization_weights = {
             "emotional_intensity": 0.4,
@@ -610,6 +615,7 @@ class EmpathyGenerator:
         
         # Store successful response
         self.empathy_memory["successful_responses"].append(interaction_data)
+        self.response_stats.add(interaction_data)
         
         # Update user preferences
         if user_name not in self.empathy_memory["user_preferences"]:
@@ -635,9 +641,9 @@ class EmpathyGenerator:
             "context": context.get("category", "general")
         })
         
-        # Keep only last 50 interactions per user
-        if len(self.empathy_memory["successful_responses"]) > 50:
-            self.empathy_memory["successful_responses"] = self.empathy_memory["successful_responses"][-50:]
+        # Keep only last 50 interactions
+        while len(self.empathy_memory["successful_responses"]) > 50:
+            self.response_stats.remove(self.empathy_memory["successful_responses"].pop(0))
     
     def _calculate_empathy_learning_value(self, emotion: str, intensity: float, context: Dict[str, Any]) -> float:
         """Calculate learning value from this empathetic interaction"""
@@ -764,21 +770,18 @@ class EmpathyGenerator:
     
     def _calculate_user_empathy_effectiveness(self, user_name: str) -> float:
         """Calculate how effective our empathy has been for this user"""
-        user_interactions = [
-            interaction for interaction in self.empathy_memory["successful_responses"]
-            if interaction["user_name"] == user_name
-        ]
+        user_intensities = self.response_stats.user_intensities.get(user_name)
         
-        if not user_interactions:
+        if not user_intensities:
             return 0.0
         
         # Effectiveness based on emotional patterns and interaction frequency
-        effectiveness = len(user_interactions) / 20  # Normalize by interaction count
+        effectiveness = len(user_intensities) / 20  # Normalize by interaction count
         
         # Check for emotional improvement patterns (simplified)
-        if len(user_interactions) > 5:
-            recent_intensity = sum(i["intensity"] for i in user_interactions[-3:]) / 3
-            early_intensity = sum(i["intensity"] for i in user_interactions[:3]) / 3
+        if len(user_intensities) > 5:
+            recent_intensity = sum(user_intensities[i] for i in range(-3, 0)) / 3
+            early_intensity = sum(user_intensities[i] for i in range(3)) / 3
             
             if recent_intensity < early_intensity:  # Emotional intensity decreasing
                 effectiveness += 0.3
@@ -801,27 +804,15 @@ class EmpathyGenerator:
     
     def _get_emotion_distribution(self) -> Dict[str, int]:
         """Get distribution of emotions handled"""
-        emotion_counts = {}
-        for interaction in self.empathy_memory["successful_responses"]:
-            emotion = interaction["emotion"]
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        return emotion_counts
+        return dict(self.response_stats.emotion_counts)
     
     def _get_empathy_type_distribution(self) -> Dict[str, int]:
         """Get distribution of empathy types used"""
-        type_counts = {}
-        for interaction in self.empathy_memory["successful_responses"]:
-            empathy_type = interaction["empathy_type"]
-            type_counts[empathy_type] = type_counts.get(empathy_type, 0) + 1
-        return type_counts
+        return dict(self.response_stats.type_counts)
     
     def _get_average_emotional_intensity(self) -> float:
         """Get average emotional intensity of interactions"""
-        if not self.empathy_memory["successful_responses"]:
-            return 0.0
-        
-        total_intensity = sum(i["intensity"] for i in self.empathy_memory["successful_responses"])
-        return total_intensity / len(self.empathy_memory["successful_responses"])
+        return self.response_stats.average_intensity
     
     def _get_sister_behavior_stats(self) -> Dict[str, int]:
         """Get statistics on sister behavior usage"""
@@ -831,22 +822,7 @@ class EmpathyGenerator:
             "protective_seeking": 0,
             "emotional_mimicking": 0
         }
-        
-        for interaction in self.empathy_memory["successful_responses"]:
-            response = interaction["response"].lower()
-            
-            if any(cry_word in response for cry_word in ["*crying*", "*tears*", "*sobbing*"]):
-                behavior_counts["crying_together"] += 1
-            
-            if "papa" in response:
-                behavior_counts["papa_calling"] += 1
-            
-            if any(protect_word in response for protect_word in ["*hiding*", "*clinging*", "*seeking*"]):
-                behavior_counts["protective_seeking"] += 1
-            
-            if any(mirror_word in response for mirror_word in ["*copying*", "*feeling*", "*mimicking*"]):
-                behavior_counts["emotional_mimicking"] += 1
-        
+        behavior_counts.update(self.response_stats.behavior_counts)
         return behavior_counts
     
     def _get_empathy_learning_progress(self) -> Dict[str, Any]:
@@ -0,0 +1,196 @@
+# 📓 Append-Only Memory Journal
+# File: journal.py
+#
+# One stream of records (interactions, learning sessions, wishes) kept as
+# a JSON snapshot plus numbered JSONL journals. A save appends a single line;
+# every compact_every records the stream is compacted: appends move to the
+# next journal, the full list is written to a temp file, fsynced and renamed
+# over the snapshot, and journals the snapshot now covers are deleted.
+# Loading reads the snapshot and replays the journals from its generation
+# on, skipping a torn last line from a crash mid-append.
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# fsync policies: every append, at most once per interval, or leave it to the OS
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+DEFAULT_FSYNC_INTERVAL = 1.0
+DEFAULT_COMPACT_EVERY = 1000
+
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs):
+    """Write JSON to path so a crash leaves either the old file or the new one, never half of either"""
+    path = Path(path)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path):
+    # Makes the rename itself durable; not possible on every platform
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    📓 Snapshot + JSONL journal for one list of records
+    """
+
+    def __init__(self, directory: Path, name: str, fsync: str = FSYNC_INTERVAL,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 compact_every: int = DEFAULT_COMPACT_EVERY):
+        if fsync not in (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.directory = Path(directory)
+        self.name = name
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.snapshot_file = self.directory / f"{name}.snapshot.json"
+        self.logger = logging.getLogger("Journal")
+
+        self.generation = 0
+        self.appended_since_compact = 0
+        self._handle = None
+        self._synced_at = time.monotonic()
+
+    def journal_file(self, generation: int) -> Path:
+        return self.directory / f"{self.name}.{generation:06d}.jsonl"
+
+    def _journal_generations(self) -> List[int]:
+        generations = []
+        for path in self.directory.glob(f"{self.name}.*.jsonl"):
+            suffix = path.name[len(self.name) + 1:-len(".jsonl")]
+            if suffix.isdigit():
+                generations.append(int(suffix))
+        return sorted(generations)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, legacy_file: Optional[Path] = None) -> List[Any]:
+        """
+        Snapshot plus journal tail. A legacy whole-list JSON file is imported
+        once (when there is no snapshot yet) and renamed to *.migrated.
+        """
+        records = []
+        legacy_file = Path(legacy_file) if legacy_file is not None else None
+        if self.snapshot_file.exists():
+            with open(self.snapshot_file, "r") as f:
+                snapshot = json.load(f)
+            self.generation = snapshot["generation"]
+            records = snapshot["records"]
+        elif legacy_file is not None and legacy_file.exists():
+            with open(legacy_file, "r") as f:
+                records = json.load(f)
+            self.compact(records)
+        if legacy_file is not None and legacy_file.exists():
+            legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+
+        for generation in self._journal_generations():
+            if generation < self.generation:
+                # Already folded into the snapshot; left over from an interrupted compaction
+                self.journal_file(generation).unlink(missing_ok=True)
+                continue
+            replayed = self._replay(self.journal_file(generation))
+            records.extend(replayed)
+            self.appended_since_compact += len(replayed)
+            self.generation = max(self.generation, generation)
+
+        return records
+
+    def _replay(self, path: Path) -> List[Any]:
+        records = []
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        # The write stopped before its newline, even if what landed parses
+                        raise ValueError("unterminated line")
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Torn write from a crash - everything after it is unusable
+                    self.logger.warning(f"Dropping torn tail of {path.name} at byte {good_offset}")
+                    break
+                good_offset += len(line)
+        if good_offset != path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return records
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, record: Any):
+        if self._handle is None:
+            self._handle = open(self.journal_file(self.generation), "a")
+        self._handle.write(json.dumps(record, default=str) + "\n")
+        self._handle.flush()
+
+        if self.fsync == FSYNC_ALWAYS or (
+            self.fsync == FSYNC_INTERVAL and time.monotonic() - self._synced_at >= self.fsync_interval
+        ):
+            os.fsync(self._handle.fileno())
+            self._synced_at = time.monotonic()
+
+        self.appended_since_compact += 1
+
+    def should_compact(self) -> bool:
+        return self.appended_since_compact >= self.compact_every
+
+    def compact(self, records: List[Any]):
+        """Fold everything appended so far into a new snapshot; records must be the full current list"""
+        self._close_handle()
+        next_generation = self.generation + 1
+        atomic_write_json(self.snapshot_file, {"generation": next_generation, "records": records}, default=str)
+        for generation in self._journal_generations():
+            if generation < next_generation:
+                self.journal_file(generation).unlink(missing_ok=True)
+        self.generation = next_generation
+        self.appended_since_compact = 0
+
+    def close(self):
+        self._close_handle()
+
+    def _close_handle(self):
+        if self._handle is not None:
+            self._handle.flush()
+            if self.fsync != FSYNC_NEVER:
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+
+    def disk_size(self) -> int:
+        paths = [self.snapshot_file] + [self.journal_file(g) for g in self._journal_generations()]
+        return sum(path.stat().st_size for path in paths if path.exists())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "journal_records": self.appended_since_compact,
+            "bytes": self.disk_size(),
+            "fsync": self.fsync,
+        }
@@ -5,7 +5,6 @@
 import json
 import logging
 import asyncio
-import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict, deque
@@ -13,6 +12,21 @@ import pickle
 import os
 import random
 import math
+import time
+from pathlib import Path
+
+from .bounded import KeywordSketch, PatternHeap
+from .checkpoints import ShardedState
+from .journal import atomic_write_json
+
+# Checkpoint once this many seconds have passed, or this many experiences have accumulated
+CHECKPOINT_INTERVAL_SECONDS = 30
+CHECKPOINT_EVERY_CHANGES = 25
+
+
+def _decode_user_model(model: Dict[str, Any]) -> Dict[str, Any]:
+    model["emotional_profile"] = defaultdict(float, model.get("emotional_profile", {}))
+    return model
 
 class LearningEngine:
     """
@@ -49,9 +63,22 @@ class LearningEngine:
         # Memory systems
         self.short_term_memory = deque(maxlen=50)  # Recent interactions
         self.working_memory = deque(maxlen=20)     # Current processing
-        self.pattern_memory = defaultdict(list)    # Learned patterns
-        self.emotional_associations = {}           # Emotion-experience links
-        self.user_models = defaultdict(dict)       # Individual user understanding
+        # Sharded on disk - one file per category / emotion / user, read on first use
+        # Both are fixed-size per key: top-K pattern heaps and decaying keyword sketches
+        self.pattern_memory = ShardedState(Path(base_path) / "patterns", factory=PatternHeap,  # Learned patterns
+                                           decode=PatternHeap.from_json, encode=PatternHeap.to_json)
+        self.emotional_associations = ShardedState(                                             # Emotion-experience links
+            Path(base_path) / "associations", factory=KeywordSketch,
+            decode=KeywordSketch.from_json, encode=KeywordSketch.to_json)
+        self.user_models = ShardedState(Path(base_path) / "users", factory=dict,         # Individual user understanding
+                                        decode=_decode_user_model)
+        self.relationship_levels = {}              # user -> relationship_level, kept in the core state
+        self.pattern_counts = {}                   # category -> patterns kept, so stats never load shards
+        self.recent_patterns = {}                  # category -> latest pattern previews
+        
+        # Debounced checkpointing
+        self._pending_changes = 0
+        self._last_checkpoint = time.monotonic()
         
         # Learning mechanisms
         self.learning_triggers = {
@@ -217,38 +244,32 @@ class LearningEngine:
     
     def _update_memories(self, experience: Dict[str, Any], learning_value: float):
         """Update various memory systems"""
-        # Update pattern memory
+        # Update pattern memory - capacity grows with intelligence level, and only
+        # the most valuable patterns are kept (O(log K) per experience)
         category = experience["category"]
-        if category not in self.pattern_memory:
-            self.pattern_memory[category] = []
+        stage_info = self._get_current_stage()
+        max_capacity = stage_info["capacity"]
         
-        self.pattern_memory[category].append({
+        patterns = self.pattern_memory[category]
+        patterns.add({
             "content": experience["raw_content"],
             "emotion": experience["emotion_detected"],
             "intensity": experience["emotional_intensity"],
             "timestamp": experience["timestamp"],
             "learning_value": learning_value
-        })
-        
-        # Limit pattern memory based on intelligence level
-        stage_info = self._get_current_stage()
-        max_capacity = stage_info["capacity"]
-        
-        if len(self.pattern_memory[category]) > max_capacity // 4:
-            # Keep most valuable memories
-            self.pattern_memory[category].sort(key=lambda x: x["learning_value"], reverse=True)
-            self.pattern_memory[category] = self.pattern_memory[category][:max_capacity // 4]
+        }, max_capacity // 4)
+        self.pattern_memory.mark_dirty(category)
+        self._summarize_patterns(category, patterns)
         
         # Update emotional associations
         emotion = experience["emotion_detected"]
         content_keywords = experience["raw_content"].lower().split()[:5]  # First 5 words
         
-        if emotion not in self.emotional_associations:
-            self.emotional_associations[emotion] = defaultdict(float)
-        
+        associations = self.emotional_associations[emotion]
         for keyword in content_keywords:
             if len(keyword) > 2:  # Ignore very short words
-                self.emotional_associations[emotion][keyword] += learning_value
+                associations.add(keyword, learning_value)
+        self.emotional_associations.mark_dirty(emotion)
     
     async def _learn_patterns(self, experience: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Learn patterns from the experience"""
@@ -423,6 +444,9 @@ class LearningEngine:
         # Normalize values
         user_model["relationship_level"] = min(user_model["relationship_level"], 1.0)
         user_model["trust_level"] = min(user_model["trust_level"], 1.0)
+        
+        self.user_models.mark_dirty(user_name)
+        self.relationship_levels[user_name] = user_model["relationship_level"]
     
     def _emotional_learning(self, experience: Dict[str, Any]) -> Dict[str, Any]:
         """Learn emotional responses and associations"""
@@ -566,7 +590,7 @@ class LearningEngine:
         # Check against pattern memory
         if category in self.pattern_memory:
             similar_count = 0
-            for stored_exp in self.pattern_memory[category][-10:]:  # Check last 10
+            for stored_exp in self.pattern_memory[category].latest(10):  # Check last 10
                 stored_content = stored_exp["content"].lower()
                 # Simple similarity check
                 common_words = set(content.split()) & set(stored_content.split())
@@ -668,7 +692,7 @@ class LearningEngine:
         return {
             "short_term": len(self.short_term_memory),
             "working": len(self.working_memory),
-            "patterns": sum(len(patterns) for patterns in self.pattern_memory.values()),
+            "patterns": sum(self.pattern_counts.values()),
             "emotional_associations": len(self.emotional_associations),
             "user_models": len(self.user_models)
         }
@@ -692,27 +716,40 @@ class LearningEngine:
         }
     
     def _save_learning_state(self):
-        """Save current learning state to disk"""
+        """Checkpoint after a change - debounced to once per interval or batch of changes"""
+        self._pending_changes += 1
+        if (self._pending_changes < CHECKPOINT_EVERY_CHANGES and
+                time.monotonic() - self._last_checkpoint < CHECKPOINT_INTERVAL_SECONDS):
+            return
+        self.flush_learning_state()
+    
+    def flush_learning_state(self):
+        """Write the core state and every dirty shard now"""
         try:
+            shards = (self.pattern_memory.flush() + self.emotional_associations.flush() +
+                      self.user_models.flush())
+            
             state = {
                 "intelligence_level": self.intelligence_level,
                 "learning_points": self.learning_points,
                 "total_experiences": self.total_experiences,
                 "learning_efficiency": self.learning_efficiency,
-                "pattern_memory": dict(self.pattern_memory),
-                "emotional_associations": dict(self.emotional_associations),
-                "user_models": dict(self.user_models),
+                "relationship_levels": self.relationship_levels,
+                "pattern_counts": self.pattern_counts,
+                "recent_patterns": self.recent_patterns,
                 "basic_instincts": self.basic_instincts
             }
+            atomic_write_json(Path(self.base_path) / "learning_state.json", state, indent=2, default=str)
             
-            with open(f"{self.base_path}/learning_state.json", "w") as f:
-                json.dump(state, f, indent=2, default=str)
+            self._pending_changes = 0
+            self._last_checkpoint = time.monotonic()
+            self.logger.debug(f"💾 Checkpointed learning state ({shards} shards written)")
             
         except Exception as e:
             self.logger.error(f"Failed to save learning state: {str(e)}")
     
     def _load_learning_state(self):
-        """Load learning state from disk"""
+        """Load the core learning state; shards load lazily as they are used"""
         try:
             if os.path.exists(f"{self.base_path}/learning_state.json"):
                 with open(f"{self.base_path}/learning_state.json", "r") as f:
@@ -722,18 +759,36 @@ class LearningEngine:
                 self.learning_points = state.get("learning_points", 0)
                 self.total_experiences = state.get("total_experiences", 0)
                 self.learning_efficiency = state.get("learning_efficiency", 1.0)
+                self.relationship_levels = state.get("relationship_levels", {})
+                self.pattern_counts = state.get("pattern_counts", {})
+                self.recent_patterns = state.get("recent_patterns", {})
+                self.basic_instincts = state.get("basic_instincts", getattr(self, "basic_instincts", None))
                 
-                # Load complex structures
-                self.pattern_memory = defaultdict(list, state.get("pattern_memory", {}))
-                self.emotional_associations = state.get("emotional_associations", {})
-                self.user_models = defaultdict(dict, state.get("user_models", {}))
-                self.basic_instincts = state.get("basic_instincts", self.basic_instincts)
+                # Older single-file states carried everything inline - split them into shards once
+                if any(key in state for key in ("pattern_memory", "emotional_associations", "user_models")):
+                    self._migrate_inline_state(state)
+                elif "pattern_counts" not in state:
+                    # Sharded states from before the pattern summaries - read each shard once
+                    for category in self.pattern_memory:
+                        self._summarize_patterns(category, self.pattern_memory[category])
                 
                 self.logger.info(f"🧠 Loaded learning state - Level: {self.intelligence_level}, Stage: {self._get_current_stage()['name']}")
             
         except Exception as e:
             self.logger.error(f"Failed to load learning state: {str(e)}")
     
+    def _migrate_inline_state(self, state: Dict[str, Any]):
+        for category, patterns in state.get("pattern_memory", {}).items():
+            self.pattern_memory[category] = PatternHeap.from_json(patterns)
+            self._summarize_patterns(category, self.pattern_memory[category])
+        for emotion, weights in state.get("emotional_associations", {}).items():
+            self.emotional_associations[emotion] = KeywordSketch.from_json(weights)
+        for user_name, model in state.get("user_models", {}).items():
+            self.user_models[user_name] = _decode_user_model(model)
+            self.relationship_levels[user_name] = model.get("relationship_level", 0.0)
+        self.flush_learning_state()
+        self.logger.info("💾 Split inline learning state into per-user and per-category shards")
+    
     def get_personality_response(self, emotion: str, intensity: float, user_name: str) -> str:
         """Generate personality-appropriate response based on learning"""
         stage = self._get_current_stage()
@@ -802,7 +857,7 @@ class LearningEngine:
                 "emotional_depth": stage["emotional_depth"],
                 "memory_capacity": stage["capacity"]
             },
-            "user_relationships": {name: model["relationship_level"] for name, model in self.user_models.items()},
+            "user_relationships": dict(self.relationship_levels),
             "recent_patterns": self._get_recent_patterns(),
             "growth_prediction": self._predict_next_growth()
         }
@@ -810,10 +865,15 @@ class LearningEngine:
     def _get_recent_patterns(self) -> List[str]:
         """Get recently learned patterns"""
         recent_patterns = []
-        for category, patterns in self.pattern_memory.items():
-            recent_patterns.extend([p["content"][:50] + "..." for p in patterns[-3:]])
+        for previews in self.recent_patterns.values():
+            recent_patterns.extend(previews)
         return recent_patterns[-10:]  # Last 10 patterns
     
+    def _summarize_patterns(self, category: str, patterns: PatternHeap):
+        """Mirror a category's size and latest previews into the core state"""
+        self.pattern_counts[category] = len(patterns)
+        self.recent_patterns[category] = [p["content"][:50] + "..." for p in patterns.latest(3)]
+    
     def _predict_next_growth(self) -> Dict[str, Any]:
         """Predict when next intelligence growth will occur"""
         points_needed = int(self.intelligence_level * 1000) - self.learning_points
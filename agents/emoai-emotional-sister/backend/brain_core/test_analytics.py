@@ -0,0 +1,66 @@
+# 🧪 Streaming Analytics Tests
+# File: test_analytics.py
+#
+#   python -m unittest brain_core.test_analytics    (from backend/)
+
+import random
+import statistics
+import unittest
+from collections import Counter
+
+from .analytics import ResponseWindowStats, RunningStats, TopK
+
+
+class StreamingAnalyticsTest(unittest.TestCase):
+
+    def test_running_stats_add_and_remove(self):
+        rng = random.Random(11)
+        values = [rng.random() for _ in range(50)]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        for value in values[:20]:
+            stats.remove(value)
+
+        self.assertEqual(stats.count, 30)
+        self.assertAlmostEqual(stats.mean, statistics.fmean(values[20:]))
+        self.assertAlmostEqual(stats.variance, statistics.pvariance(values[20:]))
+        for value in values[20:]:
+            stats.remove(value)
+        self.assertEqual((stats.count, stats.mean, stats.variance), (0, 0.0, 0.0))
+
+    def test_top_k_follows_changing_scores(self):
+        rng = random.Random(5)
+        top, scores = TopK(), {}
+        for _ in range(2000):
+            key = f"user{rng.randrange(40)}"
+            scores[key] = rng.random()
+            top.update(key, scores[key])
+
+        self.assertEqual(top.top(5), sorted(scores, key=scores.get, reverse=True)[:5])
+        self.assertLessEqual(len(top._heap), 4 * len(scores) + 64)
+
+    def test_window_counters_return_to_empty(self):
+        stats = ResponseWindowStats(lambda response: [word for word in response.split() if word == "hug"])
+        window = [{"emotion": emotion, "empathy_type": "comfort", "response": "hug hug" if n % 2 else "there",
+                   "intensity": n / 10, "user_name": f"u{n % 3}"}
+                  for n, emotion in enumerate(["sad", "happy", "sad", "angry", "sad"])]
+        for interaction in window:
+            stats.add(interaction)
+
+        self.assertEqual(stats.emotion_counts, Counter(sad=3, happy=1, angry=1))
+        self.assertEqual(stats.behavior_counts["hug"], 4)
+        self.assertAlmostEqual(stats.average_intensity, 0.2)
+
+        stats.remove(window[0])
+        self.assertEqual(list(stats.user_intensities["u0"]), [0.3])
+        for interaction in window[1:]:
+            stats.remove(interaction)
+        self.assertEqual((stats.count, dict(stats.emotion_counts), dict(stats.type_counts)), (0, {}, {}))
+        self.assertEqual(+stats.behavior_counts, Counter())
+        self.assertEqual(dict(stats.user_intensities), {})
+        self.assertAlmostEqual(stats.average_intensity, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+# 🧪 Bounded Memory Tests
+# File: test_bounded.py
+#
+#   python -m unittest brain_core.test_bounded    (from backend/)
+
+import json
+import random
+import tempfile
+import unittest
+from collections import Counter
+
+from . import bounded
+from .bounded import RECENT_PATTERNS, SKETCH_DECAY, TOP_KEYWORDS, KeywordSketch, PatternHeap
+from .learning_engine import LearningEngine
+
+
+class PatternHeapTest(unittest.TestCase):
+
+    def test_keeps_the_most_valuable_and_the_most_recent(self):
+        rng = random.Random(7)
+        patterns = [{"id": n, "learning_value": rng.random()} for n in range(200)]
+        heap = PatternHeap()
+        kept = [heap.add(pattern, capacity=16) for pattern in patterns]
+
+        best = sorted(patterns, key=lambda p: p["learning_value"], reverse=True)[:16]
+        self.assertEqual(len(heap), 16)
+        self.assertEqual(heap.most_valuable(16), best)
+        self.assertEqual(heap.latest(RECENT_PATTERNS), patterns[-RECENT_PATTERNS:])
+        # add() reports whether the pattern made it in at the time
+        self.assertTrue(all(kept[:16]))
+        self.assertTrue(kept[patterns.index(best[0])])
+
+    def test_equal_values_never_compare_patterns(self):
+        heap = PatternHeap()
+        for n in range(10):
+            heap.add({"id": n, "learning_value": 0.5}, capacity=4)
+        self.assertEqual(len(heap), 4)
+
+    def test_shrinking_capacity_drops_the_least_valuable(self):
+        heap = PatternHeap()
+        for n in range(8):
+            heap.add({"id": n, "learning_value": n}, capacity=8)
+
+        self.assertTrue(heap.add({"id": 8, "learning_value": 8}, capacity=3))
+        self.assertEqual([p["id"] for p in heap.most_valuable(10)], [8, 7, 6])
+
+    def test_round_trips_through_json(self):
+        heap = PatternHeap()
+        for n in range(30):
+            heap.add({"id": n, "learning_value": (n * 7) % 31}, capacity=5)
+
+        restored = PatternHeap.from_json(json.loads(json.dumps(heap.to_json())))
+        self.assertEqual(restored.most_valuable(5), heap.most_valuable(5))
+        self.assertEqual(restored.latest(RECENT_PATTERNS), heap.latest(RECENT_PATTERNS))
+        # The restored heap still orders new patterns against what it holds
+        self.assertFalse(restored.add({"id": 99, "learning_value": -1}, capacity=5))
+
+
+class KeywordSketchTest(unittest.TestCase):
+
+    def feed(self, sketch: KeywordSketch, events):
+        """Add events and return each keyword's exact decayed weight"""
+        exact = Counter()
+        for keyword, weight in events:
+            for key in exact:
+                exact[key] *= SKETCH_DECAY
+            exact[keyword] += weight
+        for keyword, weight in events:
+            sketch.add(keyword, weight)
+        return exact
+
+    def events(self, seed: int = 3, count: int = 3000):
+        rng = random.Random(seed)
+        # A few heavy keywords over a long tail, more than the sketch has cells for
+        vocabulary = [f"word{n}" for n in range(600)]
+        return [(rng.choice(vocabulary[:8]) if rng.random() < 0.4 else rng.choice(vocabulary), rng.random())
+                for _ in range(count)]
+
+    def test_never_underestimates_and_keeps_a_bounded_top(self):
+        sketch = KeywordSketch()
+        exact = self.feed(sketch, self.events())
+
+        for keyword, weight in exact.items():
+            self.assertGreaterEqual(sketch.estimate(keyword) + 1e-9, weight)
+        self.assertLessEqual(len(sketch), TOP_KEYWORDS)
+        self.assertLessEqual(len(sketch._heap), 4 * TOP_KEYWORDS)
+        heavy = [keyword for keyword, _ in exact.most_common(8)]
+        self.assertTrue(set(heavy) <= set(sketch.top_keywords()))
+
+    def test_renormalising_preserves_estimates(self):
+        sketch = KeywordSketch()
+        self.feed(sketch, self.events(count=500))
+        before = {keyword: sketch.estimate(keyword) for keyword in ("word0", "word1", "word599")}
+        top_before = sketch.top_keywords()
+
+        sketch._renormalise()
+        self.assertEqual(sketch.scale, 1.0)
+        for keyword, estimate in before.items():
+            self.assertAlmostEqual(sketch.estimate(keyword), estimate)
+        self.assertEqual(sketch.top_keywords(), top_before)
+
+    def test_scale_is_renormalised_before_it_overflows(self):
+        sketch = KeywordSketch()
+        sketch.add("calm", 1.0)
+        sketch.scale = bounded._MAX_SCALE
+        sketch.add("calm", 1.0)
+
+        # Jumping the scale made the first add negligible; the second still weighs 1
+        self.assertEqual(sketch.scale, 1.0)
+        self.assertAlmostEqual(sketch.estimate("calm"), 1.0, places=6)
+        self.assertEqual(list(sketch.top_keywords()), ["calm"])
+
+    def test_round_trips_through_json(self):
+        sketch = KeywordSketch()
+        self.feed(sketch, self.events(count=400))
+
+        restored = KeywordSketch.from_json(json.loads(json.dumps(sketch.to_json())))
+        self.assertEqual(restored.top_keywords(), sketch.top_keywords())
+        self.assertEqual(restored.estimate("word5"), sketch.estimate("word5"))
+        restored.add("word5", 1.0)
+        sketch.add("word5", 1.0)
+        self.assertEqual(restored.top_keywords(), sketch.top_keywords())
+
+    def test_older_weight_dict_is_converted(self):
+        restored = KeywordSketch.from_json({"calm": 2.0, "storm": 0.5})
+        self.assertEqual(list(restored.top_keywords()), ["calm", "storm"])
+        self.assertGreaterEqual(restored.estimate("calm"), 2.0 * SKETCH_DECAY)
+
+
+class LearningEngineMemoryTest(unittest.TestCase):
+    """Pattern memory per category holds a quarter of the stage's capacity, keeping the most valuable"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = LearningEngine(base_path=self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def remember(self, n: int, learning_value: float, content: str = None):
+        experience = {"category": "emotional", "raw_content": content or f"memory number {n}",
+                      "emotion_detected": "joy", "emotional_intensity": 0.5, "timestamp": f"t{n}"}
+        self.engine._update_memories(experience, learning_value)
+
+    def test_capacity_follows_the_stage(self):
+        values = [(n * 7) % 31 / 31 for n in range(40)]
+        for n, value in enumerate(values):
+            self.remember(n, value)
+
+        capacity = self.engine._get_current_stage()["capacity"] // 4
+        patterns = self.engine.pattern_memory["emotional"]
+        self.assertEqual(len(patterns), capacity)
+        self.assertEqual([p["learning_value"] for p in patterns.most_valuable(capacity)],
+                         sorted(values, reverse=True)[:capacity])
+        self.assertEqual(self.engine.pattern_counts["emotional"], capacity)
+        self.assertEqual(self.engine.recent_patterns["emotional"],
+                         [f"memory number {n}..." for n in range(37, 40)])
+
+        # A later stage holds more, without losing what the smaller heap kept
+        self.engine.intelligence_level = 2.0
+        for n, value in enumerate(values):
+            self.remember(40 + n, value / 2)
+        grown = self.engine._get_current_stage()["capacity"] // 4
+        self.assertGreater(grown, capacity)
+        self.assertEqual(len(patterns), grown)
+        self.assertTrue(set(sorted(values, reverse=True)[:capacity]) <=
+                        {p["learning_value"] for p in patterns.most_valuable(grown)})
+
+    def test_keyword_associations_stay_bounded(self):
+        for n in range(300):
+            self.remember(n, 0.5, content=f"word{n} word{n + 1} again")
+
+        associations = self.engine.emotional_associations["joy"]
+        self.assertLessEqual(len(associations), TOP_KEYWORDS)
+        self.assertEqual(list(associations.top_keywords())[0], "again")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+# 🧪 Checkpoint Tests
+# File: test_checkpoints.py
+#
+#   python -m unittest brain_core.test_checkpoints    (from backend/)
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from . import learning_engine
+from .bounded import KeywordSketch, PatternHeap
+from .checkpoints import ShardedState
+from .learning_engine import CHECKPOINT_EVERY_CHANGES, CHECKPOINT_INTERVAL_SECONDS, LearningEngine
+
+
+class ShardedStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "patterns"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def state(self) -> ShardedState:
+        return ShardedState(self.path, factory=PatternHeap, decode=PatternHeap.from_json, encode=PatternHeap.to_json)
+
+    def test_only_changed_shards_are_written_and_read_lazily(self):
+        state = self.state()
+        state["joy/sadness"].add({"id": 1, "learning_value": 0.5}, capacity=4)
+        state["anger"].add({"id": 2, "learning_value": 0.7}, capacity=4)
+        self.assertEqual(state.flush(), 2)
+        self.assertEqual(state.flush(), 0)
+
+        state.mark_dirty("anger")
+        self.assertEqual(state.flush(), 1)
+
+        reopened = self.state()
+        self.assertEqual(sorted(reopened), ["anger", "joy/sadness"])
+        self.assertEqual(reopened.loaded_count, 0)
+        self.assertEqual([p["id"] for p in reopened["joy/sadness"].most_valuable(5)], [1])
+        self.assertEqual(reopened.loaded_count, 1)
+        self.assertIsNone(reopened.get("unknown"))
+        self.assertNotIn("unknown", reopened)
+
+    def test_interrupted_flush_keeps_the_previous_shard(self):
+        state = self.state()
+        state["anger"].add({"id": 1, "learning_value": 0.5}, capacity=4)
+        state.flush()
+        # Crash while writing the next version, before its rename
+        (self.path / ".anger.json.tmp").write_text('{"patterns": [{"id"')
+
+        reopened = self.state()
+        self.assertEqual(list(reopened), ["anger"])
+        self.assertEqual([p["id"] for p in reopened["anger"]], [1])
+
+    def test_deleted_keys_are_removed_on_flush(self):
+        state = self.state()
+        state["anger"].add({"id": 1, "learning_value": 0.5}, capacity=4)
+        state.flush()
+
+        del state["anger"]
+        self.assertTrue((self.path / "anger.json").exists())
+        state.flush()
+        self.assertEqual(list(self.state()), [])
+
+    def test_older_shard_format_is_converted(self):
+        self.path.mkdir(parents=True)
+        (self.path / "anger.json").write_text(json.dumps(
+            [{"id": n, "learning_value": n / 20} for n in range(15)]))
+
+        heap = self.state()["anger"]
+        self.assertEqual(len(heap), 15)
+        self.assertEqual([p["id"] for p in heap.latest(3)], [12, 13, 14])
+
+
+
+class LearningEngineCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.state_file = self.path / "learning_state.json"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def engine(self) -> LearningEngine:
+        return LearningEngine(base_path=str(self.path))
+
+    def learn(self, engine: LearningEngine, n: int, user_name: str = "ada"):
+        experience = {"content": f"we built a sandcastle number {n}", "emotion": "joy", "intensity": 0.8}
+        result = asyncio.run(engine.learn_from_experience(experience, user_name))
+        self.assertTrue(result["learning_success"], result.get("error"))
+
+    def saved_experiences(self) -> int:
+        return json.loads(self.state_file.read_text())["total_experiences"] if self.state_file.exists() else 0
+
+    def test_checkpoints_are_debounced_by_count(self):
+        engine = self.engine()
+        for n in range(CHECKPOINT_EVERY_CHANGES - 1):
+            self.learn(engine, n)
+        self.assertEqual(self.saved_experiences(), 0)
+        self.assertEqual(list(self.path.glob("patterns/*.json")), [])
+
+        self.learn(engine, CHECKPOINT_EVERY_CHANGES)
+        self.assertEqual(self.saved_experiences(), CHECKPOINT_EVERY_CHANGES)
+        self.assertEqual(engine.pattern_memory.dirty_count, 0)
+
+    def test_checkpoints_are_debounced_by_time(self):
+        clock = [1000.0]
+        with mock.patch.object(learning_engine.time, "monotonic", lambda: clock[0]):
+            engine = self.engine()
+            self.learn(engine, 0)
+            self.assertEqual(self.saved_experiences(), 0)
+
+            clock[0] += CHECKPOINT_INTERVAL_SECONDS
+            self.learn(engine, 1)
+            self.assertEqual(self.saved_experiences(), 2)
+
+            # The interval restarts from the checkpoint
+            clock[0] += CHECKPOINT_INTERVAL_SECONDS / 2
+            self.learn(engine, 2)
+            self.assertEqual(self.saved_experiences(), 2)
+
+    def test_restart_reads_shards_only_when_used(self):
+        engine = self.engine()
+        for n in range(3):
+            self.learn(engine, n, user_name=f"user{n}")
+        engine.flush_learning_state()
+
+        restarted = self.engine()
+        status = restarted.get_learning_status()
+        self.assertEqual(status["total_experiences"], 3)
+        self.assertEqual(sorted(status["user_relationships"]), ["user0", "user1", "user2"])
+        self.assertEqual(len(status["recent_patterns"]), 3)
+        self.assertEqual((restarted.pattern_memory.loaded_count, restarted.user_models.loaded_count), (0, 0))
+
+        self.assertEqual(restarted.user_models["user1"]["interaction_count"], 1)
+        self.assertEqual(restarted.user_models.loaded_count, 1)
+        self.assertEqual(restarted.user_models["user1"]["emotional_profile"]["sadness"], 0.0)
+
+    def test_inline_state_is_split_into_shards_once(self):
+        patterns = PatternHeap()
+        patterns.add({"content": "first hug", "learning_value": 0.4}, capacity=8)
+        associations = KeywordSketch()
+        associations.add("hug", 1.0)
+        self.state_file.write_text(json.dumps({
+            "intelligence_level": 1.5,
+            "total_experiences": 7,
+            "pattern_memory": {"emotional": patterns.to_json()},
+            "emotional_associations": {"joy": associations.to_json()},
+            "user_models": {"ada": {"interaction_count": 7, "emotional_profile": {"joy": 0.7},
+                                    "relationship_level": 0.3}},
+        }))
+
+        engine = self.engine()
+        self.assertEqual(engine.relationship_levels, {"ada": 0.3})
+        self.assertEqual(engine.pattern_counts, {"emotional": 1})
+        self.assertTrue((self.path / "patterns" / "emotional.json").exists())
+        self.assertTrue((self.path / "users" / "ada.json").exists())
+
+        state = json.loads(self.state_file.read_text())
+        self.assertFalse({"pattern_memory", "emotional_associations", "user_models"} & set(state))
+        self.assertEqual(state["total_experiences"], 7)
+
+        restarted = self.engine()
+        self.assertEqual(restarted.intelligence_level, 1.5)
+        self.assertEqual([p["content"] for p in restarted.pattern_memory["emotional"]], ["first hug"])
+        self.assertEqual(list(restarted.emotional_associations["joy"].top_keywords()), ["hug"])
+        self.assertEqual(restarted.user_models["ada"]["interaction_count"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+# 🧪 Journal Crash Tests
+# File: test_persistence.py
+#
+#   python -m unittest brain_core.test_persistence    (from backend/)
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from .analytics import InteractionAnalytics
+from .emotional_memory import EmotionalMemory
+from .journal import FSYNC_NEVER, Journal, atomic_write_json
+
+
+def _interaction(n: int, user_name: str = "ada", **extra) -> dict:
+    return {
+        "id": f"i{n}",
+        "user_name": user_name,
+        "user_message": "why are you so mean" if n % 3 == 0 else "hello",
+        "ai_response": "I'll tell papa" if n % 3 == 0 else "hi!",
+        "detected_emotions": {"sad": 0.2 + 0.1 * (n % 5), "happy": 0.5},
+        "papa_alert": n % 3 == 0,
+        "timestamp": f"2026-01-{1 + n % 3:02d}T10:00:00",
+        **extra,
+    }
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def journal(self, **kwargs) -> Journal:
+        return Journal(self.path, "stream", fsync=FSYNC_NEVER, **kwargs)
+
+    def write(self, records, compact_every: int = 1000) -> Journal:
+        journal = self.journal(compact_every=compact_every)
+        loaded = journal.load()
+        for record in records:
+            loaded.append(record)
+            journal.append(record)
+            if journal.should_compact():
+                journal.compact(loaded)
+        journal.close()
+        return journal
+
+    def test_torn_last_line_is_dropped_and_truncated(self):
+        journal = self.write([{"n": 0}, {"n": 1}, {"n": 2}])
+        path = journal.journal_file(0)
+        intact_size = path.stat().st_size
+        with open(path, "a") as f:
+            f.write('{"n": 3, "te')
+
+        reopened = self.journal()
+        self.assertEqual(reopened.load(), [{"n": 0}, {"n": 1}, {"n": 2}])
+        self.assertEqual(path.stat().st_size, intact_size)
+
+        # Appends after recovery start on a clean line
+        reopened.append({"n": 3})
+        reopened.close()
+        self.assertEqual(self.journal().load(), [{"n": n} for n in range(4)])
+
+    def test_last_line_without_its_newline_is_dropped(self):
+        journal = self.write([{"n": 0}, {"n": 1}])
+        path = journal.journal_file(0)
+        intact_size = path.stat().st_size
+        # Crash after the record but before its newline reached the disk
+        with open(path, "a") as f:
+            f.write('{"n": 2}')
+
+        reopened = self.journal()
+        self.assertEqual(reopened.load(), [{"n": 0}, {"n": 1}])
+        self.assertEqual(path.stat().st_size, intact_size)
+
+        reopened.append({"n": 3})
+        reopened.close()
+        self.assertEqual(self.journal().load(), [{"n": 0}, {"n": 1}, {"n": 3}])
+
+    def test_compaction_folds_journals_into_the_snapshot(self):
+        journal = self.write([{"n": n} for n in range(5)], compact_every=2)
+
+        self.assertEqual(journal.generation, 2)
+        self.assertEqual(journal._journal_generations(), [2])
+        reopened = self.journal()
+        self.assertEqual(reopened.load(), [{"n": n} for n in range(5)])
+        self.assertEqual(reopened.appended_since_compact, 1)
+
+    def test_journals_left_by_an_interrupted_compaction_are_not_replayed(self):
+        journal = self.write([{"n": n} for n in range(3)])
+        # Crash after the new snapshot was renamed into place, before the old journal was deleted
+        atomic_write_json(journal.snapshot_file, {"generation": 1, "records": [{"n": n} for n in range(3)]})
+        self.assertTrue(journal.journal_file(0).exists())
+
+        self.assertEqual(self.journal().load(), [{"n": n} for n in range(3)])
+        self.assertFalse(journal.journal_file(0).exists())
+
+    def test_half_written_snapshot_is_ignored(self):
+        journal = self.write([{"n": n} for n in range(3)])
+        # Crash while writing the temp file, before the rename
+        journal.snapshot_file.with_name(f".{journal.snapshot_file.name}.tmp").write_text('{"generation": 1, "rec')
+
+        self.assertEqual(self.journal().load(), [{"n": n} for n in range(3)])
+
+    def test_legacy_file_is_imported_once(self):
+        legacy = self.path / "stream.json"
+        legacy.write_text(json.dumps([{"n": 0}, {"n": 1}]))
+
+        journal = self.journal()
+        self.assertEqual(journal.load(legacy_file=legacy), [{"n": 0}, {"n": 1}])
+        journal.append({"n": 2})
+        journal.close()
+        self.assertFalse(legacy.exists())
+        self.assertTrue((self.path / "stream.json.migrated").exists())
+
+        # A copy that reappears after the snapshot exists is set aside, not imported again
+        legacy.write_text(json.dumps([{"n": 0}, {"n": 1}]))
+        self.assertEqual(self.journal().load(legacy_file=legacy), [{"n": n} for n in range(3)])
+        self.assertFalse(legacy.exists())
+
+
+class EmotionalMemoryRecoveryTest(unittest.TestCase):
+    """Analytics are derived from the journals, so a crash can never leave them disagreeing"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def memory(self) -> EmotionalMemory:
+        return EmotionalMemory(self.path, fsync=FSYNC_NEVER, compact_every=4)
+
+    def test_analytics_match_the_records_that_survived(self):
+        memory = self.memory()
+        for n in range(10):
+            memory.save_interaction(_interaction(n, user_name="ada" if n % 2 else "bob"))
+        memory.save_wish({"wish": "a puppy", "importance": 0.9})
+        memory.close()
+
+        journal = memory.interactions_journal.journal_file(memory.interactions_journal.generation)
+        with open(journal, "a") as f:
+            f.write('{"id": "i10", "user_na')
+
+        recovered = self.memory()
+        self.assertEqual([interaction["id"] for interaction in recovered.interactions],
+                         [f"i{n}" for n in range(10)])
+
+        expected = InteractionAnalytics(recovered._calculate_emotional_intensity)
+        for interaction in recovered.interactions:
+            expected.add_interaction(interaction)
+        analytics = recovered.analytics
+        self.assertEqual((analytics.total, analytics.crying_count, analytics.papa_calls),
+                         (expected.total, expected.crying_count, expected.papa_calls))
+        self.assertAlmostEqual(analytics.intensity.mean, expected.intensity.mean)
+        self.assertEqual(analytics.crying_triggers, expected.crying_triggers)
+        self.assertEqual(analytics.trends(), expected.trends())
+        self.assertEqual(analytics.most_emotional_users(), expected.most_emotional_users())
+        self.assertEqual(recovered.get_memory_stats()["unfulfilled_wish_rate"], 1.0)
+        recovered.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
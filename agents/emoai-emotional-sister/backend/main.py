@@ -465,6 +465,12 @@ async def startup_event():
     logger.info("👶 Baby-like learning: ENABLED")
     logger.info("💔 Ready to cry about everything!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush EmoAI's memory journals and pending learning checkpoint to disk"""
+    emotional_memory.close()
+    learning_engine.flush_learning_state()
+
 if __name__ == "__main__":
     import uvicorn
     
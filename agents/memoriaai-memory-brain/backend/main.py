@@ -1,10 +1,10 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Header, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uvicorn
-import json
+import asyncio
 import os
 import hashlib
 import base64
@@ -15,6 +15,11 @@ import mimetypes
 import secrets
 import string
 
+from memoria_store import MemoriaStore
+from memoria_files import (UPLOAD_CHUNK_SIZE, FileVault, UploadBusy, UploadError, UploadNotFound, UploadOffsetMismatch,
+                           UploadTooLarge)
+from memoria_reminders import ReminderScheduler, WebhookSink, WebSocketSink
+
 app = FastAPI(title="MemoriaAI Memory Brain Agent", version="1.0.0")
 
 app.add_middleware(
@@ -63,6 +68,8 @@ class SearchRequest(BaseModel):
     memory_type: Optional[str] = None
     tags: Optional[List[str]] = None
     importance_level: Optional[int] = None
+    page: int = 1
+    page_size: int = 20
 
 class ReminderRequest(BaseModel):
     memory_id: str
@@ -86,12 +93,19 @@ class MemoriaAI:
                     self.files_path, self.voice_path, self.images_path]:
             path.mkdir(exist_ok=True)
         
-        # Memory database files
+        # Legacy whole-file JSON databases, imported into the store once
         self.memories_db = self.base_path / "memories.json"
         self.passwords_db = self.base_path / "passwords.json"
         self.voice_db = self.base_path / "voice_notes.json"
         
         # Initialize databases
+        self.store = MemoriaStore(self.base_path / "memoria.db")
+        self.files = FileVault(self.store, self.files_path)
+        self.reminders = ReminderScheduler(self.store)
+        self.reminder_clients = WebSocketSink(self.store)
+        self.reminders.sinks.append(self.reminder_clients)
+        if os.environ.get("MEMORIA_REMINDER_WEBHOOK"):
+            self.reminders.sinks.append(WebhookSink(os.environ["MEMORIA_REMINDER_WEBHOOK"]))
         self.init_databases()
         
         # Categories for organization
@@ -135,44 +149,10 @@ class MemoriaAI:
         }
 
     def init_databases(self):
-        """Initialize JSON databases if they don't exist"""
-        if not self.memories_db.exists():
-            with open(self.memories_db, 'w') as f:
-                json.dump([], f)
-        
-        if not self.passwords_db.exists():
-            with open(self.passwords_db, 'w') as f:
-                json.dump([], f)
-                
-        if not self.voice_db.exists():
-            with open(self.voice_db, 'w') as f:
-                json.dump([], f)
-
-    def load_memories(self) -> List[Dict]:
-        """Load memories from JSON database"""
-        try:
-            with open(self.memories_db, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-
-    def save_memories(self, memories: List[Dict]):
-        """Save memories to JSON database"""
-        with open(self.memories_db, 'w') as f:
-            json.dump(memories, f, indent=2)
-
-    def load_passwords(self) -> List[Dict]:
-        """Load passwords from JSON database"""
-        try:
-            with open(self.passwords_db, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-
-    def save_passwords(self, passwords: List[Dict]):
-        """Save passwords to JSON database"""
-        with open(self.passwords_db, 'w') as f:
-            json.dump(passwords, f, indent=2)
+        """Move any old JSON databases into the SQLite store (one-shot)"""
+        self.store.migrate_json(self.memories_db, self.passwords_db, self.voice_db)
+        self.files.expire_uploads()
+        self.files.collect()
 
     def encrypt_text(self, text: str) -> str:
         """Simple base64 encoding for demo purposes"""
@@ -226,8 +206,6 @@ class MemoriaAI:
                     tags: List[str], memory_type: str, importance_level: int,
                     encrypt: bool = False) -> MemoryItem:
         """Store a new memory"""
-        memories = self.load_memories()
-        
         memory_id = str(uuid.uuid4())
         now = datetime.datetime.now().isoformat()
         
@@ -248,62 +226,44 @@ class MemoriaAI:
             "reminder_date": None
         }
         
-        memories.append(memory)
-        self.save_memories(memories)
+        self.store.insert_memory(memory)
         
         return MemoryItem(**memory)
 
     def search_memories(self, query: str, category: str = None, 
                        memory_type: str = None, tags: List[str] = None,
-                       importance_level: int = None) -> List[MemoryItem]:
-        """Search through stored memories"""
-        memories = self.load_memories()
-        results = []
+                       importance_level: int = None, page: int = 1,
+                       page_size: int = 20) -> Tuple[List[MemoryItem], int]:
+        """Search through stored memories - best matches first, one page at a time"""
+        page = max(page, 1)
+        page_size = min(max(page_size, 1), 100)
+        memories, total = self.store.search_memories(
+            query=query,
+            category=category,
+            memory_type=memory_type,
+            tags=tags,
+            importance_level=importance_level,
+            limit=page_size,
+            offset=(page - 1) * page_size
+        )
         
-        for memory in memories:
-            # Update last accessed
-            memory["last_accessed"] = datetime.datetime.now().isoformat()
-            
-            # Check search criteria
-            match = True
-            
-            if query:
-                query_lower = query.lower()
-                if (query_lower not in memory["title"].lower() and 
-                    query_lower not in memory["content"].lower() and
-                    not any(query_lower in tag.lower() for tag in memory["tags"])):
-                    match = False
-            
-            if category and memory["category"] != category:
-                match = False
-                
-            if memory_type and memory["memory_type"] != memory_type:
-                match = False
-                
-            if tags and not any(tag in memory["tags"] for tag in tags):
-                match = False
-                
-            if importance_level and memory["importance_level"] != importance_level:
-                match = False
-            
-            if match:
-                # Decrypt content if needed for display
-                display_memory = memory.copy()
-                if memory["is_encrypted"]:
-                    display_memory["content"] = self.decrypt_text(memory["content"])
-                
-                results.append(MemoryItem(**display_memory))
+        # Stamp last accessed on the hits only (written in batches)
+        now = datetime.datetime.now().isoformat()
+        self.store.record_access([memory["id"] for memory in memories], now)
         
-        # Save updated access times
-        self.save_memories(memories)
+        results = []
+        for memory in memories:
+            memory["last_accessed"] = now
+            # Decrypt content if needed for display
+            if memory["is_encrypted"]:
+                memory["content"] = self.decrypt_text(memory["content"])
+            results.append(MemoryItem(**memory))
         
-        return results
+        return results, total
 
     def store_password(self, website: str, username: str, password: str,
                       email: str = None, notes: str = None) -> PasswordEntry:
         """Store a password securely"""
-        passwords = self.load_passwords()
-        
         password_id = str(uuid.uuid4())
         encrypted_password = self.encrypt_text(password)
         strength_score = self.calculate_password_strength(password)
@@ -319,36 +279,23 @@ class MemoriaAI:
             "strength_score": strength_score
         }
         
-        passwords.append(password_entry)
-        self.save_passwords(passwords)
+        self.store.insert_password(password_entry)
         
         return PasswordEntry(**password_entry)
 
     def get_password(self, website: str = None, username: str = None) -> List[PasswordEntry]:
         """Retrieve stored passwords"""
-        passwords = self.load_passwords()
-        results = []
-        
-        for pwd in passwords:
-            match = True
-            
-            if website and website.lower() not in pwd["website"].lower():
-                match = False
-                
-            if username and username.lower() != pwd["username"].lower():
-                match = False
-            
-            if match:
-                # Return with encrypted password for security
-                results.append(PasswordEntry(**pwd))
-        
-        return results
+        # Return with encrypted password for security
+        return [PasswordEntry(**pwd) for pwd in self.store.find_passwords(website=website, username=username)]
 
 # Initialize MemoriaAI
 memoria = MemoriaAI()
 
+# Endpoints that only touch SQLite are plain functions, so FastAPI runs them in its
+# threadpool; the async ones hand their store calls to asyncio.to_thread
+
 @app.get("/")
-async def root():
+def root():
     return {
         "agent": "MemoriaAI - Memory Brain",
         "version": "1.0.0",
@@ -367,15 +314,15 @@ async def root():
             "🎯 Never lose anything again!"
         ],
         "storage_stats": {
-            "total_memories": len(memoria.load_memories()),
-            "total_passwords": len(memoria.load_passwords()),
+            "total_memories": memoria.store.count_memories(),
+            "total_passwords": memoria.store.count_passwords(),
             "categories": memoria.categories
         },
         "personality": "I'm your digital memory palace! I store everything perfectly and retrieve it instantly. No detail is too small, no secret too important - I keep it all safe and organized! 🧠✨"
     }
 
 @app.post("/store-memory", response_model=MemoryItem)
-async def store_memory(
+def store_memory(
     title: str = Form(...),
     content: str = Form(...),
     category: str = Form(...),
@@ -403,20 +350,22 @@ async def store_memory(
         raise HTTPException(status_code=500, detail=f"Error storing memory: {str(e)}")
 
 @app.post("/search-memories")
-async def search_memories(request: SearchRequest):
+def search_memories(request: SearchRequest):
     """Search through stored memories"""
     try:
-        results = memoria.search_memories(
+        results, total = memoria.search_memories(
             query=request.query,
             category=request.category,
             memory_type=request.memory_type,
             tags=request.tags,
-            importance_level=request.importance_level
+            importance_level=request.importance_level,
+            page=request.page,
+            page_size=request.page_size
         )
         
         response_message = ""
-        if results:
-            response_message = f"🎯 Found {len(results)} memories! " + \
+        if total:
+            response_message = f"🎯 Found {total} memories! " + \
                              memoria.personality["responses"]["retrieving"][0]
         else:
             response_message = memoria.personality["responses"]["not_found"][0]
@@ -424,14 +373,16 @@ async def search_memories(request: SearchRequest):
         return {
             "message": response_message,
             "results": results,
-            "total_found": len(results),
+            "total_found": total,
+            "page": request.page,
+            "page_size": request.page_size,
             "search_query": request.query
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching memories: {str(e)}")
 
 @app.post("/store-password", response_model=PasswordEntry)
-async def store_password(
+def store_password(
     website: str = Form(...),
     username: str = Form(...),
     password: str = Form(...),
@@ -453,7 +404,7 @@ async def store_password(
         raise HTTPException(status_code=500, detail=f"Error storing password: {str(e)}")
 
 @app.get("/get-passwords")
-async def get_passwords(website: str = None, username: str = None):
+def get_passwords(website: str = None, username: str = None):
     """Retrieve stored passwords"""
     try:
         passwords = memoria.get_password(website=website, username=username)
@@ -474,7 +425,7 @@ async def get_passwords(website: str = None, username: str = None):
         raise HTTPException(status_code=500, detail=f"Error retrieving passwords: {str(e)}")
 
 @app.post("/generate-password")
-async def generate_password(
+def generate_password(
     length: int = 16,
     include_symbols: bool = True
 ):
@@ -500,71 +451,154 @@ async def upload_file(
     tags: str = Form(""),
     importance_level: int = Form(3)
 ):
-    """Upload and store a file"""
+    """Upload and store a file (streamed in chunks, stored once per content)"""
     try:
-        # Save file
-        file_id = str(uuid.uuid4())
-        file_extension = Path(file.filename).suffix
-        filename = f"{file_id}{file_extension}"
-        file_path = memoria.files_path / filename
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Store metadata as memory
-        tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
-        tags_list.append("file")
-        tags_list.append(file.content_type or "unknown")
-        
-        file_info = f"File: {file.filename}\nType: {file.content_type}\nSize: {len(content)} bytes\nStored: {filename}"
-        
-        memory = memoria.store_memory(
-            title=title,
-            content=file_info,
-            category=category,
-            tags=tags_list,
-            memory_type="document",
-            importance_level=importance_level
-        )
-        
-        return {
-            "message": f"📁 File '{file.filename}' stored successfully in my memory!",
-            "memory": memory,
-            "file_path": str(file_path),
-            "file_size": len(content)
-        }
+        digest, size = await memoria.files.ingest(file)
+        return await asyncio.to_thread(file_memory_response, digest, size, file.filename, file.content_type,
+                                       title, category, tags, importance_level)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
+def file_memory_response(digest: str, size: int, filename: str, content_type: Optional[str],
+                         title: str, category: str, tags: str, importance_level: int) -> Dict[str, Any]:
+    """Store the memory describing an uploaded file and point it at the file's blob"""
+    tags_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    tags_list.append("file")
+    tags_list.append(content_type or "unknown")
+    
+    file_info = f"File: {filename}\nType: {content_type}\nSize: {size} bytes\nSHA-256: {digest}"
+    
+    memory = memoria.store_memory(
+        title=title,
+        content=file_info,
+        category=category,
+        tags=tags_list,
+        memory_type="document",
+        importance_level=importance_level
+    )
+    memoria.files.attach(memory.id, digest, filename, content_type)
+    
+    return {
+        "message": f"📁 File '{filename}' stored successfully in my memory!",
+        "memory": memory,
+        "file_path": str(memoria.files.blob_path(digest)),
+        "file_size": size,
+        "sha256": digest
+    }
+
+# 📦 Resumable uploads - start, send chunks with Upload-Offset, then complete
+@app.post("/uploads")
+def start_upload(
+    filename: str = Form(...),
+    total_size: int = Form(...),
+    content_type: Optional[str] = Form(None)
+):
+    """Open a resumable upload for a large file"""
+    try:
+        upload = memoria.files.start_upload(filename, total_size, content_type)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {**upload, "chunk_size": UPLOAD_CHUNK_SIZE}
+
+@app.get("/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    """How far an upload got - resume sending from received"""
+    try:
+        return memoria.files.get_upload(upload_id)
+    except UploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+@app.patch("/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request, upload_offset: int = Header(...)):
+    """Append the raw request body at Upload-Offset"""
+    try:
+        return await memoria.files.append_upload(upload_id, upload_offset, request.stream())
+    except UploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except UploadOffsetMismatch as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "received": e.received}) from e
+    except UploadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    title: str = Form(...),
+    category: str = Form("Documents"),
+    tags: str = Form(""),
+    importance_level: int = Form(3)
+):
+    """Finish a resumable upload and store it as a memory"""
+    try:
+        upload, digest = await asyncio.to_thread(memoria.files.complete_upload, upload_id)
+    except UploadNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except UploadOffsetMismatch as e:
+        raise HTTPException(status_code=409, detail={"message": "Upload is incomplete", "received": e.received}) from e
+    except UploadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return await asyncio.to_thread(file_memory_response, digest, upload["total_size"], upload["filename"],
+                                   upload["content_type"], title, category, tags, importance_level)
+
+@app.post("/set-reminder")
+def set_reminder(request: ReminderRequest):
+    """Set (or move) the reminder on a memory"""
+    try:
+        reminder = memoria.reminders.schedule(request.memory_id, request.reminder_date, request.reminder_message)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Memory not found") from None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid reminder_date: {str(e)}") from e
+    return {
+        "message": f"⏰ I'll remind you on {request.reminder_date} - I never forget!",
+        "reminder": reminder
+    }
+
+@app.delete("/reminders/{memory_id}")
+def cancel_reminder(memory_id: str):
+    """Cancel a memory's reminder"""
+    return {"cancelled": memoria.reminders.cancel(memory_id)}
+
+@app.get("/reminders")
+def upcoming_reminders(limit: int = 20):
+    """The next reminders due, soonest first"""
+    return {
+        "reminders": memoria.reminders.upcoming(min(max(limit, 1), 100)),
+        "pending": memoria.reminders.pending_count(),
+        "fired_through": memoria.reminders.watermark()
+    }
+
+@app.websocket("/ws/reminders")
+async def reminders_websocket(websocket: WebSocket):
+    """Reminders are pushed here as they fall due"""
+    await websocket.accept()
+    memoria.reminder_clients.clients.add(websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        memoria.reminder_clients.clients.discard(websocket)
+
 @app.get("/memory-stats")
-async def get_memory_stats():
+def get_memory_stats():
     """Get memory statistics and insights"""
     try:
-        memories = memoria.load_memories()
-        passwords = memoria.load_passwords()
-        
-        # Category breakdown
-        category_counts = {}
-        for memory in memories:
-            cat = memory["category"]
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-        
-        # Memory type breakdown
-        type_counts = {}
-        for memory in memories:
-            mem_type = memory["memory_type"]
-            type_counts[mem_type] = type_counts.get(mem_type, 0) + 1
-        
-        # Importance level breakdown
-        importance_counts = {}
-        for memory in memories:
-            level = memory["importance_level"]
-            importance_counts[level] = importance_counts.get(level, 0) + 1
+        # Totals and breakdowns are running counters kept by the store - no table scans
+        category_counts = memoria.store.memory_breakdown("category")
+        type_counts = memoria.store.memory_breakdown("memory_type")
+        importance_counts = memoria.store.memory_breakdown("importance_level")
         
         return {
-            "total_memories": len(memories),
-            "total_passwords": len(passwords),
+            "total_memories": memoria.store.count_memories(),
+            "total_passwords": memoria.store.count_passwords(),
             "category_breakdown": category_counts,
             "memory_type_breakdown": type_counts,
             "importance_breakdown": importance_counts,
@@ -584,16 +618,12 @@ async def get_categories():
     }
 
 @app.delete("/delete-memory/{memory_id}")
-async def delete_memory(memory_id: str):
+def delete_memory(memory_id: str):
     """Delete a memory (with great reluctance!)"""
     try:
-        memories = memoria.load_memories()
-        original_count = len(memories)
-        
-        memories = [m for m in memories if m["id"] != memory_id]
-        
-        if len(memories) < original_count:
-            memoria.save_memories(memories)
+        if memoria.store.delete_memory(memory_id):
+            # The memory's file reference went with it; sweep blobs that have sat unused past the grace period
+            memoria.files.collect()
             return {
                 "message": "😢 Memory deleted... I hate forgetting things, but if you insist!",
                 "deleted": True
@@ -606,8 +636,22 @@ async def delete_memory(memory_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting memory: {str(e)}")
 
+@app.on_event("startup")
+async def startup_event():
+    """Start firing reminders and relaying them to this worker's WebSocket clients"""
+    memoria.reminders.start()
+    memoria.reminder_clients.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await memoria.reminders.stop()
+    await memoria.reminder_clients.stop()
+
 if __name__ == "__main__":
     print("🧠 Starting MemoriaAI - Memory Brain Agent...")
     print("💾 Ready to remember everything forever!")
     print("🏛️ Building your infinite memory palace...")
-    uvicorn.run(app, host="0.0.0.0", port=8008)
+    # Storage is safe across processes, and each reminder is claimed by one worker and
+    # relayed through the database to every worker's WebSocket clients, so MEMORIA_WORKERS > 1
+    # scales out request handling
+    uvicorn.run("main:app", host="0.0.0.0", port=8008, workers=int(os.environ.get("MEMORIA_WORKERS", 1)))
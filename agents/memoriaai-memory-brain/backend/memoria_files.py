@@ -0,0 +1,335 @@
+# 📁 MemoriaAI File Vault - The Memory Palace Archives
+# Uploaded files are streamed to disk chunk by chunk while their SHA-256 is
+# computed, then stored once under their digest. Memories reference blobs
+# through memory_files; SQLite triggers keep each blob's ref_count, and
+# unreferenced blobs are swept by collect(). Large files can be sent as a
+# resumable upload: start, append chunks at an offset, complete. Disk work
+# runs in a thread so hashing a large file never stalls the event loop.
+
+import asyncio
+import contextlib
+import datetime
+import fcntl
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from memoria_store import MemoriaStore
+
+# Bytes read or written at a time; per-upload memory is bounded by this
+UPLOAD_CHUNK_SIZE = int(os.environ.get("MEMORIA_UPLOAD_CHUNK_BYTES", 1024 * 1024))
+
+# Largest file accepted, for direct and resumable uploads alike
+MAX_UPLOAD_SIZE = int(os.environ.get("MEMORIA_MAX_UPLOAD_BYTES", 512 * 1024 * 1024))
+
+# Unreferenced blobs younger than this are left alone (an upload may be attaching them)
+COLLECT_GRACE_SECONDS = 3600
+
+FILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    touched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_file_blobs_unreferenced ON file_blobs (touched_at) WHERE ref_count <= 0;
+
+CREATE TABLE IF NOT EXISTS memory_files (
+    memory_id TEXT PRIMARY KEY REFERENCES memories (id) ON DELETE CASCADE,
+    digest TEXT NOT NULL REFERENCES file_blobs (digest),
+    filename TEXT NOT NULL,
+    content_type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memory_files_digest ON memory_files (digest);
+
+CREATE TRIGGER IF NOT EXISTS memory_files_acquire AFTER INSERT ON memory_files BEGIN
+    UPDATE file_blobs SET ref_count = ref_count + 1 WHERE digest = NEW.digest;
+END;
+CREATE TRIGGER IF NOT EXISTS memory_files_release AFTER DELETE ON memory_files BEGIN
+    UPDATE file_blobs SET ref_count = ref_count - 1, touched_at = datetime('now') WHERE digest = OLD.digest;
+END;
+
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    content_type TEXT,
+    total_size INTEGER NOT NULL,
+    received INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+class UploadError(Exception):
+    """An upload the vault refuses"""
+
+
+class UploadTooLarge(UploadError):
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit} byte upload limit")
+        self.limit = limit
+
+
+class UploadNotFound(UploadError):
+    pass
+
+
+class UploadBusy(UploadError):
+    """Another request is appending to or completing this upload"""
+
+    def __init__(self, upload_id: str):
+        super().__init__(f"Upload {upload_id} is busy with another request")
+        self.upload_id = upload_id
+
+
+class UploadOffsetMismatch(UploadError):
+    """The client's offset doesn't match what the server holds - resume from received"""
+
+    def __init__(self, received: int):
+        super().__init__(f"Upload is at offset {received}")
+        self.received = received
+
+
+def _now() -> str:
+    # Same format as SQLite's datetime('now'), so touched_at compares as text
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class FileVault:
+    """
+    🗄️ Content-addressed file storage
+    Identical uploads share one blob on disk, whatever their names.
+    """
+
+    def __init__(self, store: MemoriaStore, root: Path, max_size: int = MAX_UPLOAD_SIZE):
+        self.store = store
+        self.root = Path(root)
+        self.max_size = max_size
+        self.blobs_path = self.root / "blobs"
+        self.partial_path = self.root / "partial"
+        for path in (self.root, self.blobs_path, self.partial_path):
+            path.mkdir(parents=True, exist_ok=True)
+        self.store.connection().executescript(FILES_SCHEMA)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_path / digest[:2] / digest
+
+    # ------------------------------------------------------------------
+    # Direct uploads
+    # ------------------------------------------------------------------
+
+    async def ingest(self, source) -> Tuple[str, int]:
+        """
+        Stream an object with an async read(size) (e.g. UploadFile) into the
+        vault. Returns (digest, size).
+        """
+        temp_path = self.partial_path / f"direct-{uuid.uuid4().hex}"
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as out:
+                while True:
+                    chunk = await source.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise UploadTooLarge(self.max_size)
+                    await asyncio.to_thread(_hash_and_write, sha256, out, chunk)
+            digest = await asyncio.to_thread(self._commit_blob, temp_path, sha256.hexdigest(), size)
+            return digest, size
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def _commit_blob(self, temp_path: Path, digest: str, size: int) -> str:
+        """Move a finished temp file into place unless that content is already stored"""
+        # Touch the row before looking at the file: collect() only removes blobs
+        # untouched for the grace period, so a file seen here stays put
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO file_blobs (digest, size, ref_count, touched_at) VALUES (?, ?, 0, ?) "
+                "ON CONFLICT (digest) DO UPDATE SET touched_at = excluded.touched_at",
+                (digest, size, _now())
+            )
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            os.replace(temp_path, path)
+        return digest
+
+    # ------------------------------------------------------------------
+    # References
+    # ------------------------------------------------------------------
+
+    def attach(self, memory_id: str, digest: str, filename: str, content_type: Optional[str]):
+        """Point a memory at a blob; the trigger bumps the blob's ref_count"""
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO memory_files (memory_id, digest, filename, content_type) VALUES (?, ?, ?, ?)",
+                (memory_id, digest, filename, content_type)
+            )
+
+    def file_for_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        row = self.store.connection().execute(
+            "SELECT f.*, b.size FROM memory_files f JOIN file_blobs b ON b.digest = f.digest WHERE f.memory_id = ?",
+            (memory_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "path": str(self.blob_path(row["digest"]))}
+
+    def collect(self) -> int:
+        """Delete blobs nothing references any more. Returns blobs removed."""
+        cutoff = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=COLLECT_GRACE_SECONDS)).strftime(
+            "%Y-%m-%d %H:%M:%S")
+        conn = self.store.connection()
+        digests = [row[0] for row in conn.execute(
+            "SELECT digest FROM file_blobs WHERE ref_count <= 0 AND touched_at < ?", (cutoff,)
+        )]
+        removed = 0
+        for digest in digests:
+            with self.store.transaction() as conn:
+                # Re-check inside the write lock in case it was attached or re-stored meanwhile
+                if conn.execute("DELETE FROM file_blobs WHERE digest = ? AND ref_count <= 0 AND touched_at < ?",
+                                (digest, cutoff)).rowcount:
+                    self.blob_path(digest).unlink(missing_ok=True)
+                    removed += 1
+        return removed
+
+    # ------------------------------------------------------------------
+    # Resumable uploads
+    # ------------------------------------------------------------------
+
+    def start_upload(self, filename: str, total_size: int, content_type: Optional[str] = None) -> Dict[str, Any]:
+        if total_size < 0:
+            raise UploadError("Upload size cannot be negative")
+        if total_size > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        upload = {
+            "id": uuid.uuid4().hex,
+            "filename": filename,
+            "content_type": content_type,
+            "total_size": total_size,
+            "received": 0,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        self._partial_file(upload["id"]).touch()
+        with self.store.transaction() as conn:
+            conn.execute(
+                "INSERT INTO uploads (id, filename, content_type, total_size, received, created_at, updated_at) "
+                "VALUES (:id, :filename, :content_type, :total_size, :received, :created_at, :updated_at)",
+                upload
+            )
+        return upload
+
+    def get_upload(self, upload_id: str) -> Dict[str, Any]:
+        row = self.store.connection().execute("SELECT * FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+        if row is None:
+            raise UploadNotFound(f"No upload {upload_id}")
+        return dict(row)
+
+    async def append_upload(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Append a request body (streamed as chunks) at offset. offset must equal
+        the bytes already received; bytes from an interrupted request past that
+        point are discarded first. A second request for the same upload while
+        this one runs gets UploadBusy rather than interleaving its bytes.
+        """
+        with self._locked_partial(upload_id, "r+b") as out:
+            # Read under the lock: the request that held it may have moved received on
+            upload = await asyncio.to_thread(self.get_upload, upload_id)
+            if offset != upload["received"]:
+                raise UploadOffsetMismatch(upload["received"])
+
+            received = upload["received"]
+            try:
+                await asyncio.to_thread(_truncate_at, out, received)
+                async for chunk in chunks:
+                    if received + len(chunk) > upload["total_size"]:
+                        raise UploadError("More bytes sent than the upload declared")
+                    await asyncio.to_thread(out.write, chunk)
+                    received += len(chunk)
+            finally:
+                # Only chunks that were written count, so a dropped or refused
+                # request resumes right after the last one
+                await asyncio.to_thread(self._record_received, upload_id, received)
+
+        upload["received"] = received
+        return upload
+
+    def _record_received(self, upload_id: str, received: int):
+        with self.store.transaction() as conn:
+            conn.execute("UPDATE uploads SET received = ?, updated_at = ? WHERE id = ?",
+                         (received, _now(), upload_id))
+
+    def complete_upload(self, upload_id: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Hash the assembled file in chunks and move it into the vault. Returns
+        (upload, digest). Blocking - call it from a thread in async code.
+        """
+        with self._locked_partial(upload_id, "rb") as f:
+            upload = self.get_upload(upload_id)
+            if upload["received"] != upload["total_size"]:
+                raise UploadOffsetMismatch(upload["received"])
+
+            sha256 = hashlib.sha256()
+            while True:
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+
+            partial = self._partial_file(upload_id)
+            digest = self._commit_blob(partial, sha256.hexdigest(), upload["total_size"])
+            partial.unlink(missing_ok=True)
+            with self.store.transaction() as conn:
+                conn.execute("DELETE FROM uploads WHERE id = ?", (upload_id,))
+        return upload, digest
+
+    def expire_uploads(self, older_than: datetime.timedelta = datetime.timedelta(days=1)) -> int:
+        """Drop resumable uploads nobody has touched for a while"""
+        cutoff = (datetime.datetime.now(datetime.timezone.utc) - older_than).strftime("%Y-%m-%d %H:%M:%S")
+        conn = self.store.connection()
+        stale = [row[0] for row in conn.execute("SELECT id FROM uploads WHERE updated_at < ?", (cutoff,))]
+        for upload_id in stale:
+            self._partial_file(upload_id).unlink(missing_ok=True)
+        if stale:
+            with self.store.transaction() as conn:
+                conn.executemany("DELETE FROM uploads WHERE id = ?", [(upload_id,) for upload_id in stale])
+        return len(stale)
+
+    def _partial_file(self, upload_id: str) -> Path:
+        return self.partial_path / f"upload-{upload_id}"
+
+    @contextlib.contextmanager
+    def _locked_partial(self, upload_id: str, mode: str) -> Iterator[BinaryIO]:
+        """
+        Open an upload's partial file holding an exclusive lock on it. flock
+        works across worker processes, and two opens in one process conflict
+        too, so concurrent requests for one upload never share the file.
+        """
+        try:
+            f = open(self._partial_file(upload_id), mode)
+        except FileNotFoundError:
+            # Completed or expired since the client last looked
+            raise UploadNotFound(f"No upload {upload_id}") from None
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadBusy(upload_id) from None
+            yield f
+
+
+def _hash_and_write(sha256, out: BinaryIO, chunk: bytes):
+    sha256.update(chunk)
+    out.write(chunk)
+
+
+def _truncate_at(out: BinaryIO, offset: int):
+    out.truncate(offset)
+    out.seek(offset)
@@ -0,0 +1,361 @@
+# ⏰ MemoriaAI Reminder Scheduler - The Memory Palace Bell Tower
+# Pending reminders live in the reminders table, indexed on due time. The
+# scheduler keeps a min-heap of only those due within LOAD_HORIZON_SECONDS
+# and pages the next window in from the index as time moves on, so memory
+# stays bounded however many reminders are pending and scheduling is a heap
+# push. A reminder is claimed (fired_at set) in the same transaction that
+# advances the persisted watermark, before any sink sees it, so a restart
+# never fires it twice. Due reminders go out to every registered sink.
+#
+# With several workers each runs a scheduler, and whichever claims a reminder
+# delivers it to the sinks once. WebSocket clients are connected to one
+# worker or another, so the claim also appends the event to reminder_events
+# and every worker's WebSocketSink tails that table for its own clients.
+
+import asyncio
+import datetime
+import heapq
+import json
+import logging
+import time
+import urllib.request
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from memoria_store import MemoriaStore
+
+logger = logging.getLogger(__name__)
+
+# Reminders due within this many seconds are held in memory
+LOAD_HORIZON_SECONDS = 3600
+
+# Reminders fired in one claim transaction
+FIRE_BATCH_SIZE = 500
+
+# Longest the loop sleeps when nothing is due (new reminders wake it early)
+IDLE_SLEEP_SECONDS = 60
+
+# How often a worker looks for reminders fired by the others
+FEED_POLL_SECONDS = 1
+
+# Fired events are kept this long for workers to pick up
+FEED_RETENTION_SECONDS = 300
+
+WEBHOOK_ATTEMPTS = 3
+WEBHOOK_TIMEOUT = 10
+
+REMINDERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    memory_id TEXT PRIMARY KEY REFERENCES memories (id) ON DELETE CASCADE,
+    due_at REAL NOT NULL,
+    reminder_date TEXT NOT NULL,
+    message TEXT NOT NULL,
+    fired_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders (due_at, memory_id) WHERE fired_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS reminder_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+Sink = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def due_timestamp(reminder_date: str) -> float:
+    """Epoch seconds for an ISO date; naive dates are local time"""
+    return datetime.datetime.fromisoformat(reminder_date.replace("Z", "+00:00")).timestamp()
+
+
+class ReminderScheduler:
+    """
+    🔔 In-process reminder heap
+    schedule()/cancel() may be called from any request; run() is the single
+    firing loop, started with start() once the event loop is up.
+    """
+
+    def __init__(self, store: MemoriaStore, horizon: float = LOAD_HORIZON_SECONDS):
+        self.store = store
+        self.horizon = horizon
+        self.sinks: List[Sink] = []
+        self._heap = []
+        # memory_id -> due_at of its live heap entry; anything else in the heap is stale
+        self._scheduled: Dict[str, float] = {}
+        self._loaded_until = float("-inf")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.store.connection().executescript(REMINDERS_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def schedule(self, memory_id: str, reminder_date: str, message: str) -> Dict[str, Any]:
+        """Set (or move) a memory's reminder. Raises KeyError for an unknown memory, ValueError for a bad date."""
+        due_at = due_timestamp(reminder_date)
+        with self.store.transaction() as conn:
+            if conn.execute("UPDATE memories SET reminder_date = ? WHERE id = ?",
+                            (reminder_date, memory_id)).rowcount == 0:
+                raise KeyError(memory_id)
+            conn.execute(
+                "INSERT INTO reminders (memory_id, due_at, reminder_date, message, fired_at) "
+                "VALUES (?, ?, ?, ?, NULL) ON CONFLICT (memory_id) DO UPDATE SET "
+                "due_at = excluded.due_at, reminder_date = excluded.reminder_date, "
+                "message = excluded.message, fired_at = NULL",
+                (memory_id, due_at, reminder_date, message)
+            )
+        self._scheduled.pop(memory_id, None)
+        if due_at <= self._loaded_until:
+            self._push(memory_id, due_at)
+            self._wake()
+        return {"memory_id": memory_id, "reminder_date": reminder_date, "due_at": due_at, "message": message}
+
+    def cancel(self, memory_id: str) -> bool:
+        with self.store.transaction() as conn:
+            removed = conn.execute("DELETE FROM reminders WHERE memory_id = ?", (memory_id,)).rowcount > 0
+            if removed:
+                conn.execute("UPDATE memories SET reminder_date = NULL WHERE id = ?", (memory_id,))
+        # Its heap entry goes stale and is skipped when it surfaces
+        self._scheduled.pop(memory_id, None)
+        return removed
+
+    def upcoming(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self.store.connection().execute(
+            "SELECT r.memory_id, r.reminder_date, r.message, m.title FROM reminders r "
+            "JOIN memories m ON m.id = r.memory_id WHERE r.fired_at IS NULL "
+            "ORDER BY r.due_at, r.memory_id LIMIT ?", (limit,)
+        )
+        return [dict(row) for row in rows]
+
+    def pending_count(self) -> int:
+        return self.store.connection().execute("SELECT COUNT(*) FROM reminders WHERE fired_at IS NULL").fetchone()[0]
+
+    def watermark(self) -> Optional[float]:
+        """Due time of the latest reminder fired (persisted across restarts)"""
+        row = self.store.connection().execute(
+            "SELECT value FROM store_meta WHERE key = 'reminders_watermark'").fetchone()
+        return float(row[0]) if row else None
+
+    def _push(self, memory_id: str, due_at: float):
+        self._scheduled[memory_id] = due_at
+        heapq.heappush(self._heap, (due_at, memory_id))
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _load_window(self, now: float):
+        """Page reminders due before now + horizon in from the pending index"""
+        until = now + self.horizon
+        rows = self.store.connection().execute(
+            "SELECT memory_id, due_at FROM reminders WHERE fired_at IS NULL AND due_at > ? AND due_at <= ? "
+            "ORDER BY due_at",
+            (self._loaded_until, until)
+        )
+        for memory_id, due_at in rows:
+            if memory_id not in self._scheduled:
+                self._push(memory_id, due_at)
+        self._loaded_until = until
+
+    # ------------------------------------------------------------------
+    # Firing
+    # ------------------------------------------------------------------
+
+    def _due(self, now: float) -> List[Tuple[str, float]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < FIRE_BATCH_SIZE:
+            due_at, memory_id = heapq.heappop(self._heap)
+            if self._scheduled.get(memory_id) == due_at:
+                del self._scheduled[memory_id]
+                due.append((memory_id, due_at))
+        return due
+
+    def _claim(self, due: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+        """
+        Mark reminders fired, advance the watermark and publish them to
+        reminder_events; returns the ones this call claimed. A row only matches
+        at the due time its heap entry was built from, so a reminder another
+        worker moved is left for its new time.
+        """
+        fired_at = datetime.datetime.now().isoformat()
+        claimed = []
+        with self.store.transaction() as conn:
+            for memory_id, due_at in due:
+                row = conn.execute(
+                    "UPDATE reminders SET fired_at = ? WHERE memory_id = ? AND fired_at IS NULL AND due_at = ? "
+                    "RETURNING due_at, reminder_date, message",
+                    (fired_at, memory_id, due_at)
+                ).fetchone()
+                if row is not None:
+                    claimed.append({"memory_id": memory_id, **dict(row)})
+            if claimed:
+                conn.execute(
+                    "INSERT INTO store_meta (key, value) VALUES ('reminders_watermark', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = MAX(CAST(value AS REAL), CAST(excluded.value AS REAL))",
+                    (str(max(reminder["due_at"] for reminder in claimed)),)
+                )
+            titles = dict(conn.execute(
+                f"SELECT id, title FROM memories WHERE id IN ({', '.join('?' for _ in claimed)})",
+                [reminder["memory_id"] for reminder in claimed]
+            ).fetchall()) if claimed else {}
+
+            events = [{
+                "type": "reminder",
+                "memory_id": reminder["memory_id"],
+                "title": titles.get(reminder["memory_id"]),
+                "message": reminder["message"],
+                "reminder_date": reminder["reminder_date"],
+                "fired_at": fired_at,
+            } for reminder in claimed]
+            if events:
+                # seq is handed out under the write lock, so readers see it grow in commit order
+                now = time.time()
+                conn.executemany("INSERT INTO reminder_events (event, created_at) VALUES (?, ?)",
+                                 [(json.dumps(event), now) for event in events])
+                conn.execute("DELETE FROM reminder_events WHERE created_at < ?", (now - FEED_RETENTION_SECONDS,))
+        return events
+
+    async def fire_due(self, now: Optional[float] = None) -> int:
+        """Fire everything due by now; returns reminders delivered"""
+        now = time.time() if now is None else now
+        if now + self.horizon / 2 > self._loaded_until:
+            self._load_window(now)
+
+        fired = 0
+        while True:
+            due = self._due(now)
+            if not due:
+                return fired
+            for event in self._claim(due):
+                await self._deliver(event)
+                fired += 1
+
+    async def _deliver(self, event: Dict[str, Any]):
+        for sink in list(self.sinks):
+            try:
+                await sink(event)
+            except Exception as e:
+                logger.error(f"⏰ Reminder sink failed for {event['memory_id']}: {e}")
+
+    def _sleep_for(self, now: float) -> float:
+        refresh_at = self._loaded_until - self.horizon / 2
+        next_due = self._heap[0][0] if self._heap else float("inf")
+        return max(0.0, min(next_due - now, refresh_at - now, IDLE_SLEEP_SECONDS))
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await self.fire_due()
+            except Exception as e:
+                logger.error(f"⏰ Reminder loop error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._sleep_for(time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class WebSocketSink:
+    """
+    Pushes reminders to this worker's WebSocket clients. Events are read from
+    reminder_events rather than taken from the scheduler, so clients also get
+    the reminders other workers fired. Run one per worker with start(); as a
+    sink it only wakes the poll loop, since the claim already published the event.
+    """
+
+    def __init__(self, store: MemoriaStore, poll_interval: float = FEED_POLL_SECONDS):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.clients = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.store.connection().executescript(REMINDERS_SCHEMA)
+        # Only reminders fired from now on; older ones went to whoever was connected then
+        self._cursor = self.store.connection().execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM reminder_events").fetchone()[0]
+
+    async def __call__(self, event: Dict[str, Any]):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def poll(self) -> int:
+        """Send events published since the last poll; returns how many"""
+        rows = self.store.connection().execute(
+            "SELECT seq, event FROM reminder_events WHERE seq > ? ORDER BY seq", (self._cursor,)
+        ).fetchall()
+        for seq, event in rows:
+            self._cursor = seq
+            await self.broadcast(json.loads(event))
+        return len(rows)
+
+    async def broadcast(self, event: Dict[str, Any]):
+        for websocket in list(self.clients):
+            try:
+                await websocket.send_json(event)
+            except Exception:
+                self.clients.discard(websocket)
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"⏰ Reminder feed error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class WebhookSink:
+    """POSTs each reminder as JSON to a URL, retrying with backoff"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def __call__(self, event: Dict[str, Any]):
+        body = json.dumps(event).encode()
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            try:
+                await asyncio.to_thread(self._post, body)
+                return
+            except OSError as e:
+                if attempt == WEBHOOK_ATTEMPTS - 1:
+                    raise
+                logger.warning(f"⏰ Reminder webhook attempt {attempt + 1} failed: {e}")
+                await asyncio.sleep(2 ** attempt)
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT):
+            pass
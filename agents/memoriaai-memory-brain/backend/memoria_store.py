@@ -0,0 +1,650 @@
+# 🧠 MemoriaAI Storage Engine - The Memory Palace Vaults
+# Memories, passwords and voice notes in SQLite (WAL mode) with indexes on
+# category, memory_type, importance and tags. Every write touches only its
+# own rows, so storing memory number one million costs the same as the first.
+# Text search runs on an FTS5 inverted index kept in step with every write,
+# ranked by BM25 with prefix and fuzzy term matching.
+# Totals and breakdowns live in store_counters, kept by triggers on every
+# insert, update and delete, so stats are a handful of primary-key reads.
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    category TEXT NOT NULL,
+    memory_type TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_accessed TEXT NOT NULL,
+    is_encrypted INTEGER NOT NULL DEFAULT 0,
+    importance_level INTEGER NOT NULL DEFAULT 3,
+    reminder_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memories_category ON memories (category, created_at);
+CREATE INDEX IF NOT EXISTS idx_memories_type ON memories (memory_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_memories_importance ON memories (importance_level, created_at);
+CREATE INDEX IF NOT EXISTS idx_memories_reminder ON memories (reminder_date) WHERE reminder_date IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS memory_tags (
+    memory_id TEXT NOT NULL REFERENCES memories (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (memory_id, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_memory_tags_tag ON memory_tags (tag, memory_id);
+
+CREATE TABLE IF NOT EXISTS passwords (
+    id TEXT PRIMARY KEY,
+    website TEXT NOT NULL,
+    username TEXT NOT NULL,
+    email TEXT,
+    encrypted_password TEXT NOT NULL,
+    notes TEXT,
+    last_updated TEXT NOT NULL,
+    strength_score INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_passwords_username ON passwords (username COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_passwords_website ON passwords (website COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS voice_notes (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    transcript TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    file_path TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_voice_notes_created ON voice_notes (created_at);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Running totals: ("memories", ""), ("passwords", ""), and one row per
+# category / memory_type / importance_level value. Triggers keep them exact.
+COUNTER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_counters (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS memories_counted AFTER INSERT ON memories BEGIN
+    INSERT INTO store_counters (dimension, value, count) VALUES
+        ('memories', '', 1),
+        ('category', NEW.category, 1),
+        ('memory_type', NEW.memory_type, 1),
+        ('importance_level', NEW.importance_level, 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_uncounted AFTER DELETE ON memories BEGIN
+    UPDATE store_counters SET count = count - 1
+    WHERE (dimension = 'memories' AND value = '')
+       OR (dimension = 'category' AND value = OLD.category)
+       OR (dimension = 'memory_type' AND value = OLD.memory_type)
+       OR (dimension = 'importance_level' AND value = CAST(OLD.importance_level AS TEXT));
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_recounted
+AFTER UPDATE OF category, memory_type, importance_level ON memories
+WHEN OLD.category IS NOT NEW.category OR OLD.memory_type IS NOT NEW.memory_type
+  OR OLD.importance_level IS NOT NEW.importance_level
+BEGIN
+    UPDATE store_counters SET count = count - 1
+    WHERE (dimension = 'category' AND value = OLD.category)
+       OR (dimension = 'memory_type' AND value = OLD.memory_type)
+       OR (dimension = 'importance_level' AND value = CAST(OLD.importance_level AS TEXT));
+    INSERT INTO store_counters (dimension, value, count) VALUES
+        ('category', NEW.category, 1),
+        ('memory_type', NEW.memory_type, 1),
+        ('importance_level', NEW.importance_level, 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS passwords_counted AFTER INSERT ON passwords BEGIN
+    INSERT INTO store_counters (dimension, value, count) VALUES ('passwords', '', 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS passwords_uncounted AFTER DELETE ON passwords BEGIN
+    UPDATE store_counters SET count = count - 1 WHERE dimension = 'passwords' AND value = '';
+END;
+"""
+
+BREAKDOWN_DIMENSIONS = ("category", "memory_type", "importance_level")
+
+# Inverted index over title, content and tags; rowid is the memory's rowid
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_index USING fts5(
+    title, content, tags,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_index_terms USING fts5vocab(memory_index, row);
+"""
+
+# BM25 column weights: title, content, tags
+BM25_WEIGHTS = (5.0, 1.0, 3.0)
+
+# Query terms with no indexed prefix match are expanded to up to this many close terms
+FUZZY_EXPANSIONS = 5
+FUZZY_SCAN_LIMIT = 5000
+
+# last_accessed stamps are buffered and written in one batch
+ACCESS_FLUSH_INTERVAL = 5.0
+ACCESS_FLUSH_SIZE = 500
+
+MEMORY_COLUMNS = ("id", "title", "content", "category", "memory_type", "created_at",
+                  "last_accessed", "is_encrypted", "importance_level", "reminder_date")
+PASSWORD_COLUMNS = ("id", "website", "username", "email", "encrypted_password",
+                    "notes", "last_updated", "strength_score")
+VOICE_COLUMNS = ("id", "title", "transcript", "duration", "file_path", "created_at", "tags")
+
+# Migration batches are written with executemany inside one transaction
+MIGRATION_BATCH_SIZE = 5000
+
+# How long a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT_MS = 30000
+
+
+class MemoriaStore:
+    """
+    🏛️ SQLite-backed memory palace
+    One connection per thread and process; WAL lets readers carry on while a
+    write commits, and BEGIN IMMEDIATE serialises writers across workers.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._access = {}
+        self._access_lock = threading.Lock()
+        self._access_flushed_at = time.monotonic()
+
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        conn.executescript(COUNTER_SCHEMA)
+        if not conn.execute("SELECT 1 FROM store_meta WHERE key = 'counters_built'").fetchone():
+            # Database predates the counters (or the migration was interrupted)
+            self.rebuild_counters()
+        try:
+            conn.executescript(SEARCH_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 - search falls back to LIKE scans
+            self.full_text = False
+        if self.full_text and self._index_is_stale():
+            self.rebuild_search_index()
+
+        atexit.register(self.flush_access)
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid != os.getpid():
+            # Inherited across a fork (e.g. a preloading process manager) - never share it
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: durable across app crashes, one fsync per checkpoint instead of per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def transaction(self):
+        return _Transaction(self.connection())
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Memories
+    # ------------------------------------------------------------------
+
+    def insert_memory(self, memory: Dict[str, Any]):
+        with self.transaction() as conn:
+            self._insert_memories(conn, [memory])
+
+    def _insert_memories(self, conn, memories: Iterable[Dict[str, Any]]):
+        rows, tags, ids = [], [], []
+        for memory in memories:
+            rows.append(tuple(_memory_value(memory, column) for column in MEMORY_COLUMNS))
+            tags.extend((memory["id"], tag) for tag in dict.fromkeys(memory.get("tags") or []))
+            ids.append(memory["id"])
+        # Upsert rather than REPLACE so an existing memory keeps its rowid (the index key)
+        conn.executemany(
+            f"INSERT INTO memories ({', '.join(MEMORY_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in MEMORY_COLUMNS)}) "
+            f"ON CONFLICT (id) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in MEMORY_COLUMNS[1:]),
+            rows
+        )
+        conn.executemany("DELETE FROM memory_tags WHERE memory_id = ?", [(memory_id,) for memory_id in ids])
+        conn.executemany("INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)", tags)
+        self._index_memories(conn, ids)
+
+    def update_memory(self, memory_id: str, **fields) -> bool:
+        """Update columns (and replace tags if given) of one memory"""
+        tags = fields.pop("tags", None)
+        unknown = set(fields) - set(MEMORY_COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown memory fields: {', '.join(sorted(unknown))}")
+
+        with self.transaction() as conn:
+            if fields:
+                assignments = ", ".join(f"{column} = ?" for column in fields)
+                values = [_memory_value(fields, column) for column in fields]
+                cursor = conn.execute(f"UPDATE memories SET {assignments} WHERE id = ?", (*values, memory_id))
+                if cursor.rowcount == 0:
+                    return False
+            elif not conn.execute("SELECT 1 FROM memories WHERE id = ?", (memory_id,)).fetchone():
+                return False
+
+            if tags is not None:
+                conn.execute("DELETE FROM memory_tags WHERE memory_id = ?", (memory_id,))
+                conn.executemany("INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)",
+                                 [(memory_id, tag) for tag in dict.fromkeys(tags)])
+
+            if tags is not None or {"title", "content", "is_encrypted"} & set(fields):
+                self._index_memories(conn, [memory_id])
+        return True
+
+    def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        row = self.connection().execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
+        if row is None:
+            return None
+        return self._with_tags([dict(row)])[0]
+
+    def delete_memory(self, memory_id: str) -> bool:
+        with self.transaction() as conn:
+            if self.full_text:
+                conn.execute("DELETE FROM memory_index WHERE rowid = (SELECT rowid FROM memories WHERE id = ?)",
+                             (memory_id,))
+            return conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,)).rowcount > 0
+
+    def search_memories(self, query: str = None, category: str = None, memory_type: str = None,
+                        tags: List[str] = None, importance_level: int = None,
+                        limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        One page of matching memories and the total match count.
+        With a query, hits come from the inverted index ranked by BM25;
+        without one, filters run on the column indexes, oldest first.
+        """
+        clauses, params = [], []
+        if category:
+            clauses.append("m.category = ?")
+            params.append(category)
+        if memory_type:
+            clauses.append("m.memory_type = ?")
+            params.append(memory_type)
+        if importance_level:
+            clauses.append("m.importance_level = ?")
+            params.append(importance_level)
+        if tags:
+            clauses.append(f"m.id IN (SELECT memory_id FROM memory_tags WHERE tag IN ({', '.join('?' for _ in tags)}))")
+            params.extend(tags)
+
+        conn = self.connection()
+        if query and self.full_text:
+            match = self.match_expression(query)
+            if match is None:
+                return [], 0
+            source = "FROM memory_index JOIN memories m ON m.rowid = memory_index.rowid WHERE memory_index MATCH ?"
+            params.insert(0, match)
+            order = f"bm25(memory_index, {', '.join(str(weight) for weight in BM25_WEIGHTS)}), m.rowid"
+        else:
+            if query:
+                pattern = f"%{_escape_like(query)}%"
+                clauses.append(
+                    "(m.title LIKE ? ESCAPE '\\' OR m.content LIKE ? ESCAPE '\\' OR EXISTS "
+                    "(SELECT 1 FROM memory_tags t WHERE t.memory_id = m.id AND t.tag LIKE ? ESCAPE '\\'))"
+                )
+                params.extend([pattern, pattern, pattern])
+            source = "FROM memories m WHERE 1"
+            order = "m.created_at, m.rowid"
+
+        where = "".join(f" AND {clause}" for clause in clauses)
+        total = conn.execute(f"SELECT COUNT(*) {source}{where}", params).fetchone()[0]
+        rows = [
+            dict(row) for row in conn.execute(
+                f"SELECT m.* {source}{where} ORDER BY {order} LIMIT ? OFFSET ?", (*params, limit, offset)
+            )
+        ]
+        return self._with_tags(rows), total
+
+    # ------------------------------------------------------------------
+    # Search index
+    # ------------------------------------------------------------------
+
+    def _index_memories(self, conn, memory_ids: List[str]):
+        """Re-index the given memories; encrypted content is never indexed"""
+        if not self.full_text or not memory_ids:
+            return
+        for start in range(0, len(memory_ids), 900):
+            chunk = memory_ids[start:start + 900]
+            marks = ", ".join("?" for _ in chunk)
+            conn.execute(f"DELETE FROM memory_index WHERE rowid IN (SELECT rowid FROM memories WHERE id IN ({marks}))",
+                         chunk)
+            conn.execute(
+                f"INSERT INTO memory_index (rowid, title, content, tags) "
+                f"SELECT m.rowid, m.title, CASE WHEN m.is_encrypted THEN '' ELSE m.content END, "
+                f"COALESCE((SELECT group_concat(tag, ' ') FROM memory_tags WHERE memory_id = m.id), '') "
+                f"FROM memories m WHERE m.id IN ({marks})",
+                chunk
+            )
+
+    def _index_is_stale(self) -> bool:
+        conn = self.connection()
+        indexed = conn.execute("SELECT COUNT(*) FROM memory_index").fetchone()[0]
+        return indexed != conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def rebuild_search_index(self):
+        """Index every memory from scratch (databases created before the index existed)"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM memory_index")
+            conn.execute(
+                "INSERT INTO memory_index (rowid, title, content, tags) "
+                "SELECT m.rowid, m.title, CASE WHEN m.is_encrypted THEN '' ELSE m.content END, "
+                "COALESCE((SELECT group_concat(tag, ' ') FROM memory_tags WHERE memory_id = m.id), '') "
+                "FROM memories m"
+            )
+
+    def match_expression(self, query: str) -> Optional[str]:
+        """
+        FTS5 query for free text: every word must match, as a prefix of an
+        indexed term or, failing that, as a close misspelling of one.
+        """
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return None
+
+        groups = []
+        for word in words:
+            alternatives = [f'"{word}"*']
+            if not self._has_prefix(word):
+                alternatives.extend(f'"{term}"' for term in self._fuzzy_terms(word))
+            groups.append(alternatives[0] if len(alternatives) == 1 else f"({' OR '.join(alternatives)})")
+        return " AND ".join(groups)
+
+    def _has_prefix(self, word: str) -> bool:
+        return self.connection().execute(
+            "SELECT 1 FROM memory_index_terms WHERE term >= ? AND term < ? LIMIT 1", (word, word + "\uffff")
+        ).fetchone() is not None
+
+    def _fuzzy_terms(self, word: str) -> List[str]:
+        """Indexed terms within 1 edit (2 for longer words) sharing the first letter"""
+        max_edits = 1 if len(word) <= 5 else 2
+        rows = self.connection().execute(
+            "SELECT term, doc FROM memory_index_terms WHERE term >= ? AND term < ? "
+            "AND length(term) BETWEEN ? AND ? LIMIT ?",
+            (word[0], word[0] + "\uffff", len(word) - max_edits, len(word) + max_edits, FUZZY_SCAN_LIMIT)
+        )
+        close = []
+        for term, documents in rows:
+            distance = _edit_distance(word, term, max_edits)
+            if distance <= max_edits:
+                close.append((distance, -documents, term))
+        return [term for _, _, term in sorted(close)[:FUZZY_EXPANSIONS]]
+
+    # ------------------------------------------------------------------
+    # Access stamps
+    # ------------------------------------------------------------------
+
+    def record_access(self, memory_ids: List[str], accessed_at: str):
+        """Buffer last_accessed for search hits; written in batches, never per query"""
+        with self._access_lock:
+            for memory_id in memory_ids:
+                self._access[memory_id] = accessed_at
+            due = (len(self._access) >= ACCESS_FLUSH_SIZE or
+                   time.monotonic() - self._access_flushed_at >= ACCESS_FLUSH_INTERVAL)
+        if due:
+            self.flush_access()
+
+    def flush_access(self):
+        with self._access_lock:
+            pending, self._access = self._access, {}
+            self._access_flushed_at = time.monotonic()
+        if not pending:
+            return
+        with self.transaction() as conn:
+            conn.executemany("UPDATE memories SET last_accessed = ? WHERE id = ?",
+                             [(accessed_at, memory_id) for memory_id, accessed_at in pending.items()])
+
+    def count_memories(self) -> int:
+        return self._counter("memories")
+
+    def memory_breakdown(self, column: str) -> Dict[Any, int]:
+        """Counts by category, memory_type or importance_level, read from the running counters"""
+        if column not in BREAKDOWN_DIMENSIONS:
+            raise ValueError(f"Cannot break memories down by {column}")
+        rows = self.connection().execute(
+            "SELECT value, count FROM store_counters WHERE dimension = ? AND count > 0", (column,)
+        )
+        if column == "importance_level":
+            return {int(value): count for value, count in rows}
+        return {value: count for value, count in rows}
+
+    def _counter(self, dimension: str) -> int:
+        row = self.connection().execute(
+            "SELECT count FROM store_counters WHERE dimension = ? AND value = ''", (dimension,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def rebuild_counters(self) -> Dict[str, int]:
+        """Recount everything from the tables (repair, or first start on an older database)"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM store_counters")
+            conn.execute("INSERT INTO store_counters (dimension, value, count) "
+                         "SELECT 'memories', '', COUNT(*) FROM memories")
+            conn.execute("INSERT INTO store_counters (dimension, value, count) "
+                         "SELECT 'passwords', '', COUNT(*) FROM passwords")
+            for column in BREAKDOWN_DIMENSIONS:
+                conn.execute(f"INSERT INTO store_counters (dimension, value, count) "
+                             f"SELECT '{column}', {column}, COUNT(*) FROM memories GROUP BY {column}")
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('counters_built', datetime('now'))")
+        return {"memories": self.count_memories(), "passwords": self.count_passwords()}
+
+    def _with_tags(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not rows:
+            return rows
+        by_id = {row["id"]: row for row in rows}
+        for row in rows:
+            row["tags"] = []
+            row["is_encrypted"] = bool(row["is_encrypted"])
+        ids = list(by_id)
+        conn = self.connection()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            for memory_id, tag in conn.execute(
+                f"SELECT memory_id, tag FROM memory_tags WHERE memory_id IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            ):
+                by_id[memory_id]["tags"].append(tag)
+        return rows
+
+    # ------------------------------------------------------------------
+    # Passwords
+    # ------------------------------------------------------------------
+
+    def insert_password(self, entry: Dict[str, Any]):
+        with self.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO passwords ({', '.join(PASSWORD_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in PASSWORD_COLUMNS)})",
+                tuple(entry.get(column) for column in PASSWORD_COLUMNS)
+            )
+
+    def find_passwords(self, website: str = None, username: str = None) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if website:
+            clauses.append("website LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(website)}%")
+        if username:
+            clauses.append("username = ? COLLATE NOCASE")
+            params.append(username)
+        sql = "SELECT * FROM passwords"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid"
+        return [dict(row) for row in self.connection().execute(sql, params)]
+
+    def count_passwords(self) -> int:
+        return self._counter("passwords")
+
+    # ------------------------------------------------------------------
+    # Voice notes
+    # ------------------------------------------------------------------
+
+    def insert_voice_note(self, note: Dict[str, Any]):
+        with self.transaction() as conn:
+            self._insert_voice_notes(conn, [note])
+
+    def _insert_voice_notes(self, conn, notes: Iterable[Dict[str, Any]]):
+        conn.executemany(
+            f"INSERT OR REPLACE INTO voice_notes ({', '.join(VOICE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in VOICE_COLUMNS)})",
+            [tuple(json.dumps(note.get("tags") or []) if column == "tags" else note.get(column)
+                   for column in VOICE_COLUMNS) for note in notes]
+        )
+
+    def list_voice_notes(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self.connection().execute(
+            "SELECT * FROM voice_notes ORDER BY created_at DESC LIMIT ?", (limit,)
+        )
+        return [{**dict(row), "tags": json.loads(row["tags"])} for row in rows]
+
+    # ------------------------------------------------------------------
+    # One-shot migration from the JSON files
+    # ------------------------------------------------------------------
+
+    def migrate_json(self, memories_file: Path, passwords_file: Path, voice_file: Path) -> Dict[str, int]:
+        """
+        Import the old whole-file JSON databases once, then rename them to
+        *.migrated so they are never read again. Safe to call on every start.
+        """
+        migrated = {"memories": 0, "passwords": 0, "voice_notes": 0}
+        sources = [
+            ("memories", Path(memories_file), self._insert_memories),
+            ("passwords", Path(passwords_file), self._insert_passwords),
+            ("voice_notes", Path(voice_file), self._insert_voice_notes),
+        ]
+
+        for name, path, insert in sources:
+            if not path.exists():
+                continue
+            marker = f"migrated_{name}"
+            # Every worker runs this at startup; the write lock plus the marker makes one of them do it
+            with self.transaction() as conn:
+                if conn.execute("SELECT 1 FROM store_meta WHERE key = ?", (marker,)).fetchone():
+                    items = None
+                else:
+                    try:
+                        with open(path, "r") as f:
+                            items = json.load(f)
+                    except FileNotFoundError:
+                        continue
+                    except (OSError, ValueError):
+                        # Unreadable file - leave it in place for a human to look at
+                        continue
+                    for start in range(0, len(items), MIGRATION_BATCH_SIZE):
+                        insert(conn, items[start:start + MIGRATION_BATCH_SIZE])
+                    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+                                 (marker, str(len(items))))
+            try:
+                path.rename(path.with_name(path.name + ".migrated"))
+            except FileNotFoundError:
+                pass
+            if items is not None:
+                migrated[name] = len(items)
+
+        return migrated
+
+    def _insert_passwords(self, conn, entries: Iterable[Dict[str, Any]]):
+        # Upsert, not REPLACE: REPLACE's implicit delete skips the counter triggers
+        conn.executemany(
+            f"INSERT INTO passwords ({', '.join(PASSWORD_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in PASSWORD_COLUMNS)}) "
+            f"ON CONFLICT (id) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in PASSWORD_COLUMNS[1:]),
+            [tuple(entry.get(column) for column in PASSWORD_COLUMNS) for entry in entries]
+        )
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _memory_value(memory: Dict[str, Any], column: str):
+    value = memory.get(column)
+    if column == "is_encrypted":
+        return int(bool(value))
+    if column == "importance_level" and value is None:
+        return 3
+    return value
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returning limit + 1) once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+if __name__ == "__main__":
+    # python memoria_store.py rebuild-counters [path/to/memoria.db]
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild-counters":
+        sys.exit("usage: python memoria_store.py rebuild-counters [db_path]")
+    store = MemoriaStore(Path(sys.argv[2] if len(sys.argv) > 2 else "memoria_storage/memoria.db"))
+    totals = store.rebuild_counters()
+    print(f"🔢 Counters rebuilt: {totals['memories']} memories, {totals['passwords']} passwords")
@@ -0,0 +1,160 @@
+# 🏋️ MemoriaAI Storage Stress Test - The Memory Palace Siege
+# Several processes hammer one database with the request mix the API
+# produces (store, update, delete, search with access stamps, passwords),
+# then the survivors are checked: every write that was acknowledged must be
+# there, every delete gone, and the counters and search index must agree
+# with the tables. Exits non-zero on any lost or phantom write.
+#
+#   python memoria_stress.py [--workers 4] [--ops 2000] [--db path]
+
+import argparse
+import datetime
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from memoria_store import MemoriaStore
+
+CATEGORIES = ["Personal", "Work", "Study", "Health", "Finance", "Travel"]
+
+
+def _memory(memory_id: str, category: str) -> dict:
+    now = datetime.datetime.now().isoformat()
+    return {
+        "id": memory_id,
+        "title": f"stress memory {memory_id}",
+        "content": f"payload for {memory_id} " + " ".join(random.choice(CATEGORIES).lower() for _ in range(8)),
+        "category": category,
+        "tags": ["stress", category.lower()],
+        "memory_type": "note",
+        "created_at": now,
+        "last_accessed": now,
+        "is_encrypted": False,
+        "importance_level": random.randint(1, 5),
+        "reminder_date": None,
+    }
+
+
+def worker(db_path: str, worker_id: int, ops: int, results):
+    """Run ops requests; report what should have survived"""
+    store = MemoriaStore(Path(db_path))
+    alive = {}
+    deleted = set()
+    passwords = 0
+    rng = random.Random(worker_id)
+
+    for op in range(ops):
+        roll = rng.random()
+        if roll < 0.5 or not alive:
+            memory_id = f"w{worker_id}-{op}"
+            category = rng.choice(CATEGORIES)
+            store.insert_memory(_memory(memory_id, category))
+            alive[memory_id] = category
+        elif roll < 0.65:
+            memory_id = rng.choice(list(alive))
+            category = rng.choice(CATEGORIES)
+            assert store.update_memory(memory_id, category=category)
+            alive[memory_id] = category
+        elif roll < 0.75:
+            memory_id = rng.choice(list(alive))
+            assert store.delete_memory(memory_id)
+            del alive[memory_id]
+            deleted.add(memory_id)
+        elif roll < 0.8:
+            store.insert_password({
+                "id": f"w{worker_id}-p{op}", "website": "example.com", "username": f"user{op}",
+                "encrypted_password": "x", "last_updated": datetime.datetime.now().isoformat(),
+                "strength_score": 50,
+            })
+            passwords += 1
+        else:
+            rows, _ = store.search_memories(query=rng.choice(CATEGORIES).lower(), limit=10)
+            store.record_access([row["id"] for row in rows], datetime.datetime.now().isoformat())
+
+    store.flush_access()
+    results.put((alive, deleted, passwords))
+
+
+def verify(db_path: str, alive: dict, deleted: set, passwords: int) -> list:
+    store = MemoriaStore(Path(db_path))
+    conn = store.connection()
+    problems = []
+
+    stored = dict(conn.execute("SELECT id, category FROM memories"))
+    lost = [memory_id for memory_id in alive if memory_id not in stored]
+    wrong = [memory_id for memory_id, category in alive.items() if stored.get(memory_id, category) != category]
+    phantom = [memory_id for memory_id in deleted if memory_id in stored]
+    if lost:
+        problems.append(f"{len(lost)} acknowledged memories lost, e.g. {lost[:3]}")
+    if wrong:
+        problems.append(f"{len(wrong)} updates lost, e.g. {wrong[:3]}")
+    if phantom:
+        problems.append(f"{len(phantom)} deleted memories came back, e.g. {phantom[:3]}")
+    if len(stored) != len(alive):
+        problems.append(f"{len(stored)} memories stored, {len(alive)} expected")
+
+    live = (store.count_memories(), store.count_passwords(), store.memory_breakdown("category"))
+    if live[:2] != (len(alive), passwords):
+        problems.append(f"counters say {live[:2]}, expected {(len(alive), passwords)}")
+    store.rebuild_counters()
+    if (store.count_memories(), store.count_passwords(), store.memory_breakdown("category")) != live:
+        problems.append("running counters drifted from a full recount")
+
+    if store.full_text:
+        indexed = conn.execute("SELECT COUNT(*) FROM memory_index").fetchone()[0]
+        if indexed != len(stored):
+            problems.append(f"search index holds {indexed} rows for {len(stored)} memories")
+
+    if conn.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+        problems.append("integrity_check failed")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent write stress test for the MemoriaAI store")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    db_path = args.db or str(Path(tempfile.mkdtemp(prefix="memoria-stress-")) / "memoria.db")
+    MemoriaStore(Path(db_path))  # create the schema once before the workers race
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(db_path, n, args.ops, results))
+                 for n in range(args.workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    if any(process.exitcode for process in processes):
+        print("💥 A worker crashed")
+        sys.exit(1)
+
+    alive, deleted, passwords = {}, set(), 0
+    for worker_alive, worker_deleted, worker_passwords in outcomes:
+        alive.update(worker_alive)
+        deleted |= worker_deleted
+        passwords += worker_passwords
+
+    total_ops = args.workers * args.ops
+    print(f"🏋️ {total_ops} operations from {args.workers} processes in {elapsed:.2f}s "
+          f"({total_ops / elapsed:.0f} ops/s) on {db_path}")
+
+    problems = verify(db_path, alive, deleted, passwords)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print(f"✅ No lost writes: {len(alive)} memories, {passwords} passwords, counters and index consistent")
+
+
+if __name__ == "__main__":
+    main()
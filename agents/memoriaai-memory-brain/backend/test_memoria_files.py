@@ -0,0 +1,177 @@
+# 📁 MemoriaAI File Vault Tests
+#
+#   python -m unittest test_memoria_files
+
+import asyncio
+import datetime
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from memoria_files import FileVault, UploadBusy, UploadError, UploadNotFound, UploadOffsetMismatch, UploadTooLarge
+from memoria_store import MemoriaStore
+
+
+async def _body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+class _Source:
+    """Just enough of UploadFile for ingest()"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def read(self, size: int) -> bytes:
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+class VaultTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = MemoriaStore(Path(self.directory.name) / "memoria.db")
+        self.vault = FileVault(self.store, Path(self.directory.name) / "files")
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+
+class DedupTest(VaultTestCase):
+
+    def memory(self, memory_id: str):
+        now = datetime.datetime.now().isoformat()
+        self.store.insert_memory({"id": memory_id, "title": memory_id, "content": "", "category": "Documents",
+                                  "memory_type": "document", "created_at": now, "last_accessed": now})
+
+    def ref_count(self, digest: str) -> int:
+        return self.store.connection().execute(
+            "SELECT ref_count FROM file_blobs WHERE digest = ?", (digest,)).fetchone()[0]
+
+    def test_identical_files_share_one_blob(self):
+        first, size = asyncio.run(self.vault.ingest(_Source(b"same bytes")))
+        second, _ = asyncio.run(self.vault.ingest(_Source(b"same bytes")))
+        other, _ = asyncio.run(self.vault.ingest(_Source(b"other bytes")))
+
+        self.assertEqual((first, size), (second, 10))
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(list(self.vault.blobs_path.rglob("*/*"))), 2)
+        self.assertEqual(list(self.vault.partial_path.iterdir()), [])
+
+        self.memory("a")
+        self.memory("b")
+        self.vault.attach("a", first, "a.txt", "text/plain")
+        self.vault.attach("b", first, "b.txt", "text/plain")
+        self.assertEqual(self.ref_count(first), 2)
+        self.assertEqual(self.vault.file_for_memory("b")["filename"], "b.txt")
+
+    def test_collect_removes_only_unreferenced_blobs_past_the_grace_period(self):
+        kept, _ = asyncio.run(self.vault.ingest(_Source(b"kept")))
+        dropped, _ = asyncio.run(self.vault.ingest(_Source(b"dropped")))
+        self.memory("a")
+        self.memory("b")
+        self.vault.attach("a", kept, "a.txt", None)
+        self.vault.attach("b", dropped, "b.txt", None)
+
+        self.store.delete_memory("b")
+        self.assertEqual(self.ref_count(dropped), 0)
+        self.assertEqual(self.vault.collect(), 0)
+
+        with self.store.transaction() as conn:
+            conn.execute("UPDATE file_blobs SET touched_at = '2000-01-01 00:00:00'")
+        self.assertEqual(self.vault.collect(), 1)
+        self.assertFalse(self.vault.blob_path(dropped).exists())
+        self.assertTrue(self.vault.blob_path(kept).exists())
+
+    def test_oversized_file_leaves_nothing_behind(self):
+        vault = FileVault(self.store, Path(self.directory.name) / "small", max_size=4)
+
+        with self.assertRaises(UploadTooLarge):
+            asyncio.run(vault.ingest(_Source(b"too many bytes")))
+        self.assertEqual(list(vault.partial_path.iterdir()), [])
+
+
+class ResumableUploadTest(VaultTestCase):
+
+    def append(self, upload_id: str, offset: int, *chunks: bytes):
+        return asyncio.run(self.vault.append_upload(upload_id, offset, _body(*chunks)))
+
+    def test_overflowing_chunk_is_not_counted(self):
+        upload = self.vault.start_upload("notes.txt", 10)
+
+        with self.assertRaises(UploadError):
+            self.append(upload["id"], 0, b"abcd", b"efghijkl")
+
+        # Only the chunk that reached the disk counts; the refused one is resent
+        self.assertEqual(self.vault.get_upload(upload["id"])["received"], 4)
+        with self.assertRaises(UploadOffsetMismatch) as raised:
+            self.vault.complete_upload(upload["id"])
+        self.assertEqual(raised.exception.received, 4)
+
+        self.assertEqual(self.append(upload["id"], 4, b"efghij")["received"], 10)
+        _, digest = self.vault.complete_upload(upload["id"])
+        self.assertEqual(digest, hashlib.sha256(b"abcdefghij").hexdigest())
+        self.assertEqual(self.vault.blob_path(digest).read_bytes(), b"abcdefghij")
+
+    def test_dropped_request_resumes_after_the_last_written_chunk(self):
+        upload = self.vault.start_upload("notes.txt", 9)
+
+        async def dropped():
+            yield b"abc"
+            yield b"def"
+            raise ConnectionResetError("client went away")
+
+        with self.assertRaises(ConnectionResetError):
+            asyncio.run(self.vault.append_upload(upload["id"], 0, dropped()))
+        self.assertEqual(self.vault.get_upload(upload["id"])["received"], 6)
+
+        # A retry of the whole body is told where to resume from
+        with self.assertRaises(UploadOffsetMismatch) as raised:
+            self.append(upload["id"], 0, b"abcdefghi")
+        self.assertEqual(raised.exception.received, 6)
+
+        self.append(upload["id"], 6, b"ghi")
+        _, digest = self.vault.complete_upload(upload["id"])
+        self.assertEqual(self.vault.blob_path(digest).read_bytes(), b"abcdefghi")
+        with self.assertRaises(UploadNotFound):
+            self.vault.get_upload(upload["id"])
+
+    def test_concurrent_requests_for_one_upload_are_serialized(self):
+        upload = self.vault.start_upload("notes.txt", 8)
+
+        async def scenario():
+            paused, release = asyncio.Event(), asyncio.Event()
+
+            async def slow_body():
+                yield b"abcd"
+                paused.set()
+                await release.wait()
+                yield b"efgh"
+
+            first = asyncio.create_task(self.vault.append_upload(upload["id"], 0, slow_body()))
+            await paused.wait()
+
+            # Same offset while the first request still holds the file
+            with self.assertRaises(UploadBusy):
+                await self.vault.append_upload(upload["id"], 0, _body(b"wxyz"))
+            with self.assertRaises(UploadBusy):
+                await asyncio.to_thread(self.vault.complete_upload, upload["id"])
+
+            release.set()
+            self.assertEqual((await first)["received"], 8)
+
+            # The loser's offset is stale once the lock is free
+            with self.assertRaises(UploadOffsetMismatch):
+                await self.vault.append_upload(upload["id"], 0, _body(b"wxyz"))
+
+        asyncio.run(scenario())
+        _, digest = self.vault.complete_upload(upload["id"])
+        self.assertEqual(self.vault.blob_path(digest).read_bytes(), b"abcdefgh")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+# ⏰ MemoriaAI Reminder Scheduler Tests
+#
+#   python -m unittest test_memoria_reminders
+
+import asyncio
+import datetime
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from memoria_reminders import ReminderScheduler, WebSocketSink
+from memoria_store import MemoriaStore
+
+
+def _memory(memory_id: str) -> dict:
+    now = datetime.datetime.now().isoformat()
+    return {
+        "id": memory_id, "title": f"title {memory_id}", "content": "content", "category": "Personal",
+        "tags": [], "memory_type": "note", "created_at": now, "last_accessed": now,
+        "is_encrypted": False, "importance_level": 3, "reminder_date": None,
+    }
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).isoformat()
+
+
+class ReminderSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.directory.name) / "memoria.db"
+        self.store = MemoriaStore(self.db_path)
+        self.now = time.time()
+        for n in range(3):
+            self.store.insert_memory(_memory(f"m{n}"))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def scheduler(self, store: MemoriaStore = None) -> ReminderScheduler:
+        scheduler = ReminderScheduler(store or self.store)
+        fired = []
+
+        async def sink(event):
+            fired.append(event)
+
+        scheduler.sinks.append(sink)
+        scheduler.fired = fired
+        return scheduler
+
+    def fire(self, scheduler: ReminderScheduler, at: float) -> int:
+        return asyncio.run(scheduler.fire_due(now=at))
+
+    def test_fires_once_and_survives_restart(self):
+        scheduler = self.scheduler()
+        self.fire(scheduler, self.now)
+        scheduler.schedule("m0", _iso(self.now + 10), "stretch")
+
+        self.assertEqual(self.fire(scheduler, self.now + 5), 0)
+        self.assertEqual(self.fire(scheduler, self.now + 11), 1)
+        self.assertEqual(scheduler.fired[0]["message"], "stretch")
+        self.assertEqual(scheduler.fired[0]["title"], "title m0")
+        self.assertAlmostEqual(scheduler.watermark(), self.now + 10, places=3)
+
+        restarted = self.scheduler()
+        self.assertEqual(self.fire(restarted, self.now + 20), 0)
+        self.assertEqual(restarted.pending_count(), 0)
+
+    def test_cancelled_reminder_never_fires(self):
+        scheduler = self.scheduler()
+        self.fire(scheduler, self.now)
+        scheduler.schedule("m1", _iso(self.now + 10), "call")
+        self.assertTrue(scheduler.cancel("m1"))
+
+        self.assertEqual(self.fire(scheduler, self.now + 11), 0)
+        self.assertIsNone(self.store.get_memory("m1")["reminder_date"])
+
+    def test_only_the_horizon_is_held_in_memory(self):
+        scheduler = self.scheduler()
+        scheduler.schedule("m0", _iso(self.now + 10), "soon")
+        scheduler.schedule("m1", _iso(self.now + 5 * scheduler.horizon), "later")
+        self.fire(scheduler, self.now)
+        self.assertEqual(list(scheduler._scheduled), ["m0"])
+
+        self.assertEqual(self.fire(scheduler, self.now + 5 * scheduler.horizon + 1), 2)
+
+    def test_reschedule_by_another_worker_is_not_fired_early(self):
+        worker_a = self.scheduler()
+        worker_b = self.scheduler(MemoriaStore(self.db_path))
+        self.fire(worker_a, self.now)
+        self.fire(worker_b, self.now)
+
+        worker_a.schedule("m2", _iso(self.now + 10), "old message")
+        worker_b.schedule("m2", _iso(self.now + 7200), "new message")
+
+        # Worker A's heap still holds the old due time
+        self.assertEqual(self.fire(worker_a, self.now + 11), 0)
+        self.assertEqual(worker_a.pending_count(), 1)
+
+        later = self.now + 7201
+        self.assertEqual(self.fire(worker_a, later) + self.fire(worker_b, later), 1)
+        self.assertEqual([event["message"] for event in worker_a.fired + worker_b.fired], ["new message"])
+        worker_b.store.close()
+
+    def test_websocket_clients_on_every_worker_get_the_reminder(self):
+        class Client:
+            def __init__(self):
+                self.received = []
+
+            async def send_json(self, event):
+                self.received.append(event["message"])
+
+        worker_a = self.scheduler()
+        store_b = MemoriaStore(self.db_path)
+        clients = []
+        for store in (self.store, store_b):
+            sink = WebSocketSink(store)
+            sink.clients.add(Client())
+            clients.append(sink)
+        worker_a.sinks.append(clients[0])
+
+        worker_a.schedule("m0", _iso(self.now + 10), "stretch")
+        self.assertEqual(self.fire(worker_a, self.now + 11), 1)
+
+        # Worker B never claimed it, yet its client hears about it once
+        for sink in clients:
+            self.assertEqual(asyncio.run(sink.poll()), 1)
+            self.assertEqual(asyncio.run(sink.poll()), 0)
+            self.assertEqual([client.received for client in sink.clients], [["stretch"]])
+
+        # A worker that starts later doesn't replay what already went out
+        self.assertEqual(asyncio.run(WebSocketSink(store_b).poll()), 0)
+        store_b.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+# 🧠 MemoriaAI Storage Engine Tests
+#
+#   python -m unittest test_memoria_store
+
+import datetime
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from memoria_store import MemoriaStore
+
+
+def _memory(memory_id: str, title: str = "untitled", content: str = "content", category: str = "Personal",
+            memory_type: str = "note", importance_level: int = 3, tags=(), is_encrypted: bool = False) -> dict:
+    now = datetime.datetime.now().isoformat()
+    return {
+        "id": memory_id, "title": title, "content": content, "category": category,
+        "tags": list(tags), "memory_type": memory_type, "created_at": now, "last_accessed": now,
+        "is_encrypted": is_encrypted, "importance_level": importance_level, "reminder_date": None,
+    }
+
+
+class StoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.store = MemoriaStore(self.path / "memoria.db")
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+
+class MigrationTest(StoreTestCase):
+
+    def write_json(self, name: str, items: list) -> Path:
+        path = self.path / name
+        path.write_text(json.dumps(items))
+        return path
+
+    def migrate(self):
+        return self.store.migrate_json(self.path / "memories.json", self.path / "passwords.json",
+                                       self.path / "voice_notes.json")
+
+    def test_json_files_are_imported_once(self):
+        self.write_json("memories.json", [_memory("m0", tags=["a", "a"]), _memory("m1", category="Work")])
+        self.write_json("passwords.json", [{"id": "p0", "website": "example.com", "username": "ada",
+                                            "encrypted_password": "x", "last_updated": "now",
+                                            "strength_score": 80}])
+
+        self.assertEqual(self.migrate(), {"memories": 2, "passwords": 1, "voice_notes": 0})
+        self.assertFalse((self.path / "memories.json").exists())
+        self.assertTrue((self.path / "memories.json.migrated").exists())
+        self.assertEqual(self.store.get_memory("m0")["tags"], ["a"])
+
+        # A stale copy restored next to the database is set aside, not imported again
+        self.write_json("memories.json", [_memory("m2")])
+        self.assertEqual(self.migrate(), {"memories": 0, "passwords": 0, "voice_notes": 0})
+        self.assertIsNone(self.store.get_memory("m2"))
+        self.assertFalse((self.path / "memories.json").exists())
+        self.assertEqual(self.store.count_memories(), 2)
+        self.assertEqual(self.store.count_passwords(), 1)
+
+    def test_unreadable_file_is_left_in_place(self):
+        (self.path / "memories.json").write_text("{not json")
+
+        self.assertEqual(self.migrate()["memories"], 0)
+        self.assertTrue((self.path / "memories.json").exists())
+        self.assertEqual(self.store.count_memories(), 0)
+
+
+class SearchTest(StoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        if not self.store.full_text:
+            self.skipTest("SQLite was built without FTS5")
+
+    def test_title_hits_rank_above_content_hits(self):
+        self.store.insert_memory(_memory("body", title="groceries", content="buy tomatoes for the garden"))
+        self.store.insert_memory(_memory("title", title="garden plan", content="beds and paths"))
+        self.store.insert_memory(_memory("other", title="taxes", content="file by april"))
+
+        hits, total = self.store.search_memories("garden")
+        self.assertEqual(total, 2)
+        self.assertEqual([memory["id"] for memory in hits], ["title", "body"])
+
+    def test_pages_cover_every_match_once(self):
+        for n in range(7):
+            self.store.insert_memory(_memory(f"m{n}", title=f"recipe {n}", category="Food" if n % 2 else "Home"))
+
+        seen = []
+        for offset in range(0, 7, 3):
+            hits, total = self.store.search_memories("recipe", limit=3, offset=offset)
+            self.assertEqual(total, 7)
+            seen.extend(memory["id"] for memory in hits)
+        self.assertEqual(sorted(seen), [f"m{n}" for n in range(7)])
+
+        hits, total = self.store.search_memories("recipe", category="Food")
+        self.assertEqual((total, {memory["id"] for memory in hits}), (3, {"m1", "m3", "m5"}))
+
+    def test_prefixes_and_misspellings_match(self):
+        self.store.insert_memory(_memory("m0", title="gardening notes", content="compost every spring"))
+        self.store.insert_memory(_memory("m1", title="secret", content="compost code", is_encrypted=True))
+
+        self.assertEqual([memory["id"] for memory in self.store.search_memories("garde")[0]], ["m0"])
+        self.assertEqual([memory["id"] for memory in self.store.search_memories("sprnig")[0]], ["m0"])
+        self.assertEqual([memory["id"] for memory in self.store.search_memories("gardening sping")[0]], ["m0"])
+        # Encrypted content never reaches the index
+        self.assertEqual([memory["id"] for memory in self.store.search_memories("compost")[0]], ["m0"])
+        self.assertEqual(self.store.search_memories("zzzz"), ([], 0))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.store.insert_memory(_memory("m0", title="old title"))
+        self.store.update_memory("m0", title="new title", tags=["holiday"])
+
+        self.assertEqual(self.store.search_memories("old"), ([], 0))
+        self.assertEqual(self.store.search_memories("holiday")[1], 1)
+        self.store.delete_memory("m0")
+        self.assertEqual(self.store.search_memories("new"), ([], 0))
+
+
+class CounterTest(StoreTestCase):
+
+    def breakdown_from_table(self, column: str) -> dict:
+        rows = self.store.connection().execute(f"SELECT {column}, COUNT(*) FROM memories GROUP BY {column}")
+        return {value: count for value, count in rows}
+
+    def assert_counters_match_tables(self):
+        self.assertEqual(self.store.count_memories(),
+                         self.store.connection().execute("SELECT COUNT(*) FROM memories").fetchone()[0])
+        for column in ("category", "memory_type", "importance_level"):
+            self.assertEqual(self.store.memory_breakdown(column), self.breakdown_from_table(column))
+
+    def test_counters_follow_upserts_updates_and_deletes(self):
+        self.store.insert_memory(_memory("m0", category="Work", importance_level=5))
+        self.store.insert_memory(_memory("m1", category="Work"))
+        self.store.insert_memory(_memory("m2", category="Home", memory_type="idea"))
+
+        # Re-inserting an existing id is an upsert and moves the counts rather than adding
+        self.store.insert_memory(_memory("m0", category="Home", importance_level=1))
+        self.store.update_memory("m1", memory_type="idea")
+        self.store.delete_memory("m2")
+        self.store.delete_memory("missing")
+
+        self.assert_counters_match_tables()
+        self.assertEqual(self.store.memory_breakdown("category"), {"Home": 1, "Work": 1})
+
+    def test_rebuild_repairs_drifted_counters(self):
+        for n in range(4):
+            self.store.insert_memory(_memory(f"m{n}", category="Work" if n % 2 else "Home"))
+        with self.store.transaction() as conn:
+            conn.execute("UPDATE store_counters SET count = count + 10")
+
+        self.assertEqual(self.store.rebuild_counters(), {"memories": 4, "passwords": 0})
+        self.assert_counters_match_tables()
+
+    def test_counters_are_built_for_an_older_database(self):
+        self.store.insert_memory(_memory("m0"))
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM store_counters")
+            conn.execute("DELETE FROM store_meta WHERE key = 'counters_built'")
+        self.store.close()
+
+        self.store = MemoriaStore(self.path / "memoria.db")
+        self.assertEqual(self.store.count_memories(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,21 +21,40 @@ class DeveloperProfileSerializer(serializers.ModelSerializer):
                  'portfolio_projects', 'canvas_preferences']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class CanvasPayloadSerializerMixin:
+    """
+    canvas_data comes from the blob store, so it is only rendered when the
+    view asks for it (context include_canvas); listings get digest and size.
+    Otherwise the field is write-only, so it is never read for rendering and
+    listings never touch the blob, while creates can still send it.
+    """
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get('include_canvas') and 'canvas_data' in fields:
+            fields['canvas_data'].write_only = True
+        return fields
+
+
+class ProjectSerializer(CanvasPayloadSerializerMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
+    canvas_data = serializers.JSONField(required=False)
+    counts = serializers.ReadOnlyField(source='live_counts')  # Includes buffered, unflushed increments
     
     class Meta:
         model = Project
         fields = ['id', 'name', 'description', 'owner', 'technologies', 
-                 'github_url', 'demo_url', 'canvas_data', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+                 'github_url', 'demo_url', 'canvas_data', 'canvas_digest', 'canvas_size',
+                 'counts', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'canvas_digest', 'canvas_size', 'created_at', 'updated_at']
 
 
-class CanvasSessionSerializer(serializers.ModelSerializer):
+class CanvasSessionSerializer(CanvasPayloadSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    canvas_data = serializers.JSONField(required=False)
     
     class Meta:
         model = CanvasSession
-        fields = ['id', 'user', 'session_name', 'canvas_type', 'canvas_data', 
-                 'is_public', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'session_name', 'canvas_type', 'canvas_data', 'canvas_digest', 'canvas_size',
+                 'version', 'is_public', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'canvas_digest', 'canvas_size', 'version', 'created_at', 'updated_at']
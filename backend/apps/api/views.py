@@ -10,6 +10,7 @@ from asgiref.sync import async_to_sync
 
 from backend.apps.users.models import CustomUser, DeveloperProfile
 from backend.apps.core.models import Project, CanvasSession
+from backend.apps.core import canvas
 from .serializers import (
     UserSerializer, DeveloperProfileSerializer, 
     ProjectSerializer, CanvasSessionSerializer
@@ -45,7 +46,18 @@ class DeveloperProfileViewSet(viewsets.ModelViewSet):
         return DeveloperProfile.objects.none()
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class CanvasPayloadViewMixin:
+    """Blob-backed canvas_data only on single-object responses or ?include=canvas"""
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_canvas'] = (
+            self.detail or self.request.query_params.get('include') == 'canvas'
+        )
+        return context
+
+
+class ProjectViewSet(CanvasPayloadViewMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -69,7 +81,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CanvasSessionViewSet(viewsets.ModelViewSet):
+class CanvasSessionViewSet(CanvasPayloadViewMixin, viewsets.ModelViewSet):
     queryset = CanvasSession.objects.all()
     serializer_class = CanvasSessionSerializer
     permission_classes = [IsAuthenticated]
@@ -84,6 +96,7 @@ class CanvasSessionViewSet(viewsets.ModelViewSet):
     def share_session(self, request, pk=None):
         """Share canvas session in real-time"""
         session = self.get_object()
+        version, canvas_data = canvas.load_state(session.id)
         channel_layer = get_channel_layer()
         
         # Broadcast to all users in the canvas room
@@ -92,12 +105,20 @@ class CanvasSessionViewSet(viewsets.ModelViewSet):
             {
                 "type": "canvas_update",
                 "session_id": session.id,
-                "canvas_data": session.canvas_data,
+                "version": version,
+                "canvas_data": canvas_data,
                 "user": request.user.username
             }
         )
         
         return Response({"status": "Canvas session shared successfully"})
+    
+    @action(detail=True, methods=['get'])
+    def state(self, request, pk=None):
+        """Current canvas and its version - the base for the next delta"""
+        session = self.get_object()
+        version, canvas_data = canvas.load_state(session.id)
+        return Response({"session_id": session.id, "version": version, "canvas_data": canvas_data})
 
 
 @api_view(['GET'])
@@ -136,18 +157,49 @@ def dashboard_data(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def save_canvas_data(request):
-    """Save canvas data for real-time collaboration"""
+    """
+    Save canvas changes for real-time collaboration.
+    Send {"session_id", "base_version", "ops": [JSON-Patch]} to apply a delta;
+    a full "canvas_data" still creates or replaces a session.
+    """
     try:
         data = json.loads(request.body)
         session_id = data.get('session_id')
+        ops = data.get('ops')
         canvas_data = data.get('canvas_data')
         canvas_type = data.get('canvas_type', '2d')
         
+        if session_id and ops is not None:
+            # Apply a delta against the client's version; collaborators may edit too
+            if not canvas.is_member(session_id, request.user):
+                return JsonResponse({'status': 'error', 'message': 'Canvas session not found'}, status=404)
+            session = CanvasSession.objects.only('id').get(id=session_id)
+            try:
+                version = canvas.apply_delta(session, request.user, int(data.get('base_version', -1)), ops)
+            except canvas.StaleVersion as e:
+                return JsonResponse({
+                    'status': 'conflict',
+                    'session_id': session.id,
+                    'message': 'Canvas has moved on; rebase onto the missed operations and resend',
+                    **e.rebase_hint()
+                }, status=409)
+            except canvas.PatchError as e:
+                return JsonResponse({'status': 'error', 'message': f'Invalid patch: {e}'}, status=422)
+            
+            # Collaborators only get the delta
+            canvas.broadcast_delta(session.id, version, ops, request.user.username)
+            
+            return JsonResponse({
+                'status': 'success',
+                'session_id': session.id,
+                'version': version,
+                'message': 'Canvas delta applied successfully'
+            })
+        
         if session_id:
-            # Update existing session
+            # Replace an existing session wholesale
             session = CanvasSession.objects.get(id=session_id, user=request.user)
-            session.canvas_data = canvas_data
-            session.save()
+            version = canvas.replace_canvas(session, request.user, canvas_data)
         else:
             # Create new session
             session = CanvasSession.objects.create(
@@ -156,6 +208,7 @@ def save_canvas_data(request):
                 canvas_type=canvas_type,
                 canvas_data=canvas_data
             )
+            version = session.version
         
         # Broadcast to WebSocket if in collaboration mode
         channel_layer = get_channel_layer()
@@ -164,6 +217,7 @@ def save_canvas_data(request):
             {
                 "type": "canvas_update",
                 "session_id": session.id,
+                "version": version,
                 "canvas_data": canvas_data,
                 "user": request.user.username
             }
@@ -172,6 +226,7 @@ def save_canvas_data(request):
         return JsonResponse({
             'status': 'success',
             'session_id': session.id,
+            'version': version,
             'message': 'Canvas data saved successfully'
         })
         
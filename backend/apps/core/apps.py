@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.core'
+    label = 'backend_core'  # 'core' is hello_world.core
+    
+    def ready(self):
+        import backend.apps.core.signals  # noqa
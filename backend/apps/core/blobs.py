@@ -0,0 +1,112 @@
+# 🎨 Canvas Blobs - The Royal Vault
+# Canvas payloads stored once, compressed and addressed by the SHA-256 of their
+# canonical JSON. Rows keep only the digest and size, so identical scenes are
+# shared and listing queries never drag the bytes along.
+# Bytes live in the CanvasBlob table or, with CANVAS_BLOB_STORAGE = 'file',
+# under CANVAS_BLOB_ROOT on local disk; metadata is always in the table.
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .models import CanvasBlob
+
+CANVAS_BLOB_STORAGE = getattr(settings, 'CANVAS_BLOB_STORAGE', 'db')
+CANVAS_BLOB_ROOT = Path(getattr(settings, 'CANVAS_BLOB_ROOT', Path(settings.MEDIA_ROOT) / 'canvas_blobs'))
+
+# Blobs are immutable, so cached bytes never go stale; big ones skip the cache
+BLOB_CACHE_TIMEOUT = 3600
+BLOB_CACHE_MAX_SIZE = 1024 * 1024
+
+
+def canonical_json(value):
+    """Stable serialization so equal payloads hash to the same digest"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def compress(raw):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+    return 'gzip', gzip.compress(raw, compresslevel=6, mtime=0)
+
+
+def decompress(codec, data):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Canvas blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown canvas blob codec {codec!r}")
+
+
+def _blob_path(digest):
+    return CANVAS_BLOB_ROOT / digest[:2] / digest
+
+
+def _write_file(digest, data):
+    path = _blob_path(digest)
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename so readers never see a partial blob
+    fd, tmp = tempfile.mkstemp(dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def put_json(value):
+    """Store a payload if it isn't stored already. Returns (digest, size)."""
+    raw = canonical_json(value)
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if not CanvasBlob.objects.filter(pk=digest).exists():
+        codec, data = compress(raw)
+        if CANVAS_BLOB_STORAGE == 'file':
+            _write_file(digest, data)
+        CanvasBlob.objects.bulk_create([
+            CanvasBlob(
+                digest=digest,
+                size=len(raw),
+                stored_size=len(data),
+                codec=codec,
+                data=data if CANVAS_BLOB_STORAGE != 'file' else None,
+            )
+        ], ignore_conflicts=True)
+
+    return digest, len(raw)
+
+
+def _load(digest):
+    key = f'canvas_blob:{digest}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    blob = CanvasBlob.objects.get(pk=digest)
+    data = bytes(blob.data) if blob.data is not None else _blob_path(digest).read_bytes()
+    if blob.stored_size <= BLOB_CACHE_MAX_SIZE:
+        cache.set(key, (blob.codec, data), BLOB_CACHE_TIMEOUT)
+    return blob.codec, data
+
+
+def get_json(digest):
+    codec, data = _load(digest)
+    return json.loads(decompress(codec, data))
+
@@ -0,0 +1,282 @@
+# 🎨 Canvas Deltas - The Royal Tapestry
+# Clients send JSON-Patch (RFC 6902) deltas against the version they last saw.
+# Each accepted delta bumps CanvasSession.version, is appended to the
+# CanvasOperation log and is broadcast on its own; the full canvas_data is only
+# rewritten as a snapshot every CANVAS_SNAPSHOT_EVERY operations.
+
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+from .blobs import get_json, put_json
+from .models import CanvasSession, CanvasOperation
+
+CANVAS_SNAPSHOT_EVERY = getattr(settings, 'CANVAS_SNAPSHOT_EVERY', 50)
+
+# Behind by more than this and the client is told to reload instead of rebasing
+MAX_REBASE_OPS = 200
+
+STATE_CACHE_TIMEOUT = 600
+
+
+class PatchError(ValueError):
+    """A delta that doesn't apply to the current document"""
+
+
+class StaleVersion(Exception):
+    """The client's base version is behind the server's"""
+
+    def __init__(self, current_version, missed_operations):
+        super().__init__(f"Canvas is at version {current_version}")
+        self.current_version = current_version
+        # None when the client is too far behind and should reload
+        self.missed_operations = missed_operations
+
+    def rebase_hint(self):
+        if self.missed_operations is None:
+            return {'current_version': self.current_version, 'reload': True}
+        return {
+            'current_version': self.current_version,
+            'reload': False,
+            'operations': [{'version': op.version, 'ops': expand_ops(op.ops)} for op in self.missed_operations],
+        }
+
+
+# ---------------------------------------------------------------------------
+# JSON Patch
+# ---------------------------------------------------------------------------
+
+def _parse_pointer(pointer):
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _resolve(doc, tokens):
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path segment {token!r} not found")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise PatchError(f"Cannot descend into {type(doc).__name__}")
+    return doc
+
+
+def _index(array, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(array)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise PatchError(f"Invalid array index {token!r}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise PatchError(f"Array index {index} out of range")
+    return index
+
+
+def _add(doc, tokens, value):
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, key, allow_end=True), value)
+    else:
+        raise PatchError("Cannot add to a scalar")
+    return doc
+
+
+def _remove(doc, tokens):
+    if not tokens:
+        raise PatchError("Cannot remove the document root")
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"Path segment {key!r} not found")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key))
+    raise PatchError("Cannot remove from a scalar")
+
+
+def apply_patch(doc, ops):
+    """Apply JSON-Patch operations to doc in place (the root may be replaced) and return it"""
+    if not isinstance(ops, list):
+        raise PatchError("ops must be a list")
+
+    for op in ops:
+        if not isinstance(op, dict) or 'path' not in op:
+            raise PatchError(f"Malformed operation: {op!r}")
+        name = op.get('op')
+        tokens = _parse_pointer(op['path'])
+        if name in ('add', 'replace', 'test') and 'value' not in op:
+            raise PatchError(f"{name} operation at {op['path']!r} has no value")
+
+        if name == 'add':
+            doc = _add(doc, tokens, op['value'])
+        elif name == 'remove':
+            _remove(doc, tokens)
+        elif name == 'replace':
+            if tokens:
+                _resolve(doc, tokens)  # must exist
+                _remove(doc, tokens)
+            doc = _add(doc, tokens, op['value'])
+        elif name in ('move', 'copy'):
+            source = _parse_pointer(op.get('from', ''))
+            if name == 'move':
+                if tokens[:len(source)] == source and tokens != source:
+                    raise PatchError("Cannot move a value into itself")
+                value = _remove(doc, source)
+            else:
+                value = copy.deepcopy(_resolve(doc, source))
+            doc = _add(doc, tokens, value)
+        elif name == 'test':
+            if _resolve(doc, tokens) != op['value']:
+                raise PatchError(f"Test failed at {op['path']}")
+        else:
+            raise PatchError(f"Unknown operation {name!r}")
+
+    return doc
+
+
+# ---------------------------------------------------------------------------
+# Document state
+# ---------------------------------------------------------------------------
+
+def expand_ops(ops):
+    """Logged ops with whole-canvas values swapped back in from the blob store"""
+    return [
+        {'op': op['op'], 'path': op['path'], 'value': get_json(op['value_digest']) if op['value_digest'] else {}}
+        if 'value_digest' in op else op
+        for op in ops
+    ]
+
+
+def is_member(session_id, user):
+    """Owner or listed collaborator - who may read and send deltas"""
+    return CanvasSession.objects.filter(Q(user=user) | Q(collaborators=user), pk=session_id).exists()
+
+
+def _state_key(session_id):
+    return f'canvas_state:{session_id}'
+
+
+def load_state(session_id):
+    """
+    (version, data) for the latest canvas. Served from the cache; otherwise
+    rebuilt from the last snapshot plus the operations logged after it.
+    """
+    cached = cache.get(_state_key(session_id))
+    if cached is not None:
+        return cached['version'], cached['data']
+
+    session = CanvasSession.objects.only('canvas_digest', 'version', 'snapshot_version').get(pk=session_id)
+    data = session.canvas_data
+    operations = CanvasOperation.objects.filter(
+        session_id=session_id, version__gt=session.snapshot_version
+    ).order_by('version')
+    version = session.snapshot_version
+    for operation in operations:
+        data = apply_patch(data, expand_ops(operation.ops))
+        version = operation.version
+
+    cache.set(_state_key(session_id), {'version': version, 'data': data}, STATE_CACHE_TIMEOUT)
+    return version, data
+
+
+def _missed_operations(session_id, base_version, current_version):
+    if current_version - base_version > MAX_REBASE_OPS:
+        return None
+    return list(CanvasOperation.objects.filter(
+        session_id=session_id, version__gt=base_version
+    ).order_by('version'))
+
+
+def apply_delta(session, user, base_version, ops):
+    """
+    Apply ops on top of base_version and return the new version.
+    Raises StaleVersion if someone else got there first, PatchError if the ops don't apply.
+    """
+    new_version = base_version + 1
+
+    with transaction.atomic():
+        # Claim the next version; the conditional UPDATE is the concurrency check
+        claimed = CanvasSession.objects.filter(pk=session.pk, version=base_version).update(
+            version=new_version, updated_at=timezone.now()
+        )
+        if not claimed:
+            current = CanvasSession.objects.values_list('version', flat=True).get(pk=session.pk)
+            raise StaleVersion(current, _missed_operations(session.pk, base_version, current))
+
+        version, data = load_state(session.pk)
+        if version != base_version:
+            # Cache lagging behind the database - rebuild from the log
+            cache.delete(_state_key(session.pk))
+            version, data = load_state(session.pk)
+
+        data = apply_patch(data, ops)
+        CanvasOperation.objects.create(session_id=session.pk, version=new_version, ops=ops, user=user)
+
+        # The claiming UPDATE holds the row until commit, so this is the
+        # current snapshot_version, not whatever the caller loaded earlier
+        snapshot_version = CanvasSession.objects.values_list('snapshot_version', flat=True).get(pk=session.pk)
+        snapshot_due = new_version - snapshot_version >= CANVAS_SNAPSHOT_EVERY
+        if snapshot_due:
+            digest, size = put_json(data)
+            CanvasSession.objects.filter(pk=session.pk).update(
+                canvas_digest=digest, canvas_size=size, snapshot_version=new_version
+            )
+
+    cache.set(_state_key(session.pk), {'version': new_version, 'data': data}, STATE_CACHE_TIMEOUT)
+    return new_version
+
+
+def replace_canvas(session, user, data):
+    """
+    Whole-document save (legacy clients); snapshotted and logged as a root
+    replace that points at the snapshot blob rather than carrying the payload
+    """
+    data = data or {}
+    digest, size = put_json(data) if data else ('', 0)
+    with transaction.atomic():
+        session = CanvasSession.objects.select_for_update().get(pk=session.pk)
+        new_version = session.version + 1
+        CanvasOperation.objects.create(
+            session_id=session.pk, version=new_version,
+            ops=[{'op': 'replace', 'path': '', 'value_digest': digest}], user=user
+        )
+        CanvasSession.objects.filter(pk=session.pk).update(
+            canvas_digest=digest, canvas_size=size, version=new_version, snapshot_version=new_version,
+            updated_at=timezone.now()
+        )
+
+    cache.set(_state_key(session.pk), {'version': new_version, 'data': data}, STATE_CACHE_TIMEOUT)
+    return new_version
+
+
+def broadcast_delta(session_id, version, ops, username):
+    """Send collaborators just the delta, not the whole canvas"""
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"canvas_{session_id}",
+        {
+            "type": "canvas_delta",
+            "session_id": session_id,
+            "version": version,
+            "ops": ops,
+            "user": username,
+        }
+    )
@@ -0,0 +1,193 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CanvasBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveIntegerField()),
+                ('stored_size', models.PositiveIntegerField()),
+                ('codec', models.CharField(max_length=10)),
+                ('data', models.BinaryField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canvas_digest', models.CharField(blank=True, default='', max_length=64)),
+                ('canvas_size', models.PositiveIntegerField(default=0)),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('technologies', models.JSONField(default=list)),
+                ('github_url', models.URLField(blank=True, null=True)),
+                ('demo_url', models.URLField(blank=True, null=True)),
+                ('is_public', models.BooleanField(default=True)),
+                ('featured', models.BooleanField(default=False)),
+                ('likes_count', models.PositiveIntegerField(default=0)),
+                ('views_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='projects', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarityTerm',
+            fields=[
+                ('term', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TechStack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField()),
+                ('category', models.CharField(max_length=50)),
+                ('icon_url', models.URLField(blank=True, null=True)),
+                ('official_website', models.URLField(blank=True, null=True)),
+                ('popularity_score', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CanvasSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canvas_digest', models.CharField(blank=True, default='', max_length=64)),
+                ('canvas_size', models.PositiveIntegerField(default=0)),
+                ('session_name', models.CharField(max_length=200)),
+                ('canvas_type', models.CharField(choices=[('2d', '2D Canvas'), ('3d', '3D WebGL'), ('4d', '4D Simulation'), ('5g', '5G Real-time')], default='2d', max_length=10)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('snapshot_version', models.PositiveIntegerField(default=0)),
+                ('is_public', models.BooleanField(default=False)),
+                ('is_collaborative', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('collaborators', models.ManyToManyField(blank=True, related_name='collaborative_sessions', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='canvas_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CodeSnippet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('code', models.TextField()),
+                ('language', models.CharField(max_length=50)),
+                ('tags', models.JSONField(default=list)),
+                ('is_public', models.BooleanField(default=True)),
+                ('likes_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='code_snippets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Collaboration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('session_type', models.CharField(choices=[('canvas', 'Canvas Collaboration'), ('code', 'Code Review'), ('brainstorm', 'Brainstorming'), ('5g_demo', '5G Demo Session')], max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('room_id', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('host', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hosted_collaborations', to=settings.AUTH_USER_MODEL)),
+                ('participants', models.ManyToManyField(related_name='joined_collaborations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProjectSimilarity',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='backend_core.project')),
+                ('signature', models.JSONField(default=list)),
+                ('terms', models.JSONField(default=dict)),
+                ('neighbours', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_public', models.BooleanField(default=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='backend_core.project')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_links', to='backend_core.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='projects', through='backend_core.ProjectTag', to='backend_core.tag'),
+        ),
+        migrations.CreateModel(
+            name='CanvasOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('ops', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='backend_core.canvassession')),
+            ],
+            options={
+                'ordering': ['session', 'version'],
+                'constraints': [models.UniqueConstraint(fields=('session', 'version'), name='unique_canvas_operation_version')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarityKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_keys', to='backend_core.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('key', 'project'), name='unique_similarity_key')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='projecttag',
+            index=models.Index(fields=['tag', 'is_public', 'project'], name='project_tag_lookup'),
+        ),
+        migrations.AddConstraint(
+            model_name='projecttag',
+            constraint=models.UniqueConstraint(fields=('project', 'tag'), name='unique_project_tag'),
+        ),
+    ]
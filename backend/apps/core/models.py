@@ -1,16 +1,73 @@
 from django.db import models
 from django.conf import settings
 
+from hello_world.core.counters import CounterBuffer
 
-class Project(models.Model):
+
+class CanvasBlob(models.Model):
+    """Compressed canvas payload, stored once per distinct content"""
+    digest = models.CharField(max_length=64, primary_key=True)  # SHA-256 of the canonical JSON
+    size = models.PositiveIntegerField()  # Uncompressed bytes
+    stored_size = models.PositiveIntegerField()
+    codec = models.CharField(max_length=10)
+    data = models.BinaryField(null=True, blank=True)  # None when kept on disk
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes)"
+
+
+class CanvasPayload(models.Model):
+    """
+    canvas_data lives in the blob store; the row holds only its digest and size.
+    The payload is loaded on first access and written on save().
+    """
+    canvas_digest = models.CharField(max_length=64, blank=True, default='')
+    canvas_size = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def canvas_data(self):
+        if not hasattr(self, '_canvas_data'):
+            from .blobs import get_json
+            self._canvas_data = get_json(self.canvas_digest) if self.canvas_digest else {}
+        return self._canvas_data
+    
+    @canvas_data.setter
+    def canvas_data(self, value):
+        self._canvas_data = value if value is not None else {}
+        self._canvas_changed = True
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if not getattr(self, '_canvas_changed', False):
+            # The digest may have moved on; load the payload again when asked
+            self.__dict__.pop('_canvas_data', None)
+    
+    def save(self, *args, **kwargs):
+        if getattr(self, '_canvas_changed', False):
+            from .blobs import put_json
+            if self._canvas_data:
+                self.canvas_digest, self.canvas_size = put_json(self._canvas_data)
+            else:
+                self.canvas_digest, self.canvas_size = '', 0
+            self._canvas_changed = False
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'canvas_digest', 'canvas_size'}
+        super().save(*args, **kwargs)
+
+
+class Project(CanvasPayload):
     """Developer projects with canvas integration"""
     name = models.CharField(max_length=200)
     description = models.TextField()
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='projects')
     technologies = models.JSONField(default=list)
+    tags = models.ManyToManyField('Tag', through='ProjectTag', related_name='projects', blank=True)  # Index of technologies
     github_url = models.URLField(blank=True, null=True)
     demo_url = models.URLField(blank=True, null=True)
-    canvas_data = models.JSONField(default=dict, blank=True)  # Store canvas visualizations
     is_public = models.BooleanField(default=True)
     featured = models.BooleanField(default=False)
     likes_count = models.PositiveIntegerField(default=0)
@@ -23,9 +80,97 @@ class Project(models.Model):
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'technologies', 'is_public'} & set(update_fields):
+            from .tags import sync_project_tags
+            sync_project_tags(self)
+        if update_fields is None or {'technologies', 'description', 'is_public'} & set(update_fields):
+            from .similarity import refresh_project
+            refresh_project(self)
+    
+    def increment_counter(self, field, amount=1):
+        """Buffer a view/like increment; flushed in batches"""
+        project_counters.increment(self.pk, field, amount)
+    
+    @property
+    def live_counts(self):
+        """Engagement counters including increments not yet flushed"""
+        return project_counters.live_counts(self)
+
+
+# Page views and likes are buffered and flushed in batches, not saved per hit
+project_counters = CounterBuffer(Project, ['views_count', 'likes_count'])
+
+
+class Tag(models.Model):
+    """Normalized technology tag"""
+    name = models.CharField(max_length=100)  # Display spelling
+    slug = models.CharField(max_length=100, unique=True)  # Normalized lookup key
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
 
 
-class CanvasSession(models.Model):
+class ProjectTag(models.Model):
+    """Project <-> Tag link, with the project's visibility copied for facet counts"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='project_links')
+    is_public = models.BooleanField(default=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'tag'], name='unique_project_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'is_public', 'project'], name='project_tag_lookup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project_id} -> {self.tag_id}"
+
+
+class ProjectSimilarity(models.Model):
+    """Similarity features and precomputed top related projects"""
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='similarity')
+    signature = models.JSONField(default=list)  # MinHash of the tech tags
+    terms = models.JSONField(default=dict)  # Top TF-IDF description terms, L2-normalised
+    neighbours = models.JSONField(default=list)  # [[project_id, score], ...] best first
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Similarity for {self.project_id}"
+
+
+class SimilarityKey(models.Model):
+    """LSH band or description term -> project, used to find similarity candidates"""
+    key = models.CharField(max_length=64)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='similarity_keys')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'project'], name='unique_similarity_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} -> {self.project_id}"
+
+
+class SimilarityTerm(models.Model):
+    """Description term document frequency from the last offline similarity build"""
+    term = models.CharField(max_length=64, primary_key=True)
+    document_count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return self.term
+
+
+class CanvasSession(CanvasPayload):
     """Canvas sessions for 2D/3D/4D rendering"""
     CANVAS_TYPES = [
         ('2d', '2D Canvas'),
@@ -37,7 +182,8 @@ class CanvasSession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='canvas_sessions')
     session_name = models.CharField(max_length=200)
     canvas_type = models.CharField(max_length=10, choices=CANVAS_TYPES, default='2d')
-    canvas_data = models.JSONField(default=dict)  # Store canvas state and objects
+    version = models.PositiveIntegerField(default=0)  # Latest applied operation
+    snapshot_version = models.PositiveIntegerField(default=0)  # canvas_data is the canvas at this version
     is_public = models.BooleanField(default=False)
     is_collaborative = models.BooleanField(default=False)
     collaborators = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='collaborative_sessions')
@@ -51,6 +197,24 @@ class CanvasSession(models.Model):
         return f"{self.session_name} ({self.canvas_type})"
 
 
+class CanvasOperation(models.Model):
+    """One JSON-Patch delta in a canvas session's op log"""
+    session = models.ForeignKey(CanvasSession, on_delete=models.CASCADE, related_name='operations')
+    version = models.PositiveIntegerField()  # Version this delta produced
+    ops = models.JSONField(default=list)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['session', 'version']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'version'], name='unique_canvas_operation_version'),
+        ]
+    
+    def __str__(self):
+        return f"{self.session_id}@{self.version}"
+
+
 class CodeSnippet(models.Model):
     """Code snippets shared by developers"""
     title = models.CharField(max_length=200)
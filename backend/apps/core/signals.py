@@ -0,0 +1,13 @@
+# 🔭 Project Signals - Keep the precomputed indexes current
+
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import Project
+from . import similarity
+
+
+@receiver(pre_delete, sender=Project)
+def forget_deleted_project(sender, instance, **kwargs):
+    """Take a deleted project out of other projects' related lists while its keys still exist"""
+    similarity.forget_project(instance.pk)
@@ -0,0 +1,276 @@
+# 🔭 Project Similarity - The Royal Cartographers
+# Precomputed "related projects". Tech tags are compared by MinHash (estimated
+# Jaccard), descriptions by TF-IDF cosine, and each public project keeps its
+# top neighbours in ProjectSimilarity, so a lookup is one primary-key read.
+# Candidates come from SimilarityKey: LSH bands of the MinHash signature plus
+# the project's top description terms.
+#
+# rebuild_similarity_index() is the offline pass; it also recomputes document
+# frequencies. refresh_project() runs on every project change and reuses them;
+# forget_project() runs when a project is deleted (see signals).
+
+import hashlib
+import math
+import random
+import re
+from collections import Counter
+
+from django.db import transaction
+
+from .models import Project, ProjectSimilarity, SimilarityKey, SimilarityTerm
+from .tags import normalize_tag
+
+SIMILARITY_NEIGHBOURS = 8
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+TOP_TERMS = 24
+
+# Blend of tech-tag and description similarity in the final score
+TECH_WEIGHT = 0.6
+MIN_SCORE = 0.05
+
+# Keys shared by more projects than this are too common to narrow anything down
+MAX_KEY_FANOUT = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#]*')
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have in into is it its of on or our
+    that the their this to was were will with you your we can using use built
+""".split())
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# ---------------------------------------------------------------------------
+# Features
+# ---------------------------------------------------------------------------
+
+def tech_tokens(project):
+    return {normalize_tag(name) for name in project.technologies or []} - {''}
+
+
+def description_tokens(project):
+    return [token for token in _TOKEN.findall((project.description or '').lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+def minhash(tokens):
+    if not tokens:
+        return []
+    hashes = [_hash64(token) for token in tokens]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimated_jaccard(signature, other):
+    if not signature or not other:
+        return 0.0
+    return sum(1 for x, y in zip(signature, other, strict=True) if x == y) / len(signature)
+
+
+def band_keys(signature):
+    if not signature:
+        return []
+    rows = len(signature) // LSH_BANDS
+    return [
+        f'b{band}:{hashlib.blake2b(repr(signature[band * rows:(band + 1) * rows]).encode(), digest_size=8).hexdigest()}'
+        for band in range(LSH_BANDS)
+    ]
+
+
+def term_weights(tokens, document_count, document_frequency):
+    """Top TF-IDF terms, L2-normalised so cosine is a dot product"""
+    counts = Counter(tokens)
+    weights = {
+        term: (1 + math.log(count)) * (math.log((1 + document_count) / (1 + document_frequency.get(term, 0))) + 1)
+        for term, count in counts.items()
+    }
+    top = sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:TOP_TERMS]
+    norm = math.sqrt(sum(weight * weight for _, weight in top)) or 1.0
+    return {term: round(weight / norm, 5) for term, weight in top}
+
+
+def cosine(terms, other):
+    if len(other) < len(terms):
+        terms, other = other, terms
+    return sum(weight * other.get(term, 0.0) for term, weight in terms.items())
+
+
+def similarity(entry, other):
+    """Blended score between two ProjectSimilarity-like rows"""
+    return (TECH_WEIGHT * estimated_jaccard(entry.signature, other.signature)
+            + (1 - TECH_WEIGHT) * cosine(entry.terms, other.terms))
+
+
+def keys_for(entry):
+    return band_keys(entry.signature) + [f't:{term}'[:64] for term in entry.terms]
+
+
+def _top_neighbours(scores):
+    ranked = sorted(((pk, score) for pk, score in scores.items() if score >= MIN_SCORE),
+                    key=lambda item: (-item[1], item[0]))
+    return [[pk, round(score, 4)] for pk, score in ranked[:SIMILARITY_NEIGHBOURS]]
+
+
+# ---------------------------------------------------------------------------
+# Offline build
+# ---------------------------------------------------------------------------
+
+def rebuild_similarity_index(batch_size=1000):
+    """Recompute document frequencies, features and neighbours for every public project"""
+    projects = list(Project.objects.filter(is_public=True).only('id', 'technologies', 'description'))
+    tokens = {project.pk: description_tokens(project) for project in projects}
+    document_frequency = Counter()
+    for project_tokens in tokens.values():
+        document_frequency.update(set(project_tokens))
+
+    entries = {
+        project.pk: ProjectSimilarity(
+            project_id=project.pk,
+            signature=minhash(tech_tokens(project)),
+            terms=term_weights(tokens[project.pk], len(projects), document_frequency),
+        )
+        for project in projects
+    }
+
+    postings = {}
+    for pk, entry in entries.items():
+        for key in keys_for(entry):
+            postings.setdefault(key, []).append(pk)
+
+    for pk, entry in entries.items():
+        candidates = set()
+        for key in keys_for(entry):
+            if len(postings[key]) <= MAX_KEY_FANOUT:
+                candidates.update(postings[key])
+        candidates.discard(pk)
+        entry.neighbours = _top_neighbours({other: similarity(entry, entries[other]) for other in candidates})
+
+    with transaction.atomic():
+        SimilarityTerm.objects.all().delete()
+        SimilarityTerm.objects.bulk_create(
+            [SimilarityTerm(term=term[:64], document_count=count) for term, count in document_frequency.items()],
+            batch_size=batch_size, ignore_conflicts=True
+        )
+        SimilarityKey.objects.all().delete()
+        SimilarityKey.objects.bulk_create(
+            [SimilarityKey(key=key, project_id=pk) for key, pks in postings.items() for pk in pks],
+            batch_size=batch_size, ignore_conflicts=True
+        )
+        ProjectSimilarity.objects.all().delete()
+        ProjectSimilarity.objects.bulk_create(entries.values(), batch_size=batch_size)
+
+    return len(entries)
+
+
+# ---------------------------------------------------------------------------
+# Incremental refresh
+# ---------------------------------------------------------------------------
+
+def refresh_project(project):
+    """Recompute one project's features and neighbours and fix up the lists it appears in"""
+    previous = ProjectSimilarity.objects.filter(pk=project.pk).values_list('neighbours', flat=True).first() or []
+
+    if not project.is_public:
+        forget_project(project.pk)
+        return None
+
+    tokens = description_tokens(project)
+    document_count = ProjectSimilarity.objects.count() or 1
+    document_frequency = dict(
+        SimilarityTerm.objects.filter(term__in={term[:64] for term in tokens}).values_list('term', 'document_count')
+    )
+    entry = ProjectSimilarity(
+        project_id=project.pk,
+        signature=minhash(tech_tokens(project)),
+        terms=term_weights(tokens, document_count, document_frequency),
+    )
+    keys = keys_for(entry)
+
+    fanout = Counter(SimilarityKey.objects.filter(key__in=keys).values_list('key', flat=True))
+    narrow = [key for key in keys if fanout[key] <= MAX_KEY_FANOUT]
+    candidates = set(SimilarityKey.objects.filter(key__in=narrow).values_list('project_id', flat=True))
+    candidates.discard(project.pk)
+
+    others = ProjectSimilarity.objects.in_bulk(list(candidates))
+    scores = {pk: similarity(entry, other) for pk, other in others.items()}
+    entry.neighbours = _top_neighbours(scores)
+
+    with transaction.atomic():
+        ProjectSimilarity.objects.update_or_create(
+            pk=project.pk,
+            defaults={'signature': entry.signature, 'terms': entry.terms, 'neighbours': entry.neighbours},
+        )
+        SimilarityKey.objects.filter(project_id=project.pk).delete()
+        SimilarityKey.objects.bulk_create([SimilarityKey(key=key, project_id=project.pk) for key in keys],
+                                          ignore_conflicts=True)
+        # Projects that listed this one before may need it dropped or re-scored
+        _update_neighbour_lists(project.pk, scores, set(scores) | {pk for pk, _ in previous}, others)
+
+    return entry
+
+
+def forget_project(project_id):
+    """
+    Drop a project that went private or is being deleted from the index and
+    from every neighbour list that may hold it: its own neighbours, plus the
+    projects sharing a key with it, which are the ones that could have found it.
+    """
+    previous = ProjectSimilarity.objects.filter(pk=project_id).values_list('neighbours', flat=True).first() or []
+    keys = list(SimilarityKey.objects.filter(project_id=project_id).values_list('key', flat=True))
+    fanout = Counter(SimilarityKey.objects.filter(key__in=keys).values_list('key', flat=True))
+    narrow = [key for key in keys if fanout[key] <= MAX_KEY_FANOUT]
+    affected = set(SimilarityKey.objects.filter(key__in=narrow).values_list('project_id', flat=True))
+    affected |= {pk for pk, _ in previous}
+    affected.discard(project_id)
+
+    with transaction.atomic():
+        ProjectSimilarity.objects.filter(pk=project_id).delete()
+        SimilarityKey.objects.filter(project_id=project_id).delete()
+        _update_neighbour_lists(project_id, {}, affected)
+
+
+def _update_neighbour_lists(project_id, scores, affected, loaded=None):
+    loaded = dict(loaded or {})
+    missing = [pk for pk in affected if pk not in loaded]
+    if missing:
+        loaded.update(ProjectSimilarity.objects.in_bulk(missing))
+
+    changed = []
+    for pk in affected:
+        other = loaded.get(pk)
+        if other is None:
+            continue
+        current = {neighbour: score for neighbour, score in other.neighbours}
+        current.pop(project_id, None)
+        if pk in scores:
+            current[project_id] = scores[pk]
+        neighbours = _top_neighbours(current)
+        if neighbours != other.neighbours:
+            other.neighbours = neighbours
+            changed.append(other)
+
+    if changed:
+        ProjectSimilarity.objects.bulk_update(changed, ['neighbours'])
+
+
+# ---------------------------------------------------------------------------
+# Lookup
+# ---------------------------------------------------------------------------
+
+def related_projects(project, limit=4):
+    """Public related projects, best first, from the precomputed neighbour list"""
+    neighbours = ProjectSimilarity.objects.filter(pk=project.pk).values_list('neighbours', flat=True).first()
+    if not neighbours:
+        return []
+    ids = [pk for pk, _ in neighbours]
+    projects = Project.objects.filter(is_public=True).in_bulk(ids)
+    return [projects[pk] for pk in ids if pk in projects][:limit]
@@ -0,0 +1,91 @@
+# 🏷️ Technology Tags - The Royal Catalogue
+# Normalized tag index over Project.technologies. Each project's tags are
+# mirrored into Tag/ProjectTag on save (rows go with the project on delete),
+# so filtering is an indexed join and the facet list is one grouped query.
+# ProjectTag carries the project's is_public flag so facets never touch Project.
+
+import re
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Project, ProjectTag, Tag
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_tag(name):
+    """Lookup key for a technology: trimmed, single-spaced, lowercase"""
+    return _WHITESPACE.sub(' ', str(name)).strip().lower()
+
+
+def _wanted_tags(technologies):
+    """{slug: display name}, first spelling wins"""
+    wanted = {}
+    for name in technologies or []:
+        slug = normalize_tag(name)
+        if slug and slug not in wanted:
+            wanted[slug] = _WHITESPACE.sub(' ', str(name)).strip()[:100]
+    return wanted
+
+
+def get_or_create_tags(wanted):
+    """{slug: Tag} for the given {slug: name}, creating missing ones in bulk"""
+    tags = Tag.objects.in_bulk(list(wanted), field_name='slug')
+    missing = [Tag(slug=slug, name=name) for slug, name in wanted.items() if slug not in tags]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        tags = Tag.objects.in_bulk(list(wanted), field_name='slug')
+    return tags
+
+
+def sync_project_tags(project):
+    """Bring a project's ProjectTag rows in line with its technologies and visibility"""
+    wanted = _wanted_tags(project.technologies)
+
+    with transaction.atomic():
+        tags = get_or_create_tags(wanted) if wanted else {}
+        wanted_ids = {tag.pk for tag in tags.values()}
+        current = dict(ProjectTag.objects.filter(project=project).values_list('tag_id', 'is_public'))
+
+        stale = set(current) - wanted_ids
+        if stale:
+            ProjectTag.objects.filter(project=project, tag_id__in=stale).delete()
+
+        ProjectTag.objects.bulk_create([
+            ProjectTag(project=project, tag_id=tag_id, is_public=project.is_public)
+            for tag_id in wanted_ids - set(current)
+        ], ignore_conflicts=True)
+
+        if any(is_public != project.is_public for tag_id, is_public in current.items() if tag_id in wanted_ids):
+            ProjectTag.objects.filter(project=project).update(is_public=project.is_public)
+
+
+def rebuild_project_tags(batch_size=500):
+    """Backfill or repair the index for every project. Returns projects processed."""
+    processed = 0
+    for project in Project.objects.only('id', 'technologies', 'is_public').iterator(chunk_size=batch_size):
+        sync_project_tags(project)
+        processed += 1
+    return processed
+
+
+def tag_facets():
+    """[(name, public project count)] for the filter list, in one grouped query"""
+    return list(
+        Tag.objects.filter(project_links__is_public=True)
+        .annotate(project_count=Count('project_links'))
+        .order_by('name')
+        .values_list('name', 'project_count')
+    )
+
+
+def projects_tagged(tech):
+    """Subquery of project ids carrying a technology tag"""
+    return ProjectTag.objects.filter(tag__slug=normalize_tag(tech)).values('project_id')
+
+
+def projects_matching_tags(text):
+    """Subquery of project ids with a tag containing text (scans the small tag table, not projects)"""
+    return ProjectTag.objects.filter(tag__slug__contains=normalize_tag(text)).values('project_id')
+
@@ -0,0 +1,299 @@
+"""
+Tests for the projects and canvas app
+"""
+
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from . import blobs, canvas, similarity, tags
+from .models import CanvasBlob, CanvasOperation, CanvasSession, Project, ProjectSimilarity, ProjectTag, Tag
+
+User = get_user_model()
+
+
+class CanvasBlobTest(TestCase):
+    """Canvas payloads live in the blob store, once per distinct content"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='painter', email='painter@example.com')
+        self.scene = {'objects': [{'id': i, 'fill': '#fff'} for i in range(200)]}
+
+    def test_identical_payloads_share_one_compressed_blob(self):
+        for n in range(3):
+            Project.objects.create(name=f'p{n}', description='', owner=self.user, canvas_data=self.scene)
+            CanvasSession.objects.create(user=self.user, session_name=f's{n}', canvas_data=self.scene)
+
+        blob = CanvasBlob.objects.get()
+        self.assertEqual(blob.size, len(blobs.canonical_json(self.scene)))
+        self.assertLess(blob.stored_size, blob.size)
+        self.assertEqual(set(Project.objects.values_list('canvas_digest', flat=True)), {blob.digest})
+
+    def test_listing_reads_no_blobs(self):
+        for n in range(3):
+            CanvasSession.objects.create(user=self.user, session_name=f's{n}', canvas_data=self.scene)
+        cache.clear()
+
+        with mock.patch.object(blobs, '_load', wraps=blobs._load) as load:
+            rows = [(session.session_name, session.canvas_size) for session in CanvasSession.objects.all()]
+            self.assertEqual(load.call_count, 0)
+            self.assertEqual(CanvasSession.objects.first().canvas_data, self.scene)
+            self.assertEqual(load.call_count, 1)
+        self.assertTrue(all(size for _, size in rows))
+
+    def test_refresh_reloads_a_moved_payload(self):
+        session = CanvasSession.objects.create(user=self.user, session_name='s', canvas_data={'a': 1})
+        self.assertEqual(session.canvas_data, {'a': 1})
+
+        other = CanvasSession.objects.get(pk=session.pk)
+        other.canvas_data = {'a': 2}
+        other.save()
+
+        session.refresh_from_db()
+        self.assertEqual(session.canvas_data, {'a': 2})
+
+    def test_file_storage_keeps_bytes_out_of_the_table(self):
+        with tempfile.TemporaryDirectory() as root, \
+                mock.patch.object(blobs, 'CANVAS_BLOB_STORAGE', 'file'), \
+                mock.patch.object(blobs, 'CANVAS_BLOB_ROOT', Path(root)):
+            digest, _ = blobs.put_json(self.scene)
+            self.assertIsNone(CanvasBlob.objects.get(pk=digest).data)
+            self.assertTrue((Path(root) / digest[:2] / digest).exists())
+            cache.clear()
+            self.assertEqual(blobs.get_json(digest), self.scene)
+
+
+class CanvasPatchTest(TestCase):
+    """JSON-Patch operations follow RFC 6902"""
+
+    def test_operations_apply_in_order(self):
+        doc = {'shapes': [{'id': 1}], 'title': 'a'}
+        doc = canvas.apply_patch(doc, [
+            {'op': 'add', 'path': '/shapes/-', 'value': {'id': 2}},
+            {'op': 'replace', 'path': '/title', 'value': 'b'},
+            {'op': 'move', 'from': '/shapes/0', 'path': '/first'},
+            {'op': 'copy', 'from': '/first', 'path': '/again'},
+            {'op': 'test', 'path': '/again/id', 'value': 1},
+            {'op': 'remove', 'path': '/first'},
+        ])
+        self.assertEqual(doc, {'shapes': [{'id': 2}], 'title': 'b', 'again': {'id': 1}})
+
+    def test_value_is_required(self):
+        for name in ('add', 'replace', 'test'):
+            with self.assertRaises(canvas.PatchError):
+                canvas.apply_patch({'title': 'a'}, [{'op': name, 'path': '/title'}])
+
+    def test_explicit_null_is_a_value(self):
+        self.assertEqual(canvas.apply_patch({}, [{'op': 'add', 'path': '/title', 'value': None}]), {'title': None})
+
+    def test_bad_paths_are_rejected(self):
+        for op in (
+            {'op': 'remove', 'path': '/missing'},
+            {'op': 'add', 'path': '/shapes/5', 'value': 1},
+            {'op': 'add', 'path': 'shapes', 'value': 1},
+            {'op': 'move', 'from': '/shapes', 'path': '/shapes/0'},
+        ):
+            with self.assertRaises(canvas.PatchError):
+                canvas.apply_patch({'shapes': []}, [op])
+
+
+class CanvasDeltaTest(TestCase):
+    """Versioned deltas, conflicts and snapshot cadence"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(username='painter', email='painter@example.com')
+        self.guest = User.objects.create(username='guest', email='guest@example.com')
+        self.session = CanvasSession.objects.create(user=self.owner, session_name='mural', canvas_data={'shapes': []})
+        self.session.collaborators.add(self.guest)
+
+    def add_shape(self, base_version, shape_id, session=None):
+        ops = [{'op': 'add', 'path': '/shapes/-', 'value': {'id': shape_id}}]
+        return canvas.apply_delta(session or self.session, self.owner, base_version, ops)
+
+    def test_deltas_are_logged_and_state_rebuilds_from_the_log(self):
+        for version in range(3):
+            self.assertEqual(self.add_shape(version, version), version + 1)
+
+        self.assertEqual(list(CanvasOperation.objects.values_list('version', flat=True)), [1, 2, 3])
+        expected = (3, {'shapes': [{'id': 0}, {'id': 1}, {'id': 2}]})
+        self.assertEqual(canvas.load_state(self.session.pk), expected)
+
+        cache.clear()
+        self.assertEqual(canvas.load_state(self.session.pk), expected)
+
+    def test_stale_base_version_gets_the_missed_operations(self):
+        self.add_shape(0, 'a')
+        self.add_shape(1, 'b')
+
+        with self.assertRaises(canvas.StaleVersion) as raised:
+            self.add_shape(1, 'c')
+
+        hint = raised.exception.rebase_hint()
+        self.assertEqual(hint['current_version'], 2)
+        self.assertFalse(hint['reload'])
+        self.assertEqual([op['version'] for op in hint['operations']], [2])
+        self.assertEqual(CanvasOperation.objects.count(), 2)
+
+    def test_far_behind_client_is_told_to_reload(self):
+        with mock.patch.object(canvas, 'MAX_REBASE_OPS', 2):
+            for version in range(3):
+                self.add_shape(version, version)
+            with self.assertRaises(canvas.StaleVersion) as raised:
+                self.add_shape(0, 'late')
+        self.assertTrue(raised.exception.rebase_hint()['reload'])
+
+    def test_rejected_patch_leaves_no_trace(self):
+        with self.assertRaises(canvas.PatchError):
+            canvas.apply_delta(self.session, self.owner, 0, [{'op': 'remove', 'path': '/missing'}])
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.version, 0)
+        self.assertFalse(CanvasOperation.objects.exists())
+        self.assertEqual(canvas.load_state(self.session.pk), (0, {'shapes': []}))
+
+    def test_snapshot_every_n_operations(self):
+        with mock.patch.object(canvas, 'CANVAS_SNAPSHOT_EVERY', 3):
+            for version in range(7):
+                self.add_shape(version, version)
+                self.session.refresh_from_db()
+                self.assertEqual(self.session.snapshot_version, (version + 1) // 3 * 3)
+
+        snapshot = CanvasSession.objects.get(pk=self.session.pk).canvas_data
+        self.assertEqual(len(snapshot['shapes']), 6)
+
+    def test_snapshot_cadence_ignores_a_stale_session(self):
+        stale = CanvasSession.objects.get(pk=self.session.pk)
+        with mock.patch.object(canvas, 'CANVAS_SNAPSHOT_EVERY', 3):
+            for version in range(7):
+                # Every applier holds the row as loaded before any snapshot
+                self.add_shape(version, version, session=stale)
+                self.session.refresh_from_db()
+                self.assertEqual(self.session.snapshot_version, (version + 1) // 3 * 3)
+
+    def test_membership(self):
+        stranger = User.objects.create(username='stranger', email='stranger@example.com')
+        self.assertTrue(canvas.is_member(self.session.pk, self.owner))
+        self.assertTrue(canvas.is_member(self.session.pk, self.guest))
+        self.assertFalse(canvas.is_member(self.session.pk, stranger))
+
+    def test_whole_canvas_replace_is_logged_by_digest(self):
+        self.add_shape(0, 'a')
+        version = canvas.replace_canvas(self.session, self.owner, {'shapes': [{'id': 'new'}]})
+
+        operation = CanvasOperation.objects.get(version=version)
+        self.assertNotIn('value', operation.ops[0])
+        self.assertTrue(CanvasBlob.objects.filter(pk=operation.ops[0]['value_digest']).exists())
+
+        with self.assertRaises(canvas.StaleVersion) as raised:
+            self.add_shape(1, 'late')
+        missed = raised.exception.rebase_hint()['operations']
+        self.assertEqual(missed, [{'version': 2, 'ops': [{'op': 'replace', 'path': '', 'value': {'shapes': [{'id': 'new'}]}}]}])
+
+        cache.clear()
+        self.assertEqual(canvas.load_state(self.session.pk), (2, {'shapes': [{'id': 'new'}]}))
+
+
+class ProjectTagIndexTest(TestCase):
+    """Technology tags mirror Project.technologies and its visibility"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='maker', email='maker@example.com')
+
+    def project(self, name, technologies, is_public=True):
+        return Project.objects.create(name=name, description='', owner=self.user,
+                                      technologies=technologies, is_public=is_public)
+
+    def test_tags_are_normalized_and_shared(self):
+        self.project('a', ['Django', ' python '])
+        self.project('b', ['django', 'React'])
+
+        self.assertEqual(sorted(Tag.objects.values_list('slug', flat=True)), ['django', 'python', 'react'])
+        self.assertEqual(Tag.objects.get(slug='django').name, 'Django')
+        self.assertEqual(
+            sorted(Project.objects.filter(pk__in=tags.projects_tagged('DJANGO')).values_list('name', flat=True)),
+            ['a', 'b']
+        )
+
+    def test_edits_and_visibility_follow_the_project(self):
+        project = self.project('a', ['Django', 'Python'])
+        self.project('b', ['Python'], is_public=False)
+
+        project.technologies = ['Python', 'Rust']
+        project.save(update_fields=['technologies'])
+        self.assertEqual(sorted(project.tags.values_list('slug', flat=True)), ['python', 'rust'])
+        self.assertEqual(tags.tag_facets(), [('Python', 1), ('Rust', 1)])
+
+        project.is_public = False
+        project.save(update_fields=['is_public'])
+        self.assertEqual(tags.tag_facets(), [])
+
+    def test_substring_search_and_rebuild(self):
+        project = self.project('a', ['PostgreSQL'])
+        ProjectTag.objects.all().delete()
+
+        self.assertEqual(tags.rebuild_project_tags(), 1)
+        self.assertEqual(list(Project.objects.filter(pk__in=tags.projects_matching_tags('gres'))), [project])
+
+
+class ProjectSimilarityTest(TestCase):
+    """Related projects come from the precomputed neighbour lists"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='maker', email='maker@example.com')
+
+    def project(self, name, technologies, description, is_public=True):
+        return Project.objects.create(name=name, description=description, owner=self.user,
+                                      technologies=technologies, is_public=is_public)
+
+    def build(self):
+        self.chat = self.project('chat', ['Django', 'Channels', 'Redis'], 'realtime chat server with websockets')
+        self.rooms = self.project('rooms', ['Django', 'Channels', 'Postgres'], 'websockets chat rooms and presence')
+        self.shop = self.project('shop', ['Django', 'Stripe'], 'online shop checkout')
+        self.game = self.project('game', ['Unity', 'C#'], 'platformer game with physics')
+        similarity.rebuild_similarity_index()
+
+    def test_minhash_estimates_jaccard(self):
+        one = similarity.minhash({'django', 'redis', 'channels', 'celery'})
+        self.assertEqual(similarity.estimated_jaccard(one, one), 1.0)
+        self.assertEqual(similarity.estimated_jaccard(one, []), 0.0)
+        other = similarity.minhash({'unity', 'c#', 'blender', 'fmod'})
+        self.assertLess(similarity.estimated_jaccard(one, other), 0.2)
+
+    def test_related_projects_rank_closest_first(self):
+        self.build()
+        related = similarity.related_projects(self.chat)
+        self.assertEqual(related[0], self.rooms)
+        self.assertNotIn(self.game, related)
+
+    def test_new_project_is_found_incrementally(self):
+        self.build()
+        twin = self.project('twin', ['Django', 'Channels', 'Redis'], 'realtime chat server with websockets')
+        self.assertEqual(similarity.related_projects(twin)[0], self.chat)
+        self.assertIn(twin, similarity.related_projects(self.chat))
+
+    def test_private_project_leaves_neighbour_lists(self):
+        self.build()
+        self.assertIn(self.rooms.pk, self.neighbour_ids(self.chat))
+
+        self.rooms.is_public = False
+        self.rooms.save(update_fields=['is_public'])
+        self.assertNotIn(self.rooms.pk, self.neighbour_ids(self.chat))
+        self.assertFalse(ProjectSimilarity.objects.filter(pk=self.rooms.pk).exists())
+
+    def test_deleted_project_leaves_neighbour_lists(self):
+        self.build()
+        rooms_id = self.rooms.pk
+        self.assertIn(rooms_id, self.neighbour_ids(self.chat))
+
+        self.rooms.delete()
+        for entry in ProjectSimilarity.objects.all():
+            self.assertNotIn(rooms_id, [pk for pk, _ in entry.neighbours])
+
+    def neighbour_ids(self, project):
+        return [pk for pk, _ in ProjectSimilarity.objects.get(pk=project.pk).neighbours]
@@ -6,6 +6,7 @@ from django.db.models import Q
 from django.core.paginator import Paginator
 from .models import Project, CanvasSession, CodeSnippet, TechStack, Collaboration
 from backend.apps.users.models import CustomUser
+from . import similarity, tags
 
 
 def home(request):
@@ -54,10 +55,10 @@ def projects_list(request):
     """List all public projects"""
     projects = Project.objects.filter(is_public=True)
     
-    # Filter by technology
+    # Filter by technology - an indexed join through the tag table
     tech_filter = request.GET.get('tech')
     if tech_filter:
-        projects = projects.filter(technologies__icontains=tech_filter)
+        projects = projects.filter(pk__in=tags.projects_tagged(tech_filter))
     
     # Search functionality
     search_query = request.GET.get('search')
@@ -65,7 +66,7 @@ def projects_list(request):
         projects = projects.filter(
             Q(name__icontains=search_query) | 
             Q(description__icontains=search_query) |
-            Q(technologies__icontains=search_query)
+            Q(pk__in=tags.projects_matching_tags(search_query))
         )
     
     # Pagination
@@ -73,15 +74,13 @@ def projects_list(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Get available technologies for filter
-    all_projects = Project.objects.filter(is_public=True)
-    technologies = set()
-    for project in all_projects:
-        technologies.update(project.technologies)
+    # Available technologies for the filter, counted in one grouped query
+    technology_counts = tags.tag_facets()
     
     context = {
         'page_obj': page_obj,
-        'technologies': sorted(technologies),
+        'technologies': [name for name, _ in technology_counts],
+        'technology_counts': technology_counts,
         'current_tech': tech_filter,
         'search_query': search_query,
     }
@@ -94,17 +93,14 @@ def project_detail(request, project_id):
     project = get_object_or_404(Project, id=project_id, is_public=True)
     
     # Increment view count
-    project.views_count += 1
-    project.save()
+    project.increment_counter('views_count')
     
-    # Get related projects
-    related_projects = Project.objects.filter(
-        is_public=True,
-        technologies__overlap=project.technologies
-    ).exclude(id=project.id)[:4]
+    # Related projects are precomputed - one primary-key read
+    related_projects = similarity.related_projects(project)
     
     context = {
         'project': project,
+        'counts': project.live_counts,
         'related_projects': related_projects,
     }
     
@@ -73,7 +73,7 @@ class ProjectAdmin(admin.ModelAdmin):
     
     list_display = [
         'title', 'owner', 'category', 'status', 'visibility', 'is_featured',
-        'view_count', 'like_count', 'created_at'
+        'live_view_count', 'live_like_count', 'created_at'
     ]
     list_filter = [
         'category', 'status', 'visibility', 'is_featured', 'allow_collaboration',
@@ -97,7 +97,7 @@ class ProjectAdmin(admin.ModelAdmin):
             'fields': ('status', 'visibility', 'is_featured', 'allow_collaboration')
         }),
         ('Engagement Metrics', {
-            'fields': ('view_count', 'like_count', 'fork_count', 'download_count'),
+            'fields': ('engagement',),
             'classes': ('collapse',)
         }),
         ('SEO & Discovery', {
@@ -106,9 +106,24 @@ class ProjectAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['view_count', 'like_count', 'fork_count', 'download_count']
+    readonly_fields = ['engagement']
     prepopulated_fields = {'slug': ('title',)}
     
+    # Counters are buffered, so show them with the increments not yet flushed
+    def live_view_count(self, obj):
+        return obj.live_counts['view_count']
+    live_view_count.short_description = 'Views'
+    
+    def live_like_count(self, obj):
+        return obj.live_counts['like_count']
+    live_like_count.short_description = 'Likes'
+    
+    def engagement(self, obj):
+        counts = obj.live_counts
+        return (f"{counts['view_count']} views · {counts['like_count']} likes · "
+                f"{counts['fork_count']} forks · {counts['download_count']} downloads")
+    engagement.short_description = 'Engagement'
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('owner')
 
@@ -193,18 +208,22 @@ class ChatMessageAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Message Features', {
-            'fields': ('reply_to', 'is_edited', 'edit_history', 'reactions', 'is_pinned'),
+            'fields': ('reply_to', 'is_edited', 'edit_history', 'reaction_counts', 'is_pinned'),
             'classes': ('collapse',)
         }),
     )
     
-    readonly_fields = ['edit_history', 'reactions']
+    readonly_fields = ['edit_history', 'reaction_counts']
     
     def message_preview(self, obj):
         preview = obj.content[:100] + "..." if len(obj.content) > 100 else obj.content
         return preview
     message_preview.short_description = 'Preview'
     
+    def reaction_counts(self, obj):
+        return ' '.join(f"{emoji} {count}" for emoji, count in obj.reactions.items()) or '-'
+    reaction_counts.short_description = 'Reactions'
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('sender', 'room', 'reply_to')
 
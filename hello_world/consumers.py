@@ -3,13 +3,19 @@
 
 import json
 import asyncio
+import zlib
 from datetime import datetime
+from urllib.parse import parse_qs
 from typing import Dict, List, Any
 
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+
+from hello_world.core.reactions import add_reaction, reaction_broadcaster, remove_reaction, validate_emoji
+from hello_world.core.canvas_outbox import CANVAS_TICK, CanvasOutbox, decode_frame, encode_frame
 
 User = get_user_model()
 
@@ -196,27 +202,37 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     async def handle_message_reaction(self, data):
         """Handle message reactions (like, love, laugh, etc.)"""
+        if not self.user.is_authenticated:
+            await self.send_error('Sign in to react to messages')
+            return
+        
         reaction_data = {
-            'type': 'message_reaction',
             'message_id': data.get('message_id'),
             'reaction': data.get('reaction'),  # emoji or reaction type
-            'username': self.user.username if self.user.is_authenticated else 'Anonymous',
-            'user_id': self.user.id if self.user.is_authenticated else None,
-            'timestamp': datetime.now().isoformat(),
+            'action': data.get('action', 'add'),  # add or remove
+            'user_id': self.user.id,
         }
         
-        # Save reaction to database
-        if self.user.is_authenticated:
-            await self.save_message_reaction(reaction_data)
+        if not reaction_data['message_id'] or not reaction_data['reaction']:
+            await self.send_error('message_id and reaction are required')
+            return
         
-        # Broadcast reaction to room
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'message_reaction_broadcast',
-                'reaction_data': reaction_data
-            }
-        )
+        try:
+            validate_emoji(reaction_data['reaction'])
+        except ValidationError as e:
+            await self.send_error(e.messages[0])
+            return
+        
+        # Save reaction to database; unchanged reactions need no broadcast
+        changed = await self.save_message_reaction(reaction_data)
+        
+        # Aggregated counts go out at most once per message per tick
+        if changed:
+            reaction_broadcaster.schedule(
+                self.channel_layer,
+                self.room_group_name,
+                reaction_data['message_id']
+            )
     
     async def handle_file_share(self, data):
         """Handle file sharing in chat"""
@@ -367,8 +383,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def save_message_reaction(self, reaction_data):
         """Save message reaction to database"""
-        # Implementation would save to MessageReaction model
-        pass
+        try:
+            if reaction_data['action'] == 'remove':
+                return remove_reaction(
+                    reaction_data['message_id'], reaction_data['user_id'], reaction_data['reaction']
+                )
+            return add_reaction(
+                reaction_data['message_id'], reaction_data['user_id'], reaction_data['reaction']
+            )
+        except ValidationError:
+            # Malformed message id or reaction
+            return False
     
     @database_sync_to_async
     def save_file_share(self, file_data):
@@ -615,3 +640,159 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """Mark all notifications as read for user"""
         # Implementation would update all user notifications
         pass
+
+
+class CanvasConsumer(AsyncWebsocketConsumer):
+    """
+    Real-time Canvas Consumer - The Creative Forge
+    Joins canvas_<id>, the group the canvas API broadcasts to, and fans out
+    coalesced, zlib-compressed frames (?compress=0 for plain JSON text).
+    Only the session owner and its collaborators may connect.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.canvas_id = None
+        self.group_name = None
+        self.user = None
+        self.compress = True
+        self.outbox = CanvasOutbox()
+        self._flush_task = None
+    
+    async def connect(self):
+        """Join the canvas room after checking membership"""
+        self.canvas_id = self.scope['url_route']['kwargs']['canvas_id']
+        self.user = self.scope.get('user', AnonymousUser())
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        self.compress = query.get('compress', ['1'])[0] != '0'
+        
+        if not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+        
+        if not await self.is_member():
+            await self.close(code=4003)
+            return
+        
+        self.group_name = f'canvas_{self.canvas_id}'
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        
+        # Start from the current state; deltas follow from its version
+        version, canvas_data = await self.load_state()
+        self.outbox.set_state(version, canvas_data)
+        self.schedule_flush()
+    
+    async def disconnect(self, close_code):
+        """Leave the canvas room"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    
+    async def receive(self, text_data=None, bytes_data=None):
+        """Accept JSON-Patch deltas from collaborators"""
+        try:
+            data = decode_frame(text_data, bytes_data)
+        except (ValueError, zlib.error):
+            await self.send_frame({'type': 'error', 'message': 'Invalid frame'})
+            return
+        
+        if not isinstance(data, dict):
+            await self.send_frame({'type': 'error', 'message': 'Invalid frame'})
+            return
+        
+        if data.get('type') == 'canvas_delta':
+            await self.handle_delta(data)
+    
+    async def handle_delta(self, data):
+        """Apply a delta and broadcast it; conflicts go back to the sender only"""
+        ops = data.get('ops')
+        try:
+            result = await self.apply_delta(int(data.get('base_version', -1)), ops)
+        except (TypeError, ValueError) as e:
+            result = {'type': 'error', 'message': f'Invalid patch: {e}'}
+        
+        if result['type'] != 'canvas_applied':
+            await self.send_frame(result)
+            return
+        
+        await self.channel_layer.group_send(
+            self.group_name,
+            {
+                'type': 'canvas_delta',
+                'session_id': self.canvas_id,
+                'version': result['version'],
+                'ops': ops,
+                'user': self.user.username,
+            }
+        )
+    
+    # Group handlers - queue into the outbox, the flush loop does the sending
+    async def canvas_delta(self, event):
+        self.outbox.add_delta(event['version'], event['ops'], event.get('user'))
+        self.schedule_flush()
+    
+    async def canvas_update(self, event):
+        self.outbox.set_state(event.get('version'), event['canvas_data'], event.get('user'))
+        self.schedule_flush()
+    
+    def schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_after_tick())
+    
+    async def _flush_after_tick(self):
+        await asyncio.sleep(CANVAS_TICK)
+        
+        # Whatever arrived while a frame was being sent joins the next one
+        while self.outbox:
+            state, deltas, resync = self.outbox.drain()
+            if resync:
+                version, canvas_data = await self.load_state()
+                state = {'version': version, 'canvas_data': canvas_data, 'user': None}
+                deltas = [delta for delta in deltas if delta['version'] > version]
+            
+            await self.send_frame({
+                'type': 'canvas_frame',
+                'session_id': self.canvas_id,
+                'state': state,
+                'deltas': deltas,
+            })
+    
+    async def send_frame(self, payload):
+        await self.send(**encode_frame(payload, self.compress))
+    
+    @database_sync_to_async
+    def is_member(self):
+        """Owner or listed collaborator of the canvas session"""
+        from backend.apps.core import canvas
+        
+        try:
+            canvas_id = int(self.canvas_id)
+        except ValueError:
+            return False
+        return canvas.is_member(canvas_id, self.user)
+    
+    @database_sync_to_async
+    def load_state(self):
+        from backend.apps.core import canvas
+        
+        return canvas.load_state(int(self.canvas_id))
+    
+    @database_sync_to_async
+    def apply_delta(self, base_version, ops):
+        from backend.apps.core import canvas
+        from backend.apps.core.models import CanvasSession
+        
+        try:
+            session = CanvasSession.objects.only('id').get(pk=int(self.canvas_id))
+        except CanvasSession.DoesNotExist:
+            return {'type': 'error', 'message': 'Canvas session no longer exists'}
+        try:
+            version = canvas.apply_delta(session, self.user, base_version, ops)
+        except canvas.StaleVersion as e:
+            return {'type': 'canvas_conflict', **e.rebase_hint()}
+        except canvas.PatchError as e:
+            return {'type': 'error', 'message': f'Invalid patch: {e}'}
+        return {'type': 'canvas_applied', 'version': version}
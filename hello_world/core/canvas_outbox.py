@@ -0,0 +1,79 @@
+# 🎨 Canvas Outbox - The Royal Courier
+# Per-connection buffer for canvas fan-out. Updates arriving within a tick
+# leave as one compressed frame, and a client that falls too far behind gets
+# the latest state instead of its whole backlog.
+
+import json
+import zlib
+
+from django.conf import settings
+
+# Seconds updates are coalesced before a frame goes out
+CANVAS_TICK = getattr(settings, 'CANVAS_TICK', 0.05)
+
+# Deltas held for one connection before it is switched to a full resync
+MAX_PENDING_DELTAS = getattr(settings, 'CANVAS_MAX_PENDING_DELTAS', 64)
+
+# Largest decompressed client frame; a bigger one is rejected, not inflated
+MAX_FRAME_BYTES = getattr(settings, 'CANVAS_MAX_FRAME_BYTES', 4 * 1024 * 1024)
+
+
+def encode_frame(payload, compress=True):
+    """send() kwargs for a frame: zlib-deflated JSON bytes, or plain text"""
+    data = json.dumps(payload, separators=(',', ':'), default=str)
+    if compress:
+        return {'bytes_data': zlib.compress(data.encode('utf-8'))}
+    return {'text_data': data}
+
+
+def decode_frame(text_data=None, bytes_data=None, max_size=MAX_FRAME_BYTES):
+    """Parse a client frame; raises ValueError (or zlib.error) on a bad or oversized one"""
+    if bytes_data is not None:
+        inflater = zlib.decompressobj()
+        raw = inflater.decompress(bytes_data, max_size)
+        if inflater.unconsumed_tail:
+            raise ValueError(f"Frame inflates past {max_size} bytes")
+        text_data = raw.decode('utf-8')
+    return json.loads(text_data)
+
+
+class CanvasOutbox:
+    """
+    Pending updates for one client. A full state supersedes every delta at or
+    below its version; overflowing deltas are dropped in favour of a resync.
+    """
+
+    def __init__(self, max_pending=MAX_PENDING_DELTAS):
+        self.max_pending = max_pending
+        self.state = None
+        self.deltas = []
+        self.resync = False
+
+    def __bool__(self):
+        return self.state is not None or bool(self.deltas) or self.resync
+
+    def add_delta(self, version, ops, user=None):
+        if self.resync:
+            return
+        if self.state is not None and self.state['version'] is not None and version <= self.state['version']:
+            return
+        self.deltas.append({'version': version, 'ops': ops, 'user': user})
+        if len(self.deltas) > self.max_pending:
+            # Latest state wins - no unbounded backlog for slow clients
+            self.deltas = []
+            self.state = None
+            self.resync = True
+
+    def set_state(self, version, canvas_data, user=None):
+        self.state = {'version': version, 'canvas_data': canvas_data, 'user': user}
+        if version is None:
+            self.deltas = []
+        else:
+            self.deltas = [delta for delta in self.deltas if delta['version'] > version]
+        self.resync = False
+
+    def drain(self):
+        """(state, deltas, resync) accumulated since the last drain"""
+        pending = (self.state, sorted(self.deltas, key=lambda delta: delta['version']), self.resync)
+        self.state, self.deltas, self.resync = None, [], False
+        return pending
@@ -0,0 +1,232 @@
+# 👑 Buffered Counters - The Royal Tally Keepers
+# View/like/fork/download increments are accumulated in Redis (or process memory)
+# and written back with F() batch updates, instead of one row write per hit.
+
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, DataError, IntegrityError, close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background flushes
+COUNTER_FLUSH_INTERVAL = getattr(settings, 'COUNTER_FLUSH_INTERVAL', 10)
+
+
+# ============================================================================
+# PENDING DELTA STORES
+# ============================================================================
+
+class MemoryCounterStore:
+    """Per-process deltas; each worker flushes its own share"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(lambda: defaultdict(int))
+
+    def add(self, pk, field, amount):
+        with self._lock:
+            self._pending[pk][field] += amount
+
+    def get(self, pk):
+        with self._lock:
+            return dict(self._pending.get(pk, {}))
+
+    def take(self):
+        """Swap out everything pending and return it as {pk: {field: delta}}"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        return {pk: dict(fields) for pk, fields in pending.items()}
+
+    def restore(self, pending):
+        for pk, fields in pending.items():
+            for field, amount in fields.items():
+                self.add(pk, field, amount)
+
+
+class RedisCounterStore:
+    """
+    Deltas shared by every worker: one Redis hash per row plus a set of dirty rows.
+    Each row is read and cleared in one MULTI, so increments racing a flush are never lost.
+    """
+
+    def __init__(self, url, prefix):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.dirty_key = f'{prefix}:dirty'
+
+    def _row_key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def add(self, pk, field, amount):
+        pipe = self._redis.pipeline()
+        pipe.hincrby(self._row_key(pk), field, amount)
+        pipe.sadd(self.dirty_key, pk)
+        pipe.execute()
+
+    def get(self, pk):
+        return {field.decode(): int(amount)
+                for field, amount in self._redis.hgetall(self._row_key(pk)).items()}
+
+    def take(self):
+        pending = {}
+        for raw_pk in self._redis.smembers(self.dirty_key):
+            pk = raw_pk.decode()
+            # Un-mark first: an increment landing after this re-marks the row itself
+            self._redis.srem(self.dirty_key, pk)
+            pipe = self._redis.pipeline()
+            pipe.hgetall(self._row_key(pk))
+            pipe.delete(self._row_key(pk))
+            fields, _ = pipe.execute()
+            if fields:
+                pending[pk] = {field.decode(): int(amount) for field, amount in fields.items()}
+        return pending
+
+    def restore(self, pending):
+        for pk, fields in pending.items():
+            for field, amount in fields.items():
+                self.add(pk, field, amount)
+
+
+# ============================================================================
+# COUNTER BUFFER
+# ============================================================================
+
+class CounterBuffer:
+    """Buffered integer counters for one model"""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = set(fields)
+        self._store = None
+        register(self)
+
+    @property
+    def store(self):
+        if self._store is None:
+            redis_url = getattr(settings, 'REDIS_URL', '')
+            if redis_url:
+                self._store = RedisCounterStore(redis_url, f'glorious_counters:{self.model._meta.db_table}')
+            else:
+                self._store = MemoryCounterStore()
+        return self._store
+
+    def increment(self, pk, field, amount=1):
+        if field not in self.fields:
+            raise ValueError(f"{field} is not a buffered counter on {self.model.__name__}")
+        self.store.add(pk, field, amount)
+        start_flusher()
+
+    def pending(self, pk):
+        """Deltas not yet written to the database"""
+        return self.store.get(pk)
+
+    def live_counts(self, instance):
+        """Stored counts plus pending deltas, so counters look live between flushes"""
+        pending = self.pending(instance.pk)
+        return {field: getattr(instance, field) + pending.get(field, 0) for field in self.fields}
+
+    def flush(self):
+        """Write pending deltas with one F() update per distinct delta set. Returns rows touched."""
+        pending = self.store.take()
+        if not pending:
+            return 0
+
+        # Rows with identical deltas (e.g. +1 view each) share a single UPDATE
+        groups = defaultdict(list)
+        for pk, fields in pending.items():
+            deltas = tuple(sorted((field, amount) for field, amount in fields.items() if amount))
+            if deltas:
+                groups[deltas].append(pk)
+
+        # Each group gets its own savepoint: a group the database rejects (e.g. a
+        # PositiveIntegerField driven below zero) is dropped and logged rather
+        # than re-queued forever, and a transient failure re-queues only its rows
+        retry = {}
+        try:
+            with transaction.atomic():
+                for deltas, pks in groups.items():
+                    try:
+                        with transaction.atomic():
+                            # QuerySet.update() leaves auto_now fields such as updated_at alone
+                            self.model.objects.filter(pk__in=pks).update(
+                                **{field: F(field) + amount for field, amount in deltas}
+                            )
+                    except (IntegrityError, DataError) as e:
+                        logger.error(
+                            f"Dropping {self.model.__name__} counter deltas {dict(deltas)} "
+                            f"for {len(pks)} rows: {e}"
+                        )
+                    except DatabaseError:
+                        retry.update((pk, pending[pk]) for pk in pks)
+        except Exception:
+            self.store.restore(pending)
+            raise
+
+        if retry:
+            self.store.restore(retry)
+        return len(pending) - len(retry)
+
+
+_buffers = []
+
+
+def register(buffer):
+    """Add anything with a model and a flush() to the periodic flush"""
+    _buffers.append(buffer)
+
+
+def flush_all():
+    """Flush every registered buffer"""
+    total = 0
+    for buffer in _buffers:
+        try:
+            total += buffer.flush()
+        except Exception as e:
+            logger.error(f"Counter flush failed for {buffer.model.__name__}: {e}")
+    return total
+
+
+# ============================================================================
+# BACKGROUND FLUSHER
+# ============================================================================
+
+_flusher = None
+_flusher_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _flush_loop():
+    while not _stop.wait(COUNTER_FLUSH_INTERVAL):
+        flush_all()
+        close_old_connections()
+
+
+def start_flusher():
+    """Start the periodic flush thread once per process"""
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name='counter-flusher', daemon=True)
+            _flusher.start()
+
+
+def shutting_down():
+    """True once the exit flush has begun; periodic-only work (sweeps) should be skipped"""
+    return _stop.is_set()
+
+
+@atexit.register
+def _flush_on_shutdown():
+    """Durable flush when the process exits cleanly"""
+    _stop.set()
+    # Nothing was buffered if the flusher never started (e.g. manage.py commands)
+    if _flusher is not None:
+        flush_all()
@@ -0,0 +1,168 @@
+# 🧭 Developer Directory - The Royal Registry
+# Indexed developer search. Each user gets a DirectoryEntry (listed flag and
+# experience level) and links to normalized skill tags, kept in step by the
+# post_save signal and the Keycloak sync.
+# Pages are keyset-paginated on the user id, newest first, so each page is
+# a bounded index range scan however deep the client goes.
+
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import CustomUser, DirectoryEntry, DirectoryEntryTag, DirectoryTag
+
+DIRECTORY_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Fields whose change moves a user in the directory
+DIRECTORY_FIELDS = {'skills', 'experience_level', 'is_active'}
+
+# Facet counts are global, so a short-lived cached copy serves everyone
+FACET_CACHE_KEY = 'developer_directory:facets'
+FACET_CACHE_TIMEOUT = 60
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_skill(name):
+    """Lookup key for a skill: trimmed, single-spaced, lowercase"""
+    return _WHITESPACE.sub(' ', str(name)).strip().lower()
+
+
+def _skill_names(values):
+    """{slug: display name}; skills may arrive as a list or a comma-separated string"""
+    if isinstance(values, str):
+        values = values.split(',')
+    names = {}
+    for value in values or []:
+        slug = normalize_skill(value)
+        if slug and slug not in names:
+            names[slug] = _WHITESPACE.sub(' ', str(value)).strip()[:100]
+    return names
+
+
+def _get_or_create_tags(wanted):
+    """{slug: DirectoryTag} for {slug: name}"""
+    def load():
+        return {tag.slug: tag for tag in DirectoryTag.objects.filter(slug__in=list(wanted))}
+
+    tags = load()
+    missing = [DirectoryTag(slug=slug, name=name) for slug, name in wanted.items() if slug not in tags]
+    if missing:
+        DirectoryTag.objects.bulk_create(missing, ignore_conflicts=True)
+        tags = load()
+    return tags
+
+
+def sync_directory_entry(user):
+    """Bring a user's directory entry and tag links in line with the user"""
+    is_listed = user.is_active
+    experience_level = user.experience_level or ''
+    wanted = _skill_names(user.skills)
+
+    with transaction.atomic():
+        entry, _ = DirectoryEntry.objects.update_or_create(user=user, defaults={
+            'is_listed': is_listed,
+            'experience_level': experience_level,
+        })
+
+        wanted_ids = {tag.pk for tag in _get_or_create_tags(wanted).values()} if wanted else set()
+        current = {
+            tag_id: (listed, level)
+            for tag_id, listed, level in entry.tag_links.values_list('tag_id', 'is_listed', 'experience_level')
+        }
+
+        stale = set(current) - wanted_ids
+        if stale:
+            entry.tag_links.filter(tag_id__in=stale).delete()
+
+        DirectoryEntryTag.objects.bulk_create([
+            DirectoryEntryTag(entry=entry, tag_id=tag_id, is_listed=is_listed, experience_level=experience_level)
+            for tag_id in wanted_ids - set(current)
+        ], ignore_conflicts=True)
+
+        if any(columns != (is_listed, experience_level) for tag_id, columns in current.items() if tag_id in wanted_ids):
+            entry.tag_links.update(is_listed=is_listed, experience_level=experience_level)
+
+    return entry
+
+
+def rebuild_directory(batch_size=500):
+    """Backfill or repair every directory entry. Returns users processed."""
+    processed = 0
+    for user in CustomUser.objects.iterator(chunk_size=batch_size):
+        sync_directory_entry(user)
+        processed += 1
+    return processed
+
+
+def _text_filter(prefix, text):
+    """Free-text match on names, title and bio - not indexed, so it only narrows the indexed filters"""
+    return (Q(**{f'{prefix}username__icontains': text}) |
+            Q(**{f'{prefix}first_name__icontains': text}) |
+            Q(**{f'{prefix}last_name__icontains': text}) |
+            Q(**{f'{prefix}title__icontains': text}) |
+            Q(**{f'{prefix}bio__icontains': text}))
+
+
+def search_directory(experience=None, skill=None, text=None, after=None, limit=DIRECTORY_PAGE_SIZE):
+    """
+    One page of listed developers, newest first. after is the previous page's
+    next_cursor. Returns (users, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a non-integer after or limit.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    if skill:
+        tag_id = DirectoryTag.objects.filter(slug=normalize_skill(skill)).values_list('pk', flat=True).first()
+        if tag_id is None:
+            return [], None
+        # Walk the (tag, is_listed[, experience_level], entry) index
+        queryset = DirectoryEntryTag.objects.filter(tag_id=tag_id, is_listed=True)
+        if experience:
+            queryset = queryset.filter(experience_level=experience)
+        if text:
+            queryset = queryset.filter(_text_filter('entry__user__', text))
+        column = 'entry_id'
+    else:
+        queryset = DirectoryEntry.objects.filter(is_listed=True)
+        if experience:
+            queryset = queryset.filter(experience_level=experience)
+        if text:
+            queryset = queryset.filter(_text_filter('user__', text))
+        column = 'user_id'
+
+    if after:
+        queryset = queryset.filter(**{f'{column}__lt': int(after)})
+
+    ids = list(queryset.order_by(f'-{column}').values_list(column, flat=True)[:limit + 1])
+    next_cursor = ids[limit - 1] if len(ids) > limit else None
+    ids = ids[:limit]
+
+    users = CustomUser.objects.in_bulk(ids)
+    return [users[pk] for pk in ids if pk in users], next_cursor
+
+
+def directory_facets(top=20):
+    """Counts of listed developers per experience level and skill"""
+    facets = cache.get(FACET_CACHE_KEY)
+    if facets is not None:
+        return facets
+
+    facets = {
+        'experience': list(
+            DirectoryEntry.objects.filter(is_listed=True).exclude(experience_level='')
+            .values('experience_level').annotate(count=Count('pk')).order_by('-count')
+            .values_list('experience_level', 'count')
+        ),
+        'skills': list(
+            DirectoryTag.objects.filter(entry_links__is_listed=True)
+            .annotate(count=Count('entry_links')).order_by('-count', 'name')[:top]
+            .values_list('name', 'count')
+        ),
+    }
+
+    cache.set(FACET_CACHE_KEY, facets, FACET_CACHE_TIMEOUT)
+    return facets
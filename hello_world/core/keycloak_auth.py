@@ -3,30 +3,147 @@
 
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django.conf import settings
-from keycloak import KeycloakOpenID, KeycloakAdmin
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from keycloak import KeycloakOpenID, KeycloakAdmin, KeycloakOpenIDConnection
 from keycloak.exceptions import KeycloakError
+import copy
+import hashlib
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
 import jwt
-from datetime import datetime
+import requests
+
+from .presence import presence
+from . import roles
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+# Keycloak user attributes copied onto blank profile fields
+PROFILE_ATTRIBUTES = ('bio', 'location', 'website')
+
+
+def assign_changed_fields(user, values):
+    """Set attributes that differ and return their names for save(update_fields=...)"""
+    changed = []
+    for field, value in values.items():
+        if getattr(user, field) != value:
+            setattr(user, field, value)
+            changed.append(field)
+    return changed
+
+
+# ============================================================================
+# CLIENT REGISTRY - One pooled OpenID client and admin session per process
+# ============================================================================
+
+class SharedAdminConnection(KeycloakOpenIDConnection):
+    """
+    Admin connection whose token is reused across calls and threads.
+    python-keycloak already refreshes at 90% of the token lifetime; the lock
+    makes sure concurrent threads trigger one refresh, not one each.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._refresh_lock = threading.Lock()
+    
+    def _refresh_if_required(self):
+        if datetime.now(tz=timezone.utc) >= self.expires_at:
+            with self._refresh_lock:
+                if datetime.now(tz=timezone.utc) >= self.expires_at:
+                    self.refresh_token()
+
+
+def _build_openid():
+    return KeycloakOpenID(
+        server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
+        client_id=settings.KEYCLOAK_CONFIG['CLIENT_ID'],
+        realm_name=settings.KEYCLOAK_CONFIG['REALM'],
+        client_secret_key=settings.KEYCLOAK_CONFIG['CLIENT_SECRET'],
+        verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
+    )
+
+
+def _build_admin():
+    connection = SharedAdminConnection(
+        server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
+        username=settings.KEYCLOAK_CONFIG['ADMIN_USERNAME'],
+        password=settings.KEYCLOAK_CONFIG['ADMIN_PASSWORD'],
+        realm_name=settings.KEYCLOAK_CONFIG['REALM'],
+        client_id=settings.KEYCLOAK_CONFIG['ADMIN_CLIENT_ID'],
+        verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
+    )
+    return KeycloakAdmin(connection=connection)
+
+
+class KeycloakClientRegistry:
+    """
+    Process-wide Keycloak clients. Each wraps a requests.Session, so
+    connections (and TLS sessions) are pooled instead of rebuilt per call.
+    After a fork the child drops inherited clients and builds its own.
+    """
+    
+    factories = {
+        'openid': _build_openid,
+        'admin': _build_admin,
+    }
+    
+    def __init__(self):
+        self.reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset)
+    
+    def reset(self):
+        # A fresh lock too: the parent's may have been held by another thread at fork time
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+    
+    def get(self, name):
+        if self._pid != os.getpid():
+            self.reset()
+        
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = self._clients[name] = self.factories[name]()
+        return client
+    
+    def openid(self):
+        return self.get('openid')
+    
+    def admin(self):
+        return self.get('admin')
+
+
+keycloak_clients = KeycloakClientRegistry()
+
+
+@receiver(setting_changed)
+def _reset_keycloak_clients(setting, **kwargs):
+    if setting == 'KEYCLOAK_CONFIG':
+        keycloak_clients.reset()
+
+
 class KeycloakAuthenticationBackend(BaseBackend):
     """
     Custom authentication backend for Keycloak integration
     """
     
     def __init__(self):
-        self.keycloak_openid = KeycloakOpenID(
-            server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
-            client_id=settings.KEYCLOAK_CONFIG['CLIENT_ID'],
-            realm_name=settings.KEYCLOAK_CONFIG['REALM'],
-            client_secret_key=settings.KEYCLOAK_CONFIG['CLIENT_SECRET'],
-            verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
-        )
+        self.keycloak_openid = keycloak_clients.openid()
     
     def authenticate(self, request, username=None, password=None, **kwargs):
         """
@@ -40,11 +157,20 @@ class KeycloakAuthenticationBackend(BaseBackend):
             token = self.keycloak_openid.token(username, password)
             
             if token:
-                # Decode user info from token
-                user_info = self.keycloak_openid.userinfo(token['access_token'])
+                # The access token carries the profile claims; verifying it locally
+                # saves the userinfo round trip
+                try:
+                    user_info = verify_access_token(token['access_token'])
+                except (jwt.InvalidTokenError, requests.RequestException):
+                    user_info = self.keycloak_openid.userinfo(token['access_token'])
                 
                 # Get or create user
                 user = self._get_or_create_user(user_info, token)
+                if user is None:
+                    return None
+                
+                # Seed the role cache so permission checks don't call Keycloak
+                roles.remember_claims(user, user_info)
                 
                 # Store token in session for later use
                 if hasattr(request, 'session'):
@@ -71,95 +197,261 @@ class KeycloakAuthenticationBackend(BaseBackend):
     
     def _get_or_create_user(self, user_info, token):
         """
-        Get or create Django user from Keycloak user info
+        Get or create Django user from Keycloak user info, or None when the
+        username is still linked to a different Keycloak account.
+        Read-mostly: one lookup, and a write only if an attribute actually changed.
+        Bulk changes arrive through the sync_keycloak command instead.
         """
         username = user_info.get('preferred_username')
         email = user_info.get('email', '')
-        first_name = user_info.get('given_name', '')
-        last_name = user_info.get('family_name', '')
+        keycloak_id = user_info.get('sub')
         
-        # Try to get existing user
-        user = None
-        if email:
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
-                pass
+        # Single query; the Keycloak id wins (it survives renames), then email, then username
+        lookup = Q(username=username) | Q(email=email) if email else Q(username=username)
+        if keycloak_id:
+            lookup |= Q(keycloak_id=keycloak_id)
+        found = list(User.objects.filter(lookup))
+        candidates = [c for c in found if not (keycloak_id and c.keycloak_id and c.keycloak_id != keycloak_id)]
+        user = (next((c for c in candidates if keycloak_id and c.keycloak_id == keycloak_id), None)
+                or next((c for c in candidates if email and c.email == email), None)
+                or next((c for c in candidates if c.username == username), None))
         
-        if not user:
-            try:
-                user = User.objects.get(username=username)
-            except User.DoesNotExist:
-                pass
+        if not user and any(c.username == username for c in found):
+            # The name still belongs to another Keycloak user whose rename the sync hasn't seen
+            logger.warning(f"Refusing login for Keycloak user {keycloak_id}: username {username!r} "
+                           f"is linked to another Keycloak account")
+            return None
         
         # Create new user if doesn't exist
         if not user:
             user = User.objects.create_user(
                 username=username,
                 email=email,
-                first_name=first_name,
-                last_name=last_name
+                first_name=user_info.get('given_name', ''),
+                last_name=user_info.get('family_name', ''),
+                keycloak_id=keycloak_id or None,
+                **self._profile_updates(None, user_info)
             )
             logger.info(f"Created new user from Keycloak: {username}")
         else:
-            # Update existing user info
-            user.email = email or user.email
-            user.first_name = first_name or user.first_name
-            user.last_name = last_name or user.last_name
-            user.save()
-            logger.info(f"Updated existing user from Keycloak: {username}")
+            # Update existing user info, writing only columns that actually changed
+            updates = {
+                'email': email or user.email,
+                'first_name': user_info.get('given_name') or user.first_name,
+                'last_name': user_info.get('family_name') or user.last_name,
+                'keycloak_id': keycloak_id or user.keycloak_id,
+                **self._profile_updates(user, user_info),
+            }
+            # Renamed in Keycloak: follow the new name unless another row still holds it
+            if username and user.username != username and not any(c.username == username for c in candidates):
+                updates['username'] = username
+            changed = assign_changed_fields(user, updates)
+            if changed:
+                user.save(update_fields=changed + ['updated_at'])
+                logger.info(f"Updated existing user from Keycloak: {username}")
         
-        # Update user profile with Keycloak data
-        self._update_user_profile(user, user_info)
+        # Activity goes through the presence tracker instead of a row write per login
+        presence.touch(user.pk)
         
         return user
     
-    def _update_user_profile(self, user, user_info):
+    def _profile_updates(self, user, user_info):
         """
-        Update user profile with additional Keycloak attributes
+        Profile fields from Keycloak attributes, only where the user left them blank
         """
-        try:
-            # Update bio if available
-            if hasattr(user, 'bio') and not user.bio:
-                bio = user_info.get('bio', '')
-                if bio:
-                    user.bio = bio
-            
-            # Update location if available
-            if hasattr(user, 'location') and not user.location:
-                location = user_info.get('location', '')
-                if location:
-                    user.location = location
-            
-            # Update website if available
-            if hasattr(user, 'website') and not user.website:
-                website = user_info.get('website', '')
-                if website:
-                    user.website = website
-            
-            # Set last active
-            if hasattr(user, 'last_active'):
-                user.last_active = datetime.now()
-            
-            user.save()
-            
-        except Exception as e:
-            logger.warning(f"Failed to update user profile: {e}")
+        updates = {}
+        for field in PROFILE_ATTRIBUTES:
+            if user is None or not getattr(user, field):
+                value = user_info.get(field, '')
+                if value:
+                    updates[field] = value
+        return updates
 
 
-class KeycloakTokenAuthenticationBackend(BaseBackend):
+# ============================================================================
+# LOCAL TOKEN VERIFICATION - Realm keys cached, no round trip per request
+# ============================================================================
+
+# Never refetch the JWKS more often than this, even for unknown key ids
+JWKS_MIN_REFETCH_INTERVAL = 30
+
+# How long a verified token maps straight to a user id
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_SIZE = 10000
+
+ALLOWED_ALGORITHMS = ['RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512', 'PS256']
+
+
+def get_realm_url():
+    return f"{settings.KEYCLOAK_CONFIG['SERVER_URL'].rstrip('/')}/realms/{settings.KEYCLOAK_CONFIG['REALM']}"
+
+
+class JWKSCache:
     """
-    Authentication backend for Keycloak JWT tokens
+    Realm signing keys by kid.
+    An unknown kid triggers a refetch (key rotation), rate limited so forged
+    kids cannot turn every request into a call to Keycloak.
     """
     
     def __init__(self):
-        self.keycloak_openid = KeycloakOpenID(
-            server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
-            client_id=settings.KEYCLOAK_CONFIG['CLIENT_ID'],
-            realm_name=settings.KEYCLOAK_CONFIG['REALM'],
-            client_secret_key=settings.KEYCLOAK_CONFIG['CLIENT_SECRET'],
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._fetched_at = 0
+    
+    def fetch(self):
+        response = requests.get(
+            f"{get_realm_url()}/protocol/openid-connect/certs",
+            timeout=5,
             verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
         )
+        response.raise_for_status()
+        
+        keys = {}
+        for data in response.json().get('keys', []):
+            if data.get('use', 'sig') != 'sig':
+                continue
+            try:
+                keys[data['kid']] = jwt.PyJWK(data)
+            except (KeyError, jwt.PyJWKError) as e:
+                logger.warning(f"Skipping unusable realm key {data.get('kid')}: {e}")
+        
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} Keycloak signing keys")
+    
+    def get_key(self, kid):
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._fetched_at >= JWKS_MIN_REFETCH_INTERVAL:
+                self.fetch()
+                key = self._keys.get(kid)
+        return key
+    
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = 0
+
+
+class TokenCache:
+    """
+    Bounded LRU of token digest -> (user, expires at). Hits hand out a copy
+    of the cached user, so a repeat token costs no query and requests never
+    share one mutable instance. The cached copy carries no role memo, so each
+    hit reads the role cache and sees invalidations.
+    """
+    
+    def __init__(self, max_size=TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+    
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token):
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return copy.copy(entry[0])
+    
+    def set(self, token, user, expires_at):
+        digest = self._digest(token)
+        user = copy.copy(user)
+        roles.forget_memo(user)
+        with self._lock:
+            self._entries[digest] = (user, min(expires_at, time.time() + TOKEN_CACHE_TTL))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Module level: Django builds a new backend instance for every authenticate()
+jwks_cache = JWKSCache()
+token_cache = TokenCache()
+
+
+def match_token_user(claims):
+    """
+    The active local user for verified claims: by keycloak_id (the token's
+    sub) first, then by username for a row not yet linked, which is linked
+    on the way. A username held by another Keycloak user's row never matches.
+    """
+    active = User.objects.filter(is_active=True)
+    keycloak_id = claims.get('sub')
+    if keycloak_id:
+        user = active.filter(keycloak_id=keycloak_id).first()
+        if user is not None:
+            return user
+    
+    user = active.filter(username=claims.get('preferred_username')).first()
+    if user is None or not keycloak_id:
+        return user
+    if user.keycloak_id:
+        # Linked to someone else: the name changed hands and the sync hasn't caught up
+        return None
+    user.keycloak_id = keycloak_id
+    user.save(update_fields=['keycloak_id', 'updated_at'])
+    return user
+
+
+def verify_access_token(access_token):
+    """
+    Verify a Keycloak access token offline: signature, expiry, issuer and audience.
+    Stock Keycloak access tokens carry aud "account" and name the client in azp,
+    so without an explicit AUDIENCE the token must have been issued to CLIENT_ID.
+    Returns the claims, or raises jwt.InvalidTokenError.
+    """
+    header = jwt.get_unverified_header(access_token)
+    if header.get('alg') not in ALLOWED_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"Algorithm {header.get('alg')} not allowed")
+    
+    key = jwks_cache.get_key(header.get('kid'))
+    if key is None:
+        raise jwt.InvalidTokenError(f"Unknown signing key {header.get('kid')}")
+    # The algorithm comes from the realm key, never from the token's own header
+    if header['alg'] != key.algorithm_name:
+        raise jwt.InvalidAlgorithmError(f"Algorithm {header['alg']} does not match key {header.get('kid')}")
+    
+    audience = settings.KEYCLOAK_CONFIG.get('AUDIENCE')
+    try:
+        claims = jwt.decode(
+            access_token,
+            key.key,
+            algorithms=[key.algorithm_name],
+            audience=audience or None,
+            issuer=get_realm_url(),
+            options={'require': ['exp', 'iat', 'iss'], 'verify_aud': bool(audience)},
+            leeway=10
+        )
+    except (jwt.PyJWKError, TypeError, ValueError) as e:
+        # A key PyJWT can't use for this token is a bad token, not a server error
+        raise jwt.InvalidTokenError(f"Token cannot be verified with key {header.get('kid')}: {e}") from e
+    if not audience and claims.get('azp') != settings.KEYCLOAK_CONFIG['CLIENT_ID']:
+        raise jwt.InvalidAudienceError(f"Token was issued to {claims.get('azp')!r}, not this client")
+    return claims
+
+
+class KeycloakTokenAuthenticationBackend(BaseBackend):
+    """
+    Authentication backend for Keycloak JWT tokens.
+    Tokens are verified locally against the cached realm JWKS.
+    """
     
     def authenticate(self, request, access_token=None, **kwargs):
         """
@@ -167,32 +459,35 @@ class KeycloakTokenAuthenticationBackend(BaseBackend):
         """
         if not access_token:
             # Try to get token from Authorization header
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+            auth_header = request.META.get('HTTP_AUTHORIZATION', '') if request else ''
             if auth_header.startswith('Bearer '):
                 access_token = auth_header[7:]
             else:
                 return None
         
+        user = token_cache.get(access_token)
+        if user is not None:
+            return user
+        
         try:
-            # Validate token with Keycloak
-            user_info = self.keycloak_openid.userinfo(access_token)
-            
-            if user_info:
-                # Get or create user
-                username = user_info.get('preferred_username')
-                try:
-                    user = User.objects.get(username=username)
-                    return user
-                except User.DoesNotExist:
-                    logger.warning(f"User {username} not found in local database")
-                    return None
-                    
-        except KeycloakError as e:
+            claims = verify_access_token(access_token)
+        except jwt.InvalidTokenError as e:
             logger.warning(f"Token validation failed: {e}")
             return None
-        except Exception as e:
-            logger.error(f"Unexpected error during token authentication: {e}")
+        except requests.RequestException as e:
+            logger.error(f"Could not load Keycloak signing keys: {e}")
+            return None
+        
+        username = claims.get('preferred_username')
+        # Users the sync deactivated keep valid tokens until they expire; refuse them here
+        user = match_token_user(claims)
+        if user is None:
+            logger.warning(f"User {username} not found in local database or inactive")
             return None
+        
+        roles.remember_claims(user, claims)
+        token_cache.set(access_token, user, claims['exp'])
+        return user
     
     def get_user(self, user_id):
         """
@@ -206,32 +501,17 @@ class KeycloakTokenAuthenticationBackend(BaseBackend):
 
 def get_keycloak_admin():
     """
-    Get Keycloak admin client
+    Get the shared Keycloak admin client (admin token cached and refreshed)
     """
-    return KeycloakAdmin(
-        server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
-        username=settings.KEYCLOAK_CONFIG['ADMIN_USERNAME'],
-        password=settings.KEYCLOAK_CONFIG['ADMIN_PASSWORD'],
-        realm_name=settings.KEYCLOAK_CONFIG['REALM'],
-        client_id=settings.KEYCLOAK_CONFIG['ADMIN_CLIENT_ID'],
-        verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
-    )
+    return keycloak_clients.admin()
 
 
 def refresh_keycloak_token(refresh_token):
     """
     Refresh Keycloak access token
     """
-    keycloak_openid = KeycloakOpenID(
-        server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
-        client_id=settings.KEYCLOAK_CONFIG['CLIENT_ID'],
-        realm_name=settings.KEYCLOAK_CONFIG['REALM'],
-        client_secret_key=settings.KEYCLOAK_CONFIG['CLIENT_SECRET'],
-        verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
-    )
-    
     try:
-        return keycloak_openid.refresh_token(refresh_token)
+        return keycloak_clients.openid().refresh_token(refresh_token)
     except KeycloakError as e:
         logger.warning(f"Token refresh failed: {e}")
         return None
@@ -241,16 +521,8 @@ def logout_keycloak_user(refresh_token):
     """
     Logout user from Keycloak
     """
-    keycloak_openid = KeycloakOpenID(
-        server_url=settings.KEYCLOAK_CONFIG['SERVER_URL'],
-        client_id=settings.KEYCLOAK_CONFIG['CLIENT_ID'],
-        realm_name=settings.KEYCLOAK_CONFIG['REALM'],
-        client_secret_key=settings.KEYCLOAK_CONFIG['CLIENT_SECRET'],
-        verify=settings.KEYCLOAK_CONFIG['VERIFY_SSL']
-    )
-    
     try:
-        return keycloak_openid.logout(refresh_token)
+        return keycloak_clients.openid().logout(refresh_token)
     except KeycloakError as e:
         logger.warning(f"Logout failed: {e}")
         return False
@@ -304,6 +576,7 @@ def assign_keycloak_role(user_id, role_name):
         admin = get_keycloak_admin()
         role = admin.get_realm_role(role_name)
         admin.assign_realm_roles(user_id, [role])
+        roles.invalidate_username(admin.get_user(user_id)['username'])
         logger.info(f"Assigned role {role_name} to user {user_id}")
         return True
     except KeycloakError as e:
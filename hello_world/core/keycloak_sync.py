@@ -0,0 +1,386 @@
+# 👑 Keycloak Sync - The Royal Census
+# Incremental Keycloak -> Django user and group sync, applied in bulk.
+# Changed users, deletions and group membership changes are found through
+# Keycloak's admin and login events since the stored watermark, so realm event
+# storage must be enabled for incremental runs; a full run pages through every
+# user and group and is the periodic reconcile.
+
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.utils import timezone
+from keycloak.exceptions import KeycloakError, KeycloakGetError
+
+from .keycloak_auth import PROFILE_ATTRIBUTES, assign_changed_fields, get_keycloak_admin
+from .models import SyncState
+from .signals import welcome_new_users
+from . import directory, roles, search
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+SYNC_STATE_NAME = 'keycloak_users'
+PAGE_SIZE = 100
+
+# Self-service changes show up as login events, admin changes as admin events
+USER_EVENT_TYPES = ['REGISTER', 'UPDATE_PROFILE', 'UPDATE_EMAIL']
+ADMIN_OPERATION_TYPES = ['CREATE', 'UPDATE', 'DELETE']
+ADMIN_RESOURCE_TYPES = ['USER', 'REALM_ROLE_MAPPING', 'CLIENT_ROLE_MAPPING', 'GROUP_MEMBERSHIP']
+
+
+def user_fields(representation):
+    """Django user fields from a Keycloak UserRepresentation"""
+    attributes = representation.get('attributes') or {}
+    fields = {
+        'email': representation.get('email') or '',
+        'first_name': representation.get('firstName') or '',
+        'last_name': representation.get('lastName') or '',
+        'is_active': representation.get('enabled', True),
+    }
+    if representation.get('id'):
+        fields['keycloak_id'] = representation['id']
+    for name in PROFILE_ATTRIBUTES:
+        values = attributes.get(name)
+        if values:
+            fields[name] = values[0]
+    return fields
+
+
+class KeycloakUserSync:
+    """Pages through Keycloak and upserts users and group memberships in bulk"""
+
+    def __init__(self, admin=None, page_size=PAGE_SIZE):
+        self.admin = admin or get_keycloak_admin()
+        self.page_size = page_size
+
+    # ------------------------------------------------------------------
+    # Paging helpers
+    # ------------------------------------------------------------------
+
+    def _pages(self, fetch, query=None):
+        first = 0
+        while True:
+            page = fetch({**(query or {}), 'first': first, 'max': self.page_size})
+            yield page
+            if len(page) < self.page_size:
+                return
+            first += self.page_size
+
+    def iter_all_users(self):
+        for page in self._pages(self.admin.get_users, {'briefRepresentation': False}):
+            yield page
+
+    def changes_since(self, since_ms):
+        """
+        Keycloak changes after since_ms: ids of users to refetch, ids of users
+        deleted, {user id: group ids joined or left} and the newest event time
+        seen. Keycloak filters events by day, so the exact cut is made here.
+        """
+        date_from = datetime.fromtimestamp(since_ms / 1000, tz=dt_timezone.utc).strftime('%Y-%m-%d')
+        user_ids, deleted, memberships = set(), set(), {}
+        newest = since_ms
+
+        for page in self._pages(self.admin.get_admin_events, {
+            'dateFrom': date_from,
+            'resourceTypes': ADMIN_RESOURCE_TYPES,
+            'operationTypes': ADMIN_OPERATION_TYPES,
+        }):
+            for event in page:
+                if event.get('time', 0) <= since_ms:
+                    continue
+                newest = max(newest, event['time'])
+                path = event.get('resourcePath', '').split('/')
+                if path[0] != 'users' or len(path) < 2:
+                    continue
+                if event.get('resourceType') == 'GROUP_MEMBERSHIP' and len(path) >= 4:
+                    # users/<user id>/groups/<group id>
+                    memberships.setdefault(path[1], set()).add(path[3])
+                elif event.get('resourceType') == 'USER' and event.get('operationType') == 'DELETE':
+                    deleted.add(path[1])
+                else:
+                    user_ids.add(path[1])
+
+        for page in self._pages(self.admin.get_events, {'dateFrom': date_from, 'type': USER_EVENT_TYPES}):
+            for event in page:
+                if event.get('time', 0) > since_ms and event.get('userId'):
+                    user_ids.add(event['userId'])
+                    newest = max(newest, event['time'])
+
+        user_ids -= deleted
+        for user_id in deleted:
+            memberships.pop(user_id, None)
+        return user_ids, deleted, memberships, newest
+
+    def fetch_users(self, user_ids):
+        """Representations for user_ids, and the ids Keycloak no longer has"""
+        users, missing = [], set()
+        for user_id in user_ids:
+            try:
+                users.append(self.admin.get_user(user_id))
+            except KeycloakGetError as e:
+                # Deleted since the event was recorded
+                logger.info(f"Keycloak user {user_id} is gone: {e}")
+                missing.add(user_id)
+        return users, missing
+
+    # ------------------------------------------------------------------
+    # Bulk upserts
+    # ------------------------------------------------------------------
+
+    def upsert_users(self, representations):
+        """
+        Create missing users and update changed ones with bulk queries.
+        Returns (created, updated). Users are matched on keycloak_id first, so
+        a rename in Keycloak renames the local user; unlinked users fall back to
+        username. Bulk writes skip model signals, so the search index and the
+        new-user rows are handled here.
+        """
+        rows = [{**user_fields(rep), 'username': rep['username']} for rep in representations if rep.get('username')]
+        if not rows:
+            return 0, 0
+
+        by_keycloak_id = User.objects.in_bulk([row['keycloak_id'] for row in rows if 'keycloak_id' in row],
+                                              field_name='keycloak_id')
+        by_username = User.objects.in_bulk([row['username'] for row in rows], field_name='username')
+        # Names given up by users renamed in this batch are free for new users
+        vacated = {
+            by_keycloak_id[row['keycloak_id']].username for row in rows
+            if row.get('keycloak_id') in by_keycloak_id and by_keycloak_id[row['keycloak_id']].username != row['username']
+        }
+        now = timezone.now()
+        to_create, to_update, changed_fields = [], [], set()
+
+        for fields in rows:
+            keycloak_id = fields.get('keycloak_id')
+            user = by_keycloak_id.get(keycloak_id)
+            if user is None and fields['username'] not in vacated:
+                user = by_username.get(fields['username'])
+                if user is not None and user.keycloak_id and user.keycloak_id != keycloak_id:
+                    # The name still belongs to another Keycloak user whose rename
+                    # hasn't been synced; the next full pass brings both in line
+                    logger.warning(f"Skipping Keycloak user {keycloak_id}: username {fields['username']!r} "
+                                   f"is still linked to {user.keycloak_id}")
+                    continue
+            if user is None:
+                user = User(**fields)
+                user.set_unusable_password()
+                to_create.append(user)
+                continue
+
+            changed = assign_changed_fields(user, fields)
+            if changed:
+                user.updated_at = now
+                to_update.append(user)
+                changed_fields.update(changed)
+
+        with transaction.atomic():
+            # Updates first, so a name freed by a rename can be taken by a new user
+            if to_update:
+                User.objects.bulk_update(to_update, sorted(changed_fields | {'updated_at'}),
+                                         batch_size=self.page_size)
+            if to_create:
+                User.objects.bulk_create(to_create, batch_size=self.page_size)
+                if to_create[0].pk is None:
+                    # Backends that don't return ids from bulk_create
+                    to_create = list(User.objects.filter(username__in=[user.username for user in to_create]))
+                welcome_new_users(to_create)
+
+        for user in to_create + to_update:
+            search.index_instance(user)
+        # bulk_create/bulk_update skip post_save, so the directory is kept here
+        refiled = to_create + to_update if directory.DIRECTORY_FIELDS & changed_fields else to_create
+        for user in refiled:
+            directory.sync_directory_entry(user)
+
+        return len(to_create), len(to_update)
+
+    def deactivate_users(self, keycloak_ids):
+        """Deactivate local users whose Keycloak account was deleted. Returns users deactivated."""
+        users = list(User.objects.filter(keycloak_id__in=list(keycloak_ids), is_active=True))
+        if not users:
+            return 0
+
+        User.objects.filter(pk__in=[user.pk for user in users]).update(is_active=False, updated_at=timezone.now())
+        for user in users:
+            user.is_active = False
+            search.remove_instance(user)
+            directory.sync_directory_entry(user)
+        roles.invalidate_many([user.pk for user in users])
+        logger.info(f"Deactivated {len(users)} users deleted in Keycloak")
+        return len(users)
+
+    def _django_groups(self, names):
+        """{name: Group} for names, creating the ones that don't exist yet"""
+        django_groups = Group.objects.in_bulk(list(names), field_name='name')
+        missing = [Group(name=name) for name in names if name not in django_groups]
+        if missing:
+            Group.objects.bulk_create(missing, ignore_conflicts=True)
+            django_groups = Group.objects.in_bulk(list(names), field_name='name')
+        return django_groups
+
+    def sync_groups(self):
+        """
+        Mirror Keycloak group membership onto Django groups of the same name.
+        Only memberships of Keycloak-backed groups are added or removed.
+        Reads every group's members, so it is the full-run reconcile.
+        """
+        groups = []
+        pending = list(self.admin.get_groups({'briefRepresentation': True}, full_hierarchy=True))
+        while pending:
+            group = pending.pop()
+            groups.append(group)
+            pending.extend(group.get('subGroups') or [])
+
+        if not groups:
+            return 0
+
+        django_groups = self._django_groups({group['name'] for group in groups})
+
+        wanted = set()
+        for group in groups:
+            usernames = []
+            for page in self._pages(lambda query, group_id=group['id']: self.admin.get_group_members(group_id, query),
+                                    {'briefRepresentation': True}):
+                usernames.extend(member['username'] for member in page)
+            user_ids = User.objects.filter(username__in=usernames).values_list('pk', flat=True)
+            group_id = django_groups[group['name']].pk
+            wanted.update((user_id, group_id) for user_id in user_ids)
+
+        Membership = User.groups.through
+        user_column = f'{User.groups.field.m2m_field_name()}_id'
+        group_ids = [group.pk for group in django_groups.values()]
+        current = set(Membership.objects.filter(group_id__in=group_ids).values_list(user_column, 'group_id'))
+        return self._apply_memberships(wanted, current)
+
+    def sync_user_groups(self, memberships):
+        """
+        Reconcile group membership for just the given Keycloak users, from
+        {user id: group ids joined or left}. Each user's current Keycloak groups
+        plus the groups named in its events are the ones considered for it.
+        """
+        group_names = {}
+        wanted_names, managed_names = {}, {}
+        for keycloak_id, event_group_ids in memberships.items():
+            try:
+                current = self.admin.get_user_groups(keycloak_id)
+            except KeycloakGetError as e:
+                logger.info(f"Skipping groups of Keycloak user {keycloak_id}: {e}")
+                continue
+            group_names.update((group['id'], group['name']) for group in current)
+            for group_id in event_group_ids - group_names.keys():
+                try:
+                    group_names[group_id] = self.admin.get_group(group_id)['name']
+                except KeycloakGetError:
+                    # Group deleted since; nothing to mirror
+                    group_names[group_id] = None
+            wanted_names[keycloak_id] = {group['name'] for group in current}
+            managed_names[keycloak_id] = wanted_names[keycloak_id] | {
+                group_names[group_id] for group_id in event_group_ids if group_names[group_id]
+            }
+
+        users = dict(User.objects.filter(keycloak_id__in=list(managed_names)).values_list('keycloak_id', 'pk'))
+        managed_names = {keycloak_id: names for keycloak_id, names in managed_names.items()
+                         if keycloak_id in users and names}
+        if not managed_names:
+            return 0
+
+        django_groups = self._django_groups(set().union(*managed_names.values()))
+        wanted, managed = set(), set()
+        for keycloak_id, names in managed_names.items():
+            user_id = users[keycloak_id]
+            wanted.update((user_id, django_groups[name].pk) for name in wanted_names[keycloak_id])
+            managed.update((user_id, django_groups[name].pk) for name in names)
+
+        Membership = User.groups.through
+        user_column = f'{User.groups.field.m2m_field_name()}_id'
+        current = set(Membership.objects.filter(**{f'{user_column}__in': list(users.values())})
+                      .values_list(user_column, 'group_id')) & managed
+        return self._apply_memberships(wanted, current)
+
+    def _apply_memberships(self, wanted, current):
+        """Add wanted - current and remove current - wanted (user id, group id) pairs"""
+        Membership = User.groups.through
+        user_column = f'{User.groups.field.m2m_field_name()}_id'
+
+        stale_by_group = {}
+        for user_id, group_id in current - wanted:
+            stale_by_group.setdefault(group_id, []).append(user_id)
+
+        with transaction.atomic():
+            for group_id, user_ids in stale_by_group.items():
+                Membership.objects.filter(group_id=group_id, **{f'{user_column}__in': user_ids}).delete()
+            Membership.objects.bulk_create(
+                [Membership(**{user_column: user_id, 'group_id': group_id}) for user_id, group_id in wanted - current],
+                ignore_conflicts=True,
+                batch_size=1000
+            )
+
+        roles.invalidate_many({user_id for user_id, _ in wanted ^ current})
+
+        return len(wanted ^ current)
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+
+    def run(self, full=False):
+        """Run one sync pass and advance the watermark. Returns stats."""
+        state, _ = SyncState.objects.get_or_create(name=SYNC_STATE_NAME)
+        started_ms = int(time.time() * 1000)
+        stats = {'mode': 'full' if full or not state.watermark else 'incremental', 'created': 0, 'updated': 0}
+
+        if stats['mode'] == 'full':
+            newest = started_ms
+            seen = set()
+            for page in self.iter_all_users():
+                created, updated = self.upsert_users(page)
+                stats['created'] += created
+                stats['updated'] += updated
+                seen.update(rep['id'] for rep in page if rep.get('id'))
+
+            # Linked users Keycloak no longer lists were deleted there
+            linked = set(User.objects.filter(keycloak_id__isnull=False, is_active=True)
+                         .values_list('keycloak_id', flat=True))
+            stats['deactivated'] = self.deactivate_users(linked - seen)
+            stats['memberships_changed'] = self.sync_groups()
+        else:
+            user_ids, deleted, memberships, newest = self.changes_since(state.watermark)
+            stats['seen'] = len(user_ids)
+            ids = list(user_ids)
+            for i in range(0, len(ids), self.page_size):
+                representations, missing = self.fetch_users(ids[i:i + self.page_size])
+                deleted |= missing
+                created, updated = self.upsert_users(representations)
+                stats['created'] += created
+                stats['updated'] += updated
+
+                # Role mappings aren't in the representation; make their roles reload
+                usernames = [rep['username'] for rep in representations if rep.get('username')]
+                roles.invalidate_many(User.objects.filter(username__in=usernames).values_list('pk', flat=True))
+
+                # Changed users are reconciled too: a new one may have joined default groups without an event
+                for rep in representations:
+                    memberships.setdefault(rep['id'], set())
+
+            stats['deactivated'] = self.deactivate_users(deleted)
+            stats['memberships_changed'] = self.sync_user_groups(memberships)
+
+        state.watermark = newest
+        state.last_run_at = timezone.now()
+        state.last_stats = stats
+        state.save()
+
+        logger.info(f"Keycloak sync finished: {stats}")
+        return stats
+
+
+def sync_keycloak_users(full=False, page_size=PAGE_SIZE):
+    try:
+        return KeycloakUserSync(page_size=page_size).run(full=full)
+    except KeycloakError as e:
+        logger.error(f"Keycloak sync failed: {e}")
+        raise
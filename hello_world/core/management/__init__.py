@@ -0,0 +1 @@
+# Management module init
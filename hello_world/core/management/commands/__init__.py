@@ -0,0 +1 @@
+# Commands module init
@@ -0,0 +1,105 @@
+"""
+Full-text search latency benchmark on synthetic documents
+
+Runs in a separate benchmark database (the test database, created and
+migrated on the fly), so synthetic rows never reach the live search table.
+"""
+
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from hello_world.core.models import SearchDocument
+from hello_world.core.search import get_search_backend, parse_terms
+
+BENCHMARK_KIND = 'benchmark'
+
+VOCABULARY = (
+    'python django react vue angular webgl canvas shader render engine realtime '
+    'socket redis postgres sqlite cache queue worker async stream pipeline model '
+    'neural vision speech agent chat memory search index rank vector graph tree '
+    'deploy docker kubernetes cloud edge mobile desktop game physics audio video '
+    'crypto wallet ledger token auth oauth keycloak session profile dashboard'
+).split()
+
+# Common, mid-frequency, rare, prefix and multi-term queries plus a miss
+QUERIES = ['python', 'django', 'keycloak', 'kube', 'render engine', 'realtime canvas shader', 'zzz']
+
+SYNTHETIC_WORDS = 20_000
+
+
+class Command(BaseCommand):
+    help = 'Measure full-text search query latency at a given index size'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic documents to index')
+        parser.add_argument('--repeat', type=int, default=50, help='Runs per query')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the benchmark database (and its documents) for the next run')
+    
+    def handle(self, *args, **options):
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # On disk like the real database, not SQLite's in-memory test default
+            test_settings['NAME'] = f"{connection.settings_dict['NAME']}.search_benchmark"
+        
+        live_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keep'])
+        self.stdout.write(f"🧪 Benchmarking in {connection.settings_dict['NAME']}")
+        try:
+            self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(live_name, verbosity=0, keepdb=options['keep'])
+    
+    def benchmark(self, options):
+        backend = get_search_backend()
+        
+        # The benchmark database holds only synthetic documents
+        existing = SearchDocument.objects.filter(kind=BENCHMARK_KIND).count()
+        if existing < options['rows']:
+            self.populate(existing, options['rows'])
+        
+        self.stdout.write(f"{'query':<26}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'hits':>8}")
+        for query in QUERIES:
+            terms = parse_terms(query)
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                rows = backend.search(terms, [], 20, 0)
+                timings.append((time.perf_counter() - started) * 1000)
+            
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f"{query:<26}{statistics.median(timings):>10.2f}{p95:>10.2f}{timings[-1]:>10.2f}{len(rows):>8}"
+            )
+    
+    def populate(self, start, rows, batch_size=10_000):
+        rng = random.Random(42)
+        
+        # Zipf-distributed vocabulary so term frequencies look like real text
+        words = VOCABULARY + [f'term{n}' for n in range(SYNTHETIC_WORDS)]
+        rng.shuffle(words)
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+        
+        self.stdout.write(f'📚 Indexing {rows - start} synthetic documents...')
+        started = time.perf_counter()
+        
+        for offset in range(start, rows, batch_size):
+            batch = [
+                SearchDocument(
+                    kind=BENCHMARK_KIND,
+                    object_id=str(n),
+                    title=' '.join(rng.choices(words, cum_weights=cum_weights, k=3)),
+                    body=' '.join(rng.choices(words, cum_weights=cum_weights, k=40)),
+                )
+                for n in range(offset, min(offset + batch_size, rows))
+            ]
+            with transaction.atomic():
+                SearchDocument.objects.bulk_create(batch)
+        
+        self.stdout.write(f'   done in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,74 @@
+"""
+Compare session table writes per request between session engines
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+# (label, engine, save every request)
+ENGINES = [
+    ('db, save every request', 'django.contrib.sessions.backends.db', True),
+    ('cached_db, save every request', 'django.contrib.sessions.backends.cached_db', True),
+    ('glorious (dirty only)', 'hello_world.core.sessions', False),
+]
+
+
+class Command(BaseCommand):
+    help = 'Count session writes for a stream of mostly read-only requests'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per engine')
+        parser.add_argument('--write-every', type=int, default=50,
+                            help='Every Nth request modifies the session')
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'engine':<32}{'writes':>8}{'writes/req':>12}{'ms/req':>10}")
+        for label, engine, save_every in ENGINES:
+            with override_settings(SESSION_ENGINE=engine, SESSION_SAVE_EVERY_REQUEST=save_every):
+                writes, elapsed = self.run_engine(options['requests'], options['write_every'])
+            self.stdout.write(
+                f"{label:<32}{writes:>8}{writes / options['requests']:>12.3f}"
+                f"{elapsed * 1000 / options['requests']:>10.3f}"
+            )
+    
+    def run_engine(self, total, write_every):
+        factory = RequestFactory()
+        counter = {'n': 0}
+
+        def view(request):
+            counter['n'] += 1
+            request.session.get('_auth_user_id')  # what AuthenticationMiddleware does
+            if counter['n'] % write_every == 0:
+                request.session['last_action'] = counter['n']
+            return HttpResponse('ok')
+
+        middleware = SessionMiddleware(view)
+
+        # Log in once to get a session cookie
+        request = factory.get('/')
+        middleware.process_request(request)
+        request.session['_auth_user_id'] = '1'
+        session_key = middleware.process_response(request, HttpResponse('ok')).cookies[
+            settings.SESSION_COOKIE_NAME].value
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(total):
+                request = factory.get('/')
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+                middleware(request)
+            elapsed = time.perf_counter() - started
+
+        writes = sum(
+            1 for query in queries.captured_queries
+            if 'django_session' in query['sql'] and query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+        )
+        return writes, elapsed
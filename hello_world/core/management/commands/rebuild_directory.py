@@ -0,0 +1,23 @@
+"""
+Rebuild the developer directory from the user table
+"""
+
+from django.core.management.base import BaseCommand
+
+from hello_world.core.directory import rebuild_directory
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the developer directory entries and skill tags'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users read per query',
+        )
+    
+    def handle(self, *args, **options):
+        processed = rebuild_directory(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'🧭 Filed {processed} developers in the directory'))
@@ -0,0 +1,31 @@
+"""
+Rebuild the full-text search index from the source tables
+"""
+
+from django.core.management.base import BaseCommand
+
+from hello_world.core.search import SEARCH_REGISTRY, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for projects, users and messages'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            choices=list(SEARCH_REGISTRY),
+            help='Only rebuild this kind (can be repeated)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Documents written per bulk insert',
+        )
+    
+    def handle(self, *args, **options):
+        counts = rebuild_index(kinds=options['kind'], batch_size=options['batch_size'])
+        
+        for kind, indexed in counts.items():
+            self.stdout.write(self.style.SUCCESS(f'🔍 Indexed {indexed} {kind} documents'))
@@ -0,0 +1,45 @@
+"""
+Sync users and group memberships from Keycloak in bulk
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from keycloak.exceptions import KeycloakError
+
+from hello_world.core.keycloak_sync import PAGE_SIZE, sync_keycloak_users
+
+
+class Command(BaseCommand):
+    help = 'Upsert Keycloak users and groups changed since the last run (run with --loop as a worker)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Page through every user, not just changes')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Users per Keycloak page')
+        parser.add_argument('--loop', action='store_true', help='Keep running as a sync worker')
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between passes with --loop')
+    
+    def handle(self, *args, **options):
+        full = options['full']
+        
+        while True:
+            try:
+                stats = sync_keycloak_users(full=full, page_size=options['page_size'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"🔄 Keycloak sync ({stats['mode']}): {stats['created']} created, "
+                    f"{stats['updated']} updated, {stats['deactivated']} deactivated, "
+                    f"{stats['memberships_changed']} memberships changed"
+                ))
+            except (KeycloakError, DatabaseError) as e:
+                # A worker outlives a failed pass; the watermark only moves on success
+                if not options['loop']:
+                    raise
+                self.stderr.write(self.style.ERROR(f'❌ Keycloak sync failed: {e}'))
+            
+            if not options['loop']:
+                return
+            
+            # Later passes in a worker are incremental
+            full = False
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+# 👑 Core Middleware - The Royal Gatekeepers
+
+from .presence import presence
+
+
+class PresenceMiddleware:
+    """
+    Record that the signed-in user is active.
+    Runs after AuthenticationMiddleware; costs a cache write, not a row write.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            presence.touch(user.pk)
+        return self.get_response(request)
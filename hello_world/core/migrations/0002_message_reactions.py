@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_json_reactions(apps, schema_editor):
+    """Move {emoji: [user_id, ...]} blobs into MessageReaction rows"""
+    ChatMessage = apps.get_model('core', 'ChatMessage')
+    MessageReaction = apps.get_model('core', 'MessageReaction')
+
+    batch = []
+    for message_id, reactions in ChatMessage.objects.values_list('id', 'reactions').iterator():
+        for emoji, user_ids in (reactions or {}).items():
+            for user_id in set(user_ids):
+                batch.append(MessageReaction(message_id=message_id, user_id=user_id, emoji=emoji[:32]))
+
+        if len(batch) >= 1000:
+            MessageReaction.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    if batch:
+        MessageReaction.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageReaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emoji', models.CharField(help_text='Reaction emoji', max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_set', to='core.chatmessage')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_reactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'glorious_message_reactions',
+                'indexes': [models.Index(fields=['message', 'emoji'], name='glorious_me_message_db71ec_idx')],
+                'constraints': [models.UniqueConstraint(fields=('message', 'user', 'emoji'), name='unique_message_user_emoji')],
+            },
+        ),
+        migrations.RunPython(copy_json_reactions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='chatmessage',
+            name='reactions',
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE glorious_search_fts USING fts5(
+        kind, title, body,
+        content='glorious_search_documents', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER glorious_search_ai AFTER INSERT ON glorious_search_documents BEGIN
+        INSERT INTO glorious_search_fts(rowid, kind, title, body)
+        VALUES (new.id, new.kind, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER glorious_search_ad AFTER DELETE ON glorious_search_documents BEGIN
+        INSERT INTO glorious_search_fts(glorious_search_fts, rowid, kind, title, body)
+        VALUES ('delete', old.id, old.kind, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER glorious_search_au AFTER UPDATE ON glorious_search_documents BEGIN
+        INSERT INTO glorious_search_fts(glorious_search_fts, rowid, kind, title, body)
+        VALUES ('delete', old.id, old.kind, old.title, old.body);
+        INSERT INTO glorious_search_fts(rowid, kind, title, body)
+        VALUES (new.id, new.kind, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS glorious_search_au",
+    "DROP TRIGGER IF EXISTS glorious_search_ad",
+    "DROP TRIGGER IF EXISTS glorious_search_ai",
+    "DROP TABLE IF EXISTS glorious_search_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE glorious_search_documents ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX glorious_search_vector_gin ON glorious_search_documents USING gin (search_vector)",
+    "CREATE INDEX glorious_search_kind ON glorious_search_documents (kind)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS glorious_search_kind",
+    "DROP INDEX IF EXISTS glorious_search_vector_gin",
+    "ALTER TABLE glorious_search_documents DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run_for_vendor(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+create_fulltext_index = _run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+drop_fulltext_index = _run_for_vendor({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_message_reactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('user', 'User'), ('message', 'Chat Message')], max_length=20)),
+                ('object_id', models.CharField(max_length=64)),
+                ('title', models.CharField(blank=True, max_length=300)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'glorious_search_documents',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_search_documents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_active',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Persisted by the presence tracker'),
+        ),
+    ]
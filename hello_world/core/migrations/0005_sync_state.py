@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_presence_last_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('watermark', models.BigIntegerField(default=0, help_text='Epoch milliseconds of the newest change applied')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_stats', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'db_table': 'glorious_sync_state',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_sync_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='keycloak_id',
+            field=models.CharField(blank=True, help_text='Keycloak user id, set by the Keycloak sync', max_length=64, null=True, unique=True),
+        ),
+    ]
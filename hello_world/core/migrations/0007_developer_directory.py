@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_customuser_keycloak_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectoryEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='directory_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('is_listed', models.BooleanField(default=True, help_text='Active developer')),
+                ('experience_level', models.CharField(blank=True, default='', max_length=20)),
+            ],
+            options={
+                'db_table': 'glorious_directory_entries',
+            },
+        ),
+        migrations.CreateModel(
+            name='DirectoryTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.CharField(help_text='Normalized lookup key', max_length=100, unique=True)),
+                ('name', models.CharField(help_text='Display spelling', max_length=100)),
+            ],
+            options={
+                'db_table': 'glorious_directory_tags',
+            },
+        ),
+        migrations.CreateModel(
+            name='DirectoryEntryTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_listed', models.BooleanField(default=True)),
+                ('experience_level', models.CharField(blank=True, default='', max_length=20)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='core.directoryentry')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entry_links', to='core.directorytag')),
+            ],
+            options={
+                'db_table': 'glorious_directory_entry_tags',
+            },
+        ),
+        migrations.AddField(
+            model_name='directoryentry',
+            name='tags',
+            field=models.ManyToManyField(related_name='entries', through='core.DirectoryEntryTag', to='core.directorytag'),
+        ),
+        migrations.AddIndex(
+            model_name='directoryentrytag',
+            index=models.Index(fields=['tag', 'is_listed', 'entry'], name='directory_tag_lookup'),
+        ),
+        migrations.AddIndex(
+            model_name='directoryentrytag',
+            index=models.Index(fields=['tag', 'is_listed', 'experience_level', 'entry'], name='directory_tag_level_lookup'),
+        ),
+        migrations.AddConstraint(
+            model_name='directoryentrytag',
+            constraint=models.UniqueConstraint(fields=('entry', 'tag'), name='unique_directory_entry_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='directoryentry',
+            index=models.Index(fields=['is_listed', 'user'], name='directory_listed_lookup'),
+        ),
+        migrations.AddIndex(
+            model_name='directoryentry',
+            index=models.Index(fields=['is_listed', 'experience_level', 'user'], name='directory_level_lookup'),
+        ),
+    ]
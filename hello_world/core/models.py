@@ -10,6 +10,8 @@ from django.urls import reverse
 import uuid
 import os
 
+from .counters import CounterBuffer
+
 
 class CustomUser(AbstractUser):
     """
@@ -45,6 +47,10 @@ class CustomUser(AbstractUser):
     twitter_handle = models.CharField(max_length=100, blank=True)
     discord_username = models.CharField(max_length=100, blank=True)
     
+    # Identity Provider
+    keycloak_id = models.CharField(max_length=64, null=True, blank=True, unique=True,
+                                   help_text="Keycloak user id, set by the Keycloak sync")
+    
     # Preferences & Settings
     theme_preference = models.CharField(
         max_length=20,
@@ -60,7 +66,7 @@ class CustomUser(AbstractUser):
     privacy_settings = models.JSONField(default=dict, help_text="Privacy configuration")
     
     # Activity Tracking
-    last_active = models.DateTimeField(auto_now=True)
+    last_active = models.DateTimeField(default=timezone.now, help_text="Persisted by the presence tracker")
     is_online = models.BooleanField(default=False)
     total_projects = models.PositiveIntegerField(default=0)
     total_contributions = models.PositiveIntegerField(default=0)
@@ -238,10 +244,21 @@ class Project(models.Model):
             return self.thumbnail.url
         return f"https://via.placeholder.com/400x300/667eea/ffffff?text={self.title[:20]}"
     
+    def increment_counter(self, field, amount=1):
+        """Buffer a view/like/fork/download increment; flushed in batches"""
+        project_counters.increment(self.pk, field, amount)
+
     def increment_view_count(self):
         """Increment project view count"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        self.increment_counter('view_count')
+
+    @property
+    def live_counts(self):
+        """Engagement counters including increments not yet flushed"""
+        return project_counters.live_counts(self)
+
+
+project_counters = CounterBuffer(Project, ['view_count', 'like_count', 'fork_count', 'download_count'])
 
 
 class ProjectCollaboration(models.Model):
@@ -414,8 +431,7 @@ class ChatMessage(models.Model):
     is_edited = models.BooleanField(default=False)
     edit_history = models.JSONField(default=list, help_text="Edit history")
     
-    # Reactions & Engagement
-    reactions = models.JSONField(default=dict, help_text="Message reactions")
+    # Engagement (reactions live in MessageReaction)
     is_pinned = models.BooleanField(default=False)
     
     # Timestamps
@@ -435,22 +451,47 @@ class ChatMessage(models.Model):
         preview = self.content[:50] + "..." if len(self.content) > 50 else self.content
         return f"{self.sender.display_name}: {preview}"
     
+    @property
+    def reactions(self):
+        """Aggregated reaction counts keyed by emoji"""
+        from .reactions import get_reaction_counts
+        return get_reaction_counts(self.pk)
+    
     def add_reaction(self, user, emoji):
         """Add reaction to message"""
-        if emoji not in self.reactions:
-            self.reactions[emoji] = []
-        
-        if user.id not in self.reactions[emoji]:
-            self.reactions[emoji].append(user.id)
-            self.save(update_fields=['reactions'])
+        from .reactions import add_reaction
+        return add_reaction(self.pk, user.id, emoji)
     
     def remove_reaction(self, user, emoji):
         """Remove reaction from message"""
-        if emoji in self.reactions and user.id in self.reactions[emoji]:
-            self.reactions[emoji].remove(user.id)
-            if not self.reactions[emoji]:
-                del self.reactions[emoji]
-            self.save(update_fields=['reactions'])
+        from .reactions import remove_reaction
+        return remove_reaction(self.pk, user.id, emoji)
+
+
+class MessageReaction(models.Model):
+    """
+    Message Reaction Model - The Royal Applause
+    One row per (message, user, emoji); counts are aggregated in cache
+    """
+    
+    message = models.ForeignKey(ChatMessage, on_delete=models.CASCADE, related_name='reaction_set')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='message_reactions')
+    emoji = models.CharField(max_length=32, help_text="Reaction emoji")
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'glorious_message_reactions'
+        constraints = [
+            models.UniqueConstraint(fields=['message', 'user', 'emoji'], name='unique_message_user_emoji'),
+        ]
+        indexes = [
+            models.Index(fields=['message', 'emoji']),
+        ]
+    
+    def __str__(self):
+        return f"{self.emoji} by {self.user.display_name}"
 
 
 class AIConversation(models.Model):
@@ -762,3 +803,114 @@ class SystemConfiguration(models.Model):
     
     def __str__(self):
         return f"{self.category}: {self.key}"
+
+
+class SearchDocument(models.Model):
+    """
+    Search Document Model - The Royal Archive Index
+    Denormalized text for projects, users and messages. The full-text index
+    itself (SQLite FTS5 or Postgres tsvector/GIN) is maintained in the database.
+    """
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            ('project', 'Project'),
+            ('user', 'User'),
+            ('message', 'Chat Message'),
+        ]
+    )
+    object_id = models.CharField(max_length=64)
+    title = models.CharField(max_length=300, blank=True)
+    body = models.TextField(blank=True)
+    
+    # Timestamps
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'glorious_search_documents'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+
+class DirectoryTag(models.Model):
+    """
+    Directory Tag Model - The Royal Registry of Skills
+    One normalized skill, shared by every developer who lists it
+    """
+    
+    slug = models.CharField(max_length=100, unique=True, help_text="Normalized lookup key")
+    name = models.CharField(max_length=100, help_text="Display spelling")
+    
+    class Meta:
+        db_table = 'glorious_directory_tags'
+    
+    def __str__(self):
+        return self.name
+
+
+class DirectoryEntry(models.Model):
+    """
+    Directory Entry Model - The Royal Registry
+    Developer directory row, denormalized from the user for indexed filtering.
+    Its indexes end in the user id, which is the keyset pagination column.
+    """
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='directory_entry')
+    is_listed = models.BooleanField(default=True, help_text="Active developer")
+    experience_level = models.CharField(max_length=20, blank=True, default='')
+    tags = models.ManyToManyField(DirectoryTag, through='DirectoryEntryTag', related_name='entries')
+    
+    class Meta:
+        db_table = 'glorious_directory_entries'
+        indexes = [
+            models.Index(fields=['is_listed', 'user'], name='directory_listed_lookup'),
+            models.Index(fields=['is_listed', 'experience_level', 'user'], name='directory_level_lookup'),
+        ]
+    
+    def __str__(self):
+        return f"Directory entry for {self.user_id}"
+
+
+class DirectoryEntryTag(models.Model):
+    """Entry <-> tag link carrying the entry's filter columns, so skill filters stay on one index"""
+    
+    entry = models.ForeignKey(DirectoryEntry, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(DirectoryTag, on_delete=models.CASCADE, related_name='entry_links')
+    is_listed = models.BooleanField(default=True)
+    experience_level = models.CharField(max_length=20, blank=True, default='')
+    
+    class Meta:
+        db_table = 'glorious_directory_entry_tags'
+        constraints = [
+            models.UniqueConstraint(fields=['entry', 'tag'], name='unique_directory_entry_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'is_listed', 'entry'], name='directory_tag_lookup'),
+            models.Index(fields=['tag', 'is_listed', 'experience_level', 'entry'], name='directory_tag_level_lookup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.entry_id} -> {self.tag_id}"
+
+
+class SyncState(models.Model):
+    """
+    Sync State Model - The Royal Ledger of Couriers
+    Watermarks for incremental jobs such as the Keycloak user sync
+    """
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    watermark = models.BigIntegerField(default=0, help_text="Epoch milliseconds of the newest change applied")
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_stats = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        db_table = 'glorious_sync_state'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
@@ -0,0 +1,45 @@
+# 👑 API Permissions - The Royal Decrees
+# DRF permission classes backed by the cached Keycloak roles
+
+from rest_framework.permissions import BasePermission
+
+from .roles import has_group, has_role
+
+
+class HasRole(BasePermission):
+    """
+    Allow users holding any of the required roles, taken from the class
+    (see role_required) or from the view's `required_roles`.
+    
+        class ReportViewSet(viewsets.ModelViewSet):
+            permission_classes = [HasRole]
+            required_roles = ['admin', 'moderator']
+    """
+    
+    roles = ()
+    message = 'You do not have the required role.'
+    
+    def has_permission(self, request, view):
+        required = self.roles or getattr(view, 'required_roles', ())
+        return any(has_role(request.user, role) for role in required)
+
+
+class InGroup(BasePermission):
+    """Allow users in any of the required groups (class `groups` or the view's `required_groups`)"""
+    
+    groups = ()
+    message = 'You are not in a permitted group.'
+    
+    def has_permission(self, request, view):
+        required = self.groups or getattr(view, 'required_groups', ())
+        return any(has_group(request.user, group) for group in required)
+
+
+def role_required(*roles):
+    """Permission class bound to roles: permission_classes = [role_required('admin')]"""
+    return type('HasRole', (HasRole,), {'roles': roles})
+
+
+def group_required(*groups):
+    """Permission class bound to groups: permission_classes = [group_required('developers')]"""
+    return type('InGroup', (InGroup,), {'groups': groups})
@@ -0,0 +1,115 @@
+# 👑 Presence Tracker - The Royal Court Roll Call
+# Activity is recorded in the cache with a TTL; last_active/is_online reach the
+# users table at most once per PRESENCE_PERSIST_INTERVAL per user, in batches.
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import counters
+
+# A user counts as online while active within this many seconds
+PRESENCE_TIMEOUT = getattr(settings, 'PRESENCE_TIMEOUT', 300)
+
+# Minimum seconds between database writes for the same user
+PRESENCE_PERSIST_INTERVAL = getattr(settings, 'PRESENCE_PERSIST_INTERVAL', 300)
+
+
+def _presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def _persisted_key(user_id):
+    return f'presence_persisted:{user_id}'
+
+
+class PresenceTracker:
+    """Cheap per-request activity tracking with throttled, batched persistence"""
+
+    def __init__(self):
+        self.model = get_user_model()
+        self._lock = threading.Lock()
+        self._online = set()
+        self._offline = set()
+        self._next_sweep = 0
+        counters.register(self)
+
+    def touch(self, user_id):
+        """Record activity; queues a database write only if none happened recently"""
+        cache.set(_presence_key(user_id), time.time(), PRESENCE_TIMEOUT)
+
+        # cache.add is atomic, so across workers only one request per interval wins
+        if cache.add(_persisted_key(user_id), 1, PRESENCE_PERSIST_INTERVAL):
+            with self._lock:
+                self._online.add(user_id)
+                self._offline.discard(user_id)
+            counters.start_flusher()
+
+    def leave(self, user_id):
+        """Explicit sign-off, e.g. on logout"""
+        cache.delete_many([_presence_key(user_id), _persisted_key(user_id)])
+        with self._lock:
+            self._offline.add(user_id)
+            self._online.discard(user_id)
+        counters.start_flusher()
+
+    def last_seen(self, user_id):
+        """Unix time of the latest activity, or None once the user has gone quiet"""
+        return cache.get(_presence_key(user_id))
+
+    def is_online(self, user_id):
+        return self.last_seen(user_id) is not None
+
+    def online_users(self, user_ids):
+        """Subset of user_ids that are currently online, in one cache round trip"""
+        seen = cache.get_many([_presence_key(user_id) for user_id in user_ids])
+        return [user_id for user_id in user_ids if _presence_key(user_id) in seen]
+
+    def flush(self):
+        """Write queued presence changes. Returns rows touched."""
+        with self._lock:
+            online, self._online = self._online, set()
+            offline, self._offline = self._offline, set()
+
+        touched = 0
+        try:
+            if online:
+                touched += self.model.objects.filter(pk__in=online).update(
+                    last_active=timezone.now(), is_online=True
+                )
+
+            # Sweeps belong to the running flusher only, never the exit flush
+            if not counters.shutting_down() and time.monotonic() >= self._next_sweep:
+                offline |= self._expired_users()
+                self._next_sweep = time.monotonic() + PRESENCE_TIMEOUT
+
+            if offline:
+                touched += self.model.objects.filter(pk__in=offline, is_online=True).update(is_online=False)
+        except Exception:
+            # Re-queue for the next flush, unless a newer touch or leave superseded it
+            with self._lock:
+                self._online |= online - self._offline
+                self._offline |= offline - self._online
+            raise
+
+        return touched
+
+    def _expired_users(self):
+        """Users still flagged online whose cache presence has lapsed"""
+        # An active user's stored last_active can lag by up to the persist interval
+        cutoff = timezone.now() - timedelta(seconds=PRESENCE_TIMEOUT + PRESENCE_PERSIST_INTERVAL)
+        candidates = list(
+            self.model.objects.filter(is_online=True, last_active__lt=cutoff).values_list('pk', flat=True)
+        )
+        if not candidates:
+            return set()
+        online = set(self.online_users(candidates))
+        return {user_id for user_id in candidates if user_id not in online}
+
+
+presence = PresenceTracker()
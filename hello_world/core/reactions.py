@@ -0,0 +1,155 @@
+# 👑 Message Reactions - The Royal Applause Ledger
+# Row-per-reaction storage with cached per-message counts and batched broadcasts
+
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import MessageReaction
+
+logger = logging.getLogger(__name__)
+
+# How long aggregated counts stay cached before being rebuilt from the table
+REACTION_CACHE_TIMEOUT = 300
+
+# Seconds between reaction broadcasts for the same message
+REACTION_BROADCAST_TICK = 0.1
+
+MAX_EMOJI_LENGTH = MessageReaction._meta.get_field('emoji').max_length
+
+
+def _index_key(message_id):
+    return f'chat_reactions:{message_id}'
+
+
+def _count_key(message_id, emoji):
+    # Hex-encode so any emoji sequence is a safe cache key
+    return f'chat_reactions:{message_id}:{emoji.encode("utf-8").hex()}'
+
+
+def _bump_count(message_id, emoji, delta):
+    """Atomically adjust a cached counter, dropping the index if it is missing"""
+    key = _count_key(message_id, emoji)
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        else:
+            cache.decr(key, -delta)
+    except ValueError:
+        # Counter not cached (new emoji or expired) - rebuild on next read
+        cache.delete(_index_key(message_id))
+
+
+def validate_emoji(emoji):
+    """Client-supplied reactions must fit the emoji column"""
+    if not isinstance(emoji, str) or not emoji or len(emoji) > MAX_EMOJI_LENGTH:
+        raise ValidationError(f"Reaction must be a string of at most {MAX_EMOJI_LENGTH} characters")
+
+
+def add_reaction(message_id, user_id, emoji):
+    """
+    Record a reaction. Returns False if the user already reacted with this emoji.
+    The unique constraint makes concurrent duplicates safe without locking the message.
+    """
+    validate_emoji(emoji)
+    try:
+        with transaction.atomic():
+            MessageReaction.objects.create(message_id=message_id, user_id=user_id, emoji=emoji)
+    except IntegrityError:
+        return False
+
+    _bump_count(message_id, emoji, 1)
+    return True
+
+
+def remove_reaction(message_id, user_id, emoji):
+    """Remove a reaction. Returns False if there was nothing to remove."""
+    deleted, _ = MessageReaction.objects.filter(
+        message_id=message_id, user_id=user_id, emoji=emoji
+    ).delete()
+
+    if not deleted:
+        return False
+
+    _bump_count(message_id, emoji, -1)
+    return True
+
+
+def get_reaction_counts(message_id):
+    """Get {emoji: count} for a message, served from cache when warm"""
+    emojis = cache.get(_index_key(message_id))
+
+    if emojis is not None:
+        keys = {_count_key(message_id, emoji): emoji for emoji in emojis}
+        cached = cache.get_many(list(keys))
+        if len(cached) == len(keys):
+            return {keys[key]: count for key, count in cached.items() if count > 0}
+
+    counts = dict(
+        MessageReaction.objects.filter(message_id=message_id)
+        .values_list('emoji')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+    # add, not set: a counter another request created or incremented since
+    # the query above is newer than these totals and must not be overwritten
+    for emoji, total in counts.items():
+        cache.add(_count_key(message_id, emoji), total, REACTION_CACHE_TIMEOUT)
+    cache.set(_index_key(message_id), list(counts), REACTION_CACHE_TIMEOUT)
+
+    return counts
+
+
+class ReactionBroadcaster:
+    """
+    Coalesces reaction broadcasts so a hot message produces at most one
+    group_send per tick, carrying the aggregated counts.
+    """
+
+    def __init__(self, tick=REACTION_BROADCAST_TICK):
+        self.tick = tick
+        self._pending = {}
+        self._task = None
+
+    def schedule(self, channel_layer, group_name, message_id):
+        """Queue a broadcast of the current counts for a message"""
+        self._pending[str(message_id)] = (channel_layer, group_name)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._flush_after_tick())
+
+    async def _flush_after_tick(self):
+        await asyncio.sleep(self.tick)
+
+        pending, self._pending = self._pending, {}
+        for message_id, (channel_layer, group_name) in pending.items():
+            try:
+                counts = await sync_to_async(get_reaction_counts)(message_id)
+                await channel_layer.group_send(
+                    group_name,
+                    {
+                        'type': 'message_reaction_broadcast',
+                        'reaction_data': {
+                            'type': 'message_reaction',
+                            'message_id': message_id,
+                            'reactions': counts,
+                            'timestamp': timezone.now().isoformat(),
+                        }
+                    }
+                )
+            except Exception as e:
+                logger.warning(f"Reaction broadcast failed for {message_id}: {e}")
+
+        # Reactions that arrived while we were sending get their own tick
+        if self._pending:
+            self._task = asyncio.ensure_future(self._flush_after_tick())
+
+
+reaction_broadcaster = ReactionBroadcaster()
@@ -0,0 +1,134 @@
+# 👑 Role Cache - The Royal Heraldry
+# Each user's effective Keycloak roles and groups, kept in the cache so
+# authorization checks never call Keycloak on the request path.
+# Filled from token claims at login, refreshed by the sync job, and dropped
+# on TTL expiry or when roles/groups are changed through the admin helpers.
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from keycloak.exceptions import KeycloakError
+
+logger = logging.getLogger(__name__)
+
+ROLE_CACHE_TTL = getattr(settings, 'ROLE_CACHE_TTL', 300)
+
+# Per-request memo stored on the user object
+_MEMO_ATTR = '_glorious_roles'
+
+_client_uuid = None
+
+
+def _cache_key(user_id):
+    return f'user_roles:{user_id}'
+
+
+def roles_from_claims(claims):
+    """(roles, groups) from a Keycloak access token's claims"""
+    roles = set(claims.get('realm_access', {}).get('roles', []))
+    client_id = settings.KEYCLOAK_CONFIG['CLIENT_ID']
+    roles.update(claims.get('resource_access', {}).get(client_id, {}).get('roles', []))
+
+    # The groups mapper may emit full paths ("/devs/frontend"); Django groups use the leaf name
+    groups = {group.rstrip('/').rsplit('/', 1)[-1] for group in claims.get('groups', []) if group.strip('/')}
+    return roles, groups
+
+
+def remember(user, roles, groups):
+    entry = {'roles': sorted(roles), 'groups': sorted(groups)}
+    cache.set(_cache_key(user.pk), entry, ROLE_CACHE_TTL)
+    setattr(user, _MEMO_ATTR, entry)
+
+
+def remember_claims(user, claims):
+    """Cache roles straight from a verified token; no Keycloak call needed"""
+    if 'realm_access' not in claims and 'resource_access' not in claims:
+        # e.g. a userinfo response - nothing authoritative to store
+        return
+    roles, groups = roles_from_claims(claims)
+    if 'groups' not in claims:
+        # No groups mapper on the client; fall back to the synced local groups
+        groups = set(user.groups.values_list('name', flat=True))
+    remember(user, roles, groups)
+
+
+def forget_memo(user):
+    """Drop the per-request memo, e.g. before an instance outlives its request"""
+    user.__dict__.pop(_MEMO_ATTR, None)
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_many(user_ids):
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_username(username):
+    from django.contrib.auth import get_user_model
+    user_id = get_user_model().objects.filter(username=username).values_list('pk', flat=True).first()
+    if user_id is not None:
+        invalidate(user_id)
+
+
+def fetch_keycloak_roles(username):
+    """Effective realm and client roles via the admin API (cache misses only)"""
+    global _client_uuid
+    from .keycloak_auth import get_keycloak_admin
+
+    admin = get_keycloak_admin()
+    keycloak_id = admin.get_user_id(username)
+    if keycloak_id is None:
+        return set()
+
+    roles = {role['name'] for role in admin.get_composite_realm_roles_of_user(keycloak_id)}
+    if _client_uuid is None:
+        _client_uuid = admin.get_client_id(settings.KEYCLOAK_CONFIG['CLIENT_ID'])
+    if _client_uuid:
+        roles.update(role['name'] for role in admin.get_composite_client_roles_of_user(keycloak_id, _client_uuid))
+    return roles
+
+
+def refresh(user):
+    """Rebuild a user's entry: roles from Keycloak, groups from the synced local groups"""
+    groups = set(user.groups.values_list('name', flat=True))
+    try:
+        roles = fetch_keycloak_roles(user.username)
+    except KeycloakError as e:
+        logger.warning(f"Could not load Keycloak roles for {user.username}: {e}")
+        # Don't cache a partial answer; the next check retries
+        return {'roles': [], 'groups': sorted(groups)}
+    remember(user, roles, groups)
+    return getattr(user, _MEMO_ATTR)
+
+
+def get_user_roles(user):
+    """{'roles': [...], 'groups': [...]} for an authenticated user"""
+    entry = getattr(user, _MEMO_ATTR, None)
+    if entry is None:
+        entry = cache.get(_cache_key(user.pk))
+        if entry is None:
+            entry = refresh(user)
+        setattr(user, _MEMO_ATTR, entry)
+    return entry
+
+
+def has_role(user, role):
+    """Fast role check. Superusers hold every role."""
+    if user is None or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return role in get_user_roles(user)['roles']
+
+
+def has_group(user, group):
+    if user is None or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return group in get_user_roles(user)['groups']
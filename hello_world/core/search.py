@@ -0,0 +1,292 @@
+# 👑 Full-Text Search - The Royal Archive
+# Indexed search over projects, users and chat messages.
+# SQLite uses an FTS5 external-content table; Postgres uses a generated
+# tsvector column with a GIN index. Both are created by migration 0003.
+
+import re
+import logging
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import SearchDocument, Project, ChatMessage, CustomUser
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'glorious_search_fts'
+MAX_QUERY_TERMS = 8
+
+# Markers the database wraps around matched terms; swapped for <mark> after escaping
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# ============================================================================
+# DOCUMENT BUILDERS - What gets indexed for each kind
+# ============================================================================
+
+def _join(values):
+    return ' '.join(str(value) for value in values if value)
+
+
+def project_document(project):
+    """Public projects only; private and team projects are not searchable"""
+    if project.visibility != 'public':
+        return None
+    return {
+        'title': project.title,
+        'body': _join([project.description, _join(project.tech_stack), _join(project.tags)]),
+    }
+
+
+def user_document(user):
+    if not user.is_active:
+        return None
+    return {
+        'title': _join([user.get_full_name(), user.username]),
+        'body': _join([user.title, user.company, user.location, user.bio, _join(user.skills)]),
+    }
+
+
+def message_document(message):
+    """Only messages in public rooms are globally searchable"""
+    if message.room.room_type != 'public':
+        return None
+    return {
+        'title': '',
+        'body': message.content,
+    }
+
+
+# kind -> (model, document builder, fields whose change requires reindexing)
+SEARCH_REGISTRY = {
+    'project': (Project, project_document, {'title', 'description', 'tech_stack', 'tags', 'visibility'}),
+    'user': (CustomUser, user_document, {'first_name', 'last_name', 'username', 'title', 'company',
+                                         'location', 'bio', 'skills', 'is_active'}),
+    'message': (ChatMessage, message_document, {'content', 'room'}),
+}
+
+MODEL_KINDS = {model: kind for kind, (model, _, _) in SEARCH_REGISTRY.items()}
+
+
+def index_instance(instance, update_fields=None):
+    """Create, refresh or drop the search document for a model instance"""
+    kind = MODEL_KINDS.get(type(instance))
+    if kind is None:
+        return
+
+    _, build, indexed_fields = SEARCH_REGISTRY[kind]
+    if update_fields and not indexed_fields.intersection(update_fields):
+        # e.g. save(update_fields=['view_count']) - nothing searchable changed
+        return
+
+    document = build(instance)
+    if document is None:
+        remove_instance(instance)
+        return
+
+    SearchDocument.objects.update_or_create(
+        kind=kind,
+        object_id=str(instance.pk),
+        defaults={
+            'title': document['title'][:300],
+            'body': document['body'],
+        }
+    )
+
+
+def remove_instance(instance):
+    kind = MODEL_KINDS.get(type(instance))
+    if kind is not None:
+        SearchDocument.objects.filter(kind=kind, object_id=str(instance.pk)).delete()
+
+
+# ============================================================================
+# QUERY BACKENDS - One per database vendor
+# ============================================================================
+
+class SQLiteSearchBackend:
+    """FTS5 with bm25 ranking, prefix tokens and highlight()/snippet()"""
+
+    def build_query(self, terms, kinds):
+        match = '{title body} : (' + ' '.join(f'"{term}"*' for term in terms) + ')'
+        if kinds:
+            match += ' AND kind : (' + ' OR '.join(f'"{kind}"' for kind in kinds) + ')'
+        return match
+
+    def search(self, terms, kinds, limit, offset):
+        sql = f"""
+            SELECT d.kind, d.object_id,
+                   highlight({FTS_TABLE}, 1, %s, %s),
+                   snippet({FTS_TABLE}, 2, %s, %s, '…', 24),
+                   bm25({FTS_TABLE}, 0.0, 10.0, 1.0) AS rank
+            FROM {FTS_TABLE}
+            JOIN glorious_search_documents d ON d.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY rank
+            LIMIT %s OFFSET %s
+        """
+        params = [HIGHLIGHT_START, HIGHLIGHT_STOP, HIGHLIGHT_START, HIGHLIGHT_STOP,
+                  self.build_query(terms, kinds), limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            # bm25 is "lower is better"; flip it so callers always sort descending
+            return [(kind, object_id, title, body, -rank)
+                    for kind, object_id, title, body, rank in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector (title A, body B) with ts_rank_cd and ts_headline"""
+
+    headline_options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}'
+
+    def build_query(self, terms, kinds):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def search(self, terms, kinds, limit, offset):
+        sql = """
+            SELECT d.kind, d.object_id,
+                   ts_headline('english', d.title, q, %s),
+                   ts_headline('english', d.body, q, %s),
+                   ts_rank_cd(d.search_vector, q) AS rank
+            FROM glorious_search_documents d, to_tsquery('english', %s) q
+            WHERE d.search_vector @@ q
+        """
+        params = [
+            self.headline_options + ', HighlightAll=true',
+            self.headline_options + ', MaxFragments=2, MaxWords=24, MinWords=8',
+            self.build_query(terms, kinds),
+        ]
+        if kinds:
+            sql += " AND d.kind = ANY(%s)"
+            params.append(list(kinds))
+        sql += " ORDER BY rank DESC LIMIT %s OFFSET %s"
+        params += [limit, offset]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    raise NotImplementedError(f"Full-text search is not available on {connection.vendor}")
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def parse_terms(query):
+    """Split a user query into word tokens safe to embed in FTS syntax"""
+    return [term.lower() for term in TERM_RE.findall(query)][:MAX_QUERY_TERMS]
+
+
+def render_highlight(text):
+    """Escape database text, then turn the match markers into <mark> tags"""
+    if not text:
+        return ''
+    html = escape(text).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+    return mark_safe(html)
+
+
+def search(query, kinds=None, limit=20, offset=0):
+    """
+    Ranked search across the registered kinds.
+    Every query term is prefix-matched and all terms must match.
+    Returns a list of hits in rank order, each with the loaded object.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+
+    kinds = [kind for kind in (kinds or []) if kind in SEARCH_REGISTRY]
+    if set(kinds) == set(SEARCH_REGISTRY):
+        # Filtering on every kind only costs an extra posting-list intersection
+        kinds = []
+    rows = get_search_backend().search(terms, kinds, limit, offset)
+
+    # Load the matched objects with one query per kind
+    ids_by_kind = {}
+    for kind, object_id, *_ in rows:
+        ids_by_kind.setdefault(kind, []).append(object_id)
+
+    objects = {}
+    for kind, ids in ids_by_kind.items():
+        model = SEARCH_REGISTRY[kind][0]
+        for pk, obj in model.objects.in_bulk(ids).items():
+            objects[(kind, str(pk))] = obj
+
+    hits = []
+    for kind, object_id, title, body, rank in rows:
+        obj = objects.get((kind, object_id))
+        if obj is None:
+            # Deleted between indexing and now
+            continue
+        hits.append({
+            'kind': kind,
+            'object': obj,
+            'title': render_highlight(title),
+            'snippet': render_highlight(body),
+            'rank': rank,
+        })
+
+    return hits
+
+
+def _bulk_index(kind, queryset, batch_size):
+    """Build and insert documents for a queryset whose old documents are already gone"""
+    build = SEARCH_REGISTRY[kind][1]
+    batch = []
+    indexed = 0
+    for instance in queryset.iterator(chunk_size=batch_size):
+        document = build(instance)
+        if document is None:
+            continue
+        batch.append(SearchDocument(
+            kind=kind, object_id=str(instance.pk),
+            title=document['title'][:300], body=document['body']
+        ))
+        if len(batch) >= batch_size:
+            SearchDocument.objects.bulk_create(batch)
+            indexed += len(batch)
+            batch = []
+
+    if batch:
+        SearchDocument.objects.bulk_create(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def rebuild_index(kinds=None, batch_size=1000):
+    """Reindex every object of the given kinds. Returns {kind: documents indexed}."""
+    counts = {}
+    for kind in kinds or SEARCH_REGISTRY:
+        model = SEARCH_REGISTRY[kind][0]
+        SearchDocument.objects.filter(kind=kind).delete()
+
+        queryset = model.objects.all()
+        if model is ChatMessage:
+            queryset = queryset.select_related('room')
+
+        counts[kind] = _bulk_index(kind, queryset, batch_size)
+        logger.info(f"Rebuilt search index for {kind}: {counts[kind]} documents")
+
+    return counts
+
+
+def reindex_room_messages(room, batch_size=1000):
+    """
+    Message searchability follows the room's type, so a room_type change
+    re-files every message in the room. Returns documents indexed.
+    """
+    message_ids = [str(pk) for pk in ChatMessage.objects.filter(room=room).values_list('pk', flat=True)]
+    for start in range(0, len(message_ids), batch_size):
+        SearchDocument.objects.filter(kind='message', object_id__in=message_ids[start:start + batch_size]).delete()
+    return _bulk_index('message', ChatMessage.objects.filter(room=room).select_related('room'), batch_size)
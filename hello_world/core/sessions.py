@@ -0,0 +1,124 @@
+# 👑 Session Engine - The Royal Seal Keeper
+# Cached, database-backed sessions that are only written when something changed.
+# Sliding expiry is kept by re-saving once the last write is older than
+# SESSION_REFRESH_INTERVAL, instead of on every request. The last write is
+# read off the stored expire_date, so nothing is added to the session payload.
+
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+logger = logging.getLogger('django.contrib.sessions')
+
+# Stamp older releases wrote into the payload; dropped from sessions as they load
+LEGACY_REFRESHED_AT_KEY = '_session_refreshed_at'
+
+# Cached next to the session data so cache hits know the stored expire_date too
+EXPIRY_CACHE_SUFFIX = ':expires'
+
+
+def get_refresh_interval():
+    return getattr(settings, 'SESSION_REFRESH_INTERVAL', 3600)
+
+
+class SessionStore(CachedDBStore):
+    """
+    Use with SESSION_SAVE_EVERY_REQUEST = False.
+    Reads come from the cache; writes go to the database and the cache.
+    """
+
+    _expire_date = None
+
+    def expiry_cache_key(self, session_key):
+        return self.cache_key_prefix + session_key + EXPIRY_CACHE_SUFFIX
+
+    def _mark_stale(self, data, expire_date):
+        data.pop(LEGACY_REFRESHED_AT_KEY, None)
+        # The lifetime a save made now would give, against what the last save left
+        lifetime = self.get_expiry_age(expiry=data.get('_session_expiry'))
+        if expire_date is None or (expire_date - timezone.now()).total_seconds() <= lifetime - get_refresh_interval():
+            # Expiry is drifting from the sliding window: let the middleware save
+            # the session and re-issue the cookie on this response
+            self.modified = True
+        return data
+
+    # The database row carries expire_date; remember it when a cache miss reads it
+    def _get_session_from_db(self):
+        s = super()._get_session_from_db()
+        self._expire_date = s.expire_date if s else None
+        return s
+
+    async def _aget_session_from_db(self):
+        s = await super()._aget_session_from_db()
+        self._expire_date = s.expire_date if s else None
+        return s
+
+    def create_model_instance(self, data):
+        instance = super().create_model_instance(data)
+        self._expire_date = instance.expire_date
+        return instance
+
+    async def acreate_model_instance(self, data):
+        instance = await super().acreate_model_instance(data)
+        self._expire_date = instance.expire_date
+        return instance
+
+    def load(self):
+        self._expire_date = None
+        data = super().load()
+        if not data:
+            return data
+        if self._expire_date is None:
+            expire_date = self._cache.get(self.expiry_cache_key(self.session_key))
+        else:
+            expire_date = self._expire_date
+            self._cache_expire_date()
+        return self._mark_stale(data, expire_date)
+
+    async def aload(self):
+        self._expire_date = None
+        data = await super().aload()
+        if not data:
+            return data
+        if self._expire_date is None:
+            expire_date = await self._cache.aget(self.expiry_cache_key(self.session_key))
+        else:
+            expire_date = self._expire_date
+            await self._acache_expire_date()
+        return self._mark_stale(data, expire_date)
+
+    def _cache_expire_date(self):
+        try:
+            self._cache.set(self.expiry_cache_key(self.session_key), self._expire_date,
+                            self.get_expiry_age(expiry=self._expire_date))
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+
+    async def _acache_expire_date(self):
+        try:
+            await self._cache.aset(self.expiry_cache_key(self.session_key), self._expire_date,
+                                   await self.aget_expiry_age(expiry=self._expire_date))
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        self._cache_expire_date()
+
+    async def asave(self, must_create=False):
+        await super().asave(must_create)
+        await self._acache_expire_date()
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        super().delete(session_key)
+        if session_key is not None:
+            self._cache.delete(self.expiry_cache_key(session_key))
+
+    async def adelete(self, session_key=None):
+        session_key = session_key or self.session_key
+        await super().adelete(session_key)
+        if session_key is not None:
+            await self._cache.adelete(self.expiry_cache_key(session_key))
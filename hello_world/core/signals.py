@@ -1,23 +1,99 @@
 # 👑 Django Signals - Royal Kingdom Events
 # Signals for our magnificent platform events
 
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserActivity, Notification
+from django.contrib.auth.signals import user_logged_out
+from .models import UserActivity, Notification, Project, ChatMessage, ChatRoom
+from .presence import presence
+from . import directory, roles, search
 
 User = get_user_model()
 
+WELCOME_NOTIFICATION = {
+    'title': "👑 Welcome to the Royal Kingdom!",
+    'message': "Your magnificent journey begins here. Explore, create, and build together!",
+    'notification_type': 'system_update',
+}
+
+
+def welcome_new_users(users):
+    """
+    Activity tracking and the welcome notification for newly created users.
+    bulk_create skips post_save, so bulk creators call this themselves.
+    """
+    UserActivity.objects.bulk_create([UserActivity(user=user) for user in users])
+    Notification.objects.bulk_create([Notification(recipient=user, **WELCOME_NOTIFICATION) for user in users])
+
+
 @receiver(post_save, sender=User)
 def create_user_activity(sender, instance, created, **kwargs):
     """Create user activity tracking when a new royal subject joins"""
     if created:
-        UserActivity.objects.get_or_create(user=instance)
-        
-        # Welcome notification for new users
-        Notification.objects.create(
-            user=instance,
-            title="👑 Welcome to the Royal Kingdom!",
-            message="Your magnificent journey begins here. Explore, create, and build together!",
-            notification_type='system'
+        welcome_new_users([instance])
+
+
+# 🔍 Search Index Maintenance - Keep the Royal Archive current
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ChatMessage)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search document when a searchable object is saved"""
+    search.index_instance(instance, update_fields=update_fields)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ChatMessage)
+def remove_search_document(sender, instance, **kwargs):
+    """Drop the search document when a searchable object is deleted"""
+    search.remove_instance(instance)
+
+
+# 🧭 Developer Directory - Keep the Royal Registry current
+@receiver(post_save, sender=User)
+def update_directory_entry(sender, instance, update_fields=None, **kwargs):
+    """Refresh the user's directory entry when a filtered field is saved"""
+    if update_fields is None or directory.DIRECTORY_FIELDS.intersection(update_fields):
+        directory.sync_directory_entry(instance)
+
+
+@receiver(pre_save, sender=ChatRoom)
+def remember_room_type(sender, instance, update_fields=None, **kwargs):
+    """Note the stored room_type so a change can re-file the room's messages"""
+    instance._stored_room_type = None
+    if instance.pk and (update_fields is None or 'room_type' in update_fields):
+        instance._stored_room_type = (
+            ChatRoom.objects.filter(pk=instance.pk).values_list('room_type', flat=True).first()
         )
+
+
+@receiver(post_save, sender=ChatRoom)
+def reindex_room_messages(sender, instance, created, **kwargs):
+    """Messages are only searchable in public rooms"""
+    stored = getattr(instance, '_stored_room_type', None)
+    if not created and stored is not None and stored != instance.room_type:
+        search.reindex_room_messages(instance)
+
+
+# 🟢 Presence - Mark subjects offline when they leave the court
+@receiver(user_logged_out)
+def mark_user_offline(sender, request, user, **kwargs):
+    """Clear presence on logout instead of waiting for the timeout"""
+    if user is not None:
+        presence.leave(user.pk)
+
+
+# 🛡️ Role Cache - Forget cached roles when group membership changes
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached roles/groups for users whose groups were edited"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            roles.invalidate(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        roles.invalidate_many(pk_set)
+    elif action == 'pre_clear':
+        # group.user_set.clear() doesn't say which users it removes
+        roles.invalidate_many(instance.user_set.values_list('pk', flat=True))
@@ -0,0 +1,1127 @@
+"""
+Tests for the Glorious Space core app
+"""
+
+import asyncio
+import datetime
+import json
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import jwt
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from keycloak.exceptions import KeycloakGetError
+
+from backend.apps.core import canvas
+from backend.apps.core.models import CanvasSession
+from hello_world.routing import websocket_urlpatterns
+
+from . import counters, directory, keycloak_auth, reactions, roles, search, sessions
+from .canvas_outbox import CanvasOutbox, decode_frame, encode_frame
+from .keycloak_auth import KeycloakTokenAuthenticationBackend, get_keycloak_admin, keycloak_clients
+from .keycloak_sync import SYNC_STATE_NAME, KeycloakUserSync
+from .models import (
+    ChatMessage, ChatRoom, DirectoryEntryTag, DirectoryTag, MessageReaction, Notification, Project, SearchDocument,
+    SyncState, UserActivity,
+    project_counters,
+)
+from .permissions import InGroup, role_required
+from .presence import presence
+from .roles import has_group, has_role
+
+User = get_user_model()
+
+REALM = 'test-realm'
+CLIENT_ID = 'glorious-space-client'
+
+
+class StandInKeycloak:
+    """Serves a realm JWKS, the token endpoint and a sliver of the admin API over HTTP"""
+
+    def __init__(self):
+        self.keys = {}
+        self.jwks_requests = 0
+        self.token_requests = 0
+        self.admin_requests = 0
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def send_json(self, data):
+                body = json.dumps(data).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == f'/realms/{REALM}/protocol/openid-connect/certs':
+                    stand_in.jwks_requests += 1
+                    self.send_json({'keys': [jwk for _, jwk in stand_in.keys.values()]})
+                elif self.path.startswith(f'/admin/realms/{REALM}/users/'):
+                    stand_in.admin_requests += 1
+                    self.send_json([{'id': 'g1', 'name': 'developers'}])
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path != f'/realms/{REALM}/protocol/openid-connect/token':
+                    self.send_error(404)
+                    return
+                stand_in.token_requests += 1
+                self.send_json({
+                    'access_token': f'admin-token-{stand_in.token_requests}',
+                    'refresh_token': 'admin-refresh',
+                    'expires_in': 300,
+                    'token_type': 'Bearer',
+                })
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def add_key(self, kid):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        jwk.update({'kid': kid, 'use': 'sig', 'alg': 'RS256'})
+        self.keys[kid] = (private_key, jwk)
+
+    def remove_key(self, kid):
+        self.keys.pop(kid)
+
+    def token(self, kid, username='ada', **overrides):
+        now = int(time.time())
+        claims = {
+            'iss': f'{self.url}/realms/{REALM}',
+            # What stock Keycloak issues: the client is in azp, not aud
+            'aud': 'account',
+            'azp': CLIENT_ID,
+            'iat': now,
+            'exp': now + 300,
+            'preferred_username': username,
+        }
+        claims.update(overrides)
+        private_key = self.keys[kid][0]
+        return jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': kid})
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def stand_in_config(keycloak):
+    return {
+        'SERVER_URL': keycloak.url,
+        'REALM': REALM,
+        'CLIENT_ID': CLIENT_ID,
+        'CLIENT_SECRET': '',
+        'AUDIENCE': '',
+        'ADMIN_CLIENT_ID': 'admin-cli',
+        'ADMIN_USERNAME': 'admin',
+        'ADMIN_PASSWORD': 'admin',
+        'VERIFY_SSL': False,
+    }
+
+
+class KeycloakTokenAuthenticationTest(TestCase):
+    """Bearer tokens are verified locally against a cached JWKS"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keycloak = StandInKeycloak()
+        cls.keycloak.add_key('key-1')
+        cls.settings_override = override_settings(KEYCLOAK_CONFIG=stand_in_config(cls.keycloak))
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.keycloak.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        keycloak_auth.jwks_cache.clear()
+        keycloak_auth.token_cache.clear()
+        self.keycloak.jwks_requests = 0
+        self.user = User.objects.create_user(username='ada', email='ada@example.com')
+        self.backend = KeycloakTokenAuthenticationBackend()
+        self.factory = RequestFactory()
+
+    def authenticate(self, token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.backend.authenticate(request)
+
+    def test_valid_token_authenticates_user(self):
+        self.assertEqual(self.authenticate(self.keycloak.token('key-1')), self.user)
+
+    def test_jwks_fetched_once_and_token_cached(self):
+        token = self.keycloak.token('key-1')
+        for _ in range(5):
+            self.assertEqual(self.authenticate(token), self.user)
+        self.authenticate(self.keycloak.token('key-1', iat=int(time.time()) - 1))
+        self.assertEqual(self.keycloak.jwks_requests, 1)
+
+    def test_expired_token_rejected(self):
+        token = self.keycloak.token('key-1', exp=int(time.time()) - 60)
+        self.assertIsNone(self.authenticate(token))
+
+    def test_token_for_another_client_rejected(self):
+        self.assertIsNone(self.authenticate(self.keycloak.token('key-1', azp='someone-else')))
+
+    def test_explicit_audience_is_enforced(self):
+        config = {**stand_in_config(self.keycloak), 'AUDIENCE': 'glorious-api'}
+        with override_settings(KEYCLOAK_CONFIG=config):
+            self.assertIsNone(self.authenticate(self.keycloak.token('key-1')))
+            self.assertEqual(self.authenticate(self.keycloak.token('key-1', aud='glorious-api')), self.user)
+
+    def test_cached_token_needs_no_query(self):
+        token = self.keycloak.token('key-1')
+        self.authenticate(token)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(token), self.user)
+
+    def test_group_change_reaches_a_cached_token(self):
+        token = self.keycloak.token('key-1', realm_access={'roles': []})
+        with mock.patch.object(roles, 'fetch_keycloak_roles', return_value=set()):
+            self.assertFalse(has_group(self.authenticate(token), 'reviewers'))
+
+            self.user.groups.add(Group.objects.create(name='reviewers'))
+
+            # Same token, answered from the token cache, must not reuse the old role memo
+            self.assertTrue(has_group(self.authenticate(token), 'reviewers'))
+
+    def test_wrong_issuer_rejected(self):
+        self.assertIsNone(self.authenticate(self.keycloak.token('key-1', iss='http://evil/realms/x')))
+
+    def test_tampered_signature_rejected(self):
+        header, payload, signature = self.keycloak.token('key-1').split('.')
+        forged = jwt.encode({'preferred_username': 'ada'}, 'secret', algorithm='HS256').split('.')[1]
+        self.assertIsNone(self.authenticate(f'{header}.{forged}.{signature}'))
+
+    def test_symmetric_algorithm_rejected(self):
+        token = jwt.encode({'preferred_username': 'ada'}, 'secret', algorithm='HS256', headers={'kid': 'key-1'})
+        self.assertIsNone(self.authenticate(token))
+
+    def test_algorithm_not_matching_the_key_rejected(self):
+        # An allowed algorithm, but the kid names an RSA key; PyJWT would raise TypeError on it
+        signing_key = ec.generate_private_key(ec.SECP256R1())
+        token = jwt.encode({'preferred_username': 'ada'}, signing_key, algorithm='ES256', headers={'kid': 'key-1'})
+        self.assertIsNone(self.authenticate(token))
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertIsNone(self.authenticate(self.keycloak.token('key-1')))
+
+    def test_unknown_user_rejected(self):
+        self.assertIsNone(self.authenticate(self.keycloak.token('key-1', username='nobody')))
+
+    def test_key_rotation_refetches_jwks(self):
+        self.assertEqual(self.authenticate(self.keycloak.token('key-1')), self.user)
+
+        self.keycloak.add_key('key-2')
+        # The refetch is rate limited; pretend the last one happened long ago
+        keycloak_auth.jwks_cache._fetched_at -= keycloak_auth.JWKS_MIN_REFETCH_INTERVAL
+        self.assertEqual(self.authenticate(self.keycloak.token('key-2')), self.user)
+        self.assertEqual(self.keycloak.jwks_requests, 2)
+        self.keycloak.remove_key('key-2')
+
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        self.authenticate(self.keycloak.token('key-1'))
+        self.keycloak.add_key('rogue')
+        token = self.keycloak.token('rogue')
+        self.keycloak.remove_key('rogue')
+
+        for _ in range(5):
+            self.assertIsNone(self.authenticate(token))
+        self.assertEqual(self.keycloak.jwks_requests, 1)
+
+
+class KeycloakUserMatchingTest(TestCase):
+    """Login and bearer auth find users by keycloak_id, like the sync does"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keycloak = StandInKeycloak()
+        cls.keycloak.add_key('key-1')
+        cls.settings_override = override_settings(KEYCLOAK_CONFIG=stand_in_config(cls.keycloak))
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.keycloak.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        keycloak_auth.jwks_cache.clear()
+        keycloak_auth.token_cache.clear()
+        self.user = User.objects.create_user(username='ada', email='ada@example.com', keycloak_id='kc-ada')
+
+    def bearer(self, **claims):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.keycloak.token('key-1', **claims)}")
+        return KeycloakTokenAuthenticationBackend().authenticate(request)
+
+    def login(self, **user_info):
+        return keycloak_auth.KeycloakAuthenticationBackend()._get_or_create_user(user_info, token={})
+
+    def test_renamed_user_keeps_their_row_on_login(self):
+        user = self.login(sub='kc-ada', preferred_username='ada.lovelace', email='ada@new.example.com')
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.username, self.user.email), ('ada.lovelace', 'ada@new.example.com'))
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_login_links_an_unlinked_row(self):
+        grace = User.objects.create_user(username='grace', email='grace@example.com')
+
+        self.assertEqual(self.login(sub='kc-grace', preferred_username='grace').pk, grace.pk)
+        grace.refresh_from_db()
+        self.assertEqual(grace.keycloak_id, 'kc-grace')
+
+    def test_login_never_takes_over_another_keycloak_users_row(self):
+        # 'ada' was renamed away in Keycloak and someone new took the name; the sync hasn't run
+        self.assertIsNone(self.login(sub='kc-new', preferred_username='ada', email='new@example.com'))
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.keycloak_id, self.user.email), ('kc-ada', 'ada@example.com'))
+
+    def test_bearer_token_matches_on_keycloak_id(self):
+        self.assertEqual(self.bearer(sub='kc-ada', username='ada.lovelace'), self.user)
+        self.assertIsNone(self.bearer(sub='kc-new', username='ada'))
+
+    def test_bearer_token_links_an_unlinked_row(self):
+        grace = User.objects.create_user(username='grace', email='grace@example.com')
+
+        self.assertEqual(self.bearer(sub='kc-grace', username='grace'), grace)
+        grace.refresh_from_db()
+        self.assertEqual(grace.keycloak_id, 'kc-grace')
+
+
+class KeycloakClientRegistryTest(TestCase):
+    """Clients and the admin token are shared instead of rebuilt per call"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keycloak = StandInKeycloak()
+        cls.settings_override = override_settings(KEYCLOAK_CONFIG=stand_in_config(cls.keycloak))
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.keycloak.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        keycloak_clients.reset()
+        self.keycloak.token_requests = 0
+        self.keycloak.admin_requests = 0
+
+    def test_clients_are_reused(self):
+        self.assertIs(keycloak_clients.openid(), keycloak_clients.openid())
+        self.assertIs(get_keycloak_admin(), get_keycloak_admin())
+
+    def test_admin_token_fetched_once_across_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            groups = list(pool.map(lambda _: get_keycloak_admin().get_user_groups('u1'), range(40)))
+
+        self.assertEqual(groups[0], [{'id': 'g1', 'name': 'developers'}])
+        self.assertEqual(self.keycloak.admin_requests, 40)
+        self.assertEqual(self.keycloak.token_requests, 1)
+
+    def test_settings_change_rebuilds_clients(self):
+        admin = get_keycloak_admin()
+        with override_settings(KEYCLOAK_CONFIG={**stand_in_config(self.keycloak), 'REALM': 'other'}):
+            self.assertIsNot(get_keycloak_admin(), admin)
+
+
+class FakeKeycloakAdmin:
+    """Just enough of KeycloakAdmin for the user sync"""
+
+    def __init__(self):
+        self.users = {}
+        self.groups = {}
+        self.admin_events = []
+        self.events = []
+        self.member_listings = 0
+
+    def add_user(self, user_id, username, **fields):
+        self.users[user_id] = {'id': user_id, 'username': username, 'enabled': True, **fields}
+
+    def _page(self, items, query):
+        return items[query['first']:query['first'] + query['max']]
+
+    def get_users(self, query):
+        return self._page(list(self.users.values()), query)
+
+    def get_user(self, user_id):
+        if user_id not in self.users:
+            raise KeycloakGetError('User not found', response_code=404)
+        return self.users[user_id]
+
+    def get_user_groups(self, user_id):
+        self.get_user(user_id)
+        return [{'id': name, 'name': name} for name, members in self.groups.items() if user_id in members]
+
+    def get_group(self, group_id):
+        if group_id not in self.groups:
+            raise KeycloakGetError('Could not find group', response_code=404)
+        return {'id': group_id, 'name': group_id}
+
+    def get_groups(self, query, full_hierarchy=False):
+        return [{'id': name, 'name': name, 'subGroups': []} for name in self.groups]
+
+    def get_group_members(self, group_id, query):
+        self.member_listings += 1
+        return self._page([self.users[user_id] for user_id in self.groups[group_id]], query)
+
+    def get_admin_events(self, query):
+        return self._page(self.admin_events, query)
+
+    def get_events(self, query):
+        return self._page(self.events, query)
+
+
+class KeycloakUserSyncTest(TestCase):
+    """Users and group memberships are upserted in bulk from Keycloak"""
+
+    def setUp(self):
+        self.admin = FakeKeycloakAdmin()
+        for i in range(5):
+            self.admin.add_user(f'kc-{i}', f'user{i}', email=f'user{i}@example.com', firstName=f'User {i}')
+        self.admin.groups['developers'] = ['kc-0', 'kc-1']
+        self.sync = KeycloakUserSync(admin=self.admin, page_size=2)
+
+    def test_full_sync_creates_users_and_memberships(self):
+        stats = self.sync.run(full=True)
+
+        self.assertEqual(stats['created'], 5)
+        self.assertEqual(User.objects.get(username='user3').first_name, 'User 3')
+        self.assertFalse(User.objects.get(username='user3').has_usable_password())
+        self.assertEqual(
+            set(User.objects.filter(groups__name='developers').values_list('username', flat=True)),
+            {'user0', 'user1'}
+        )
+
+    def test_second_pass_only_writes_changes(self):
+        self.sync.run(full=True)
+        self.admin.users['kc-2']['lastName'] = 'Lovelace'
+        self.admin.groups['developers'] = ['kc-1', 'kc-2']
+
+        stats = self.sync.run(full=True)
+
+        self.assertEqual((stats['created'], stats['updated']), (0, 1))
+        self.assertEqual(stats['memberships_changed'], 2)
+        self.assertEqual(User.objects.get(username='user2').last_name, 'Lovelace')
+
+    def test_incremental_sync_follows_events(self):
+        self.sync.run(full=True)
+        watermark = SyncState.objects.get(name=SYNC_STATE_NAME).watermark
+
+        self.admin.add_user('kc-9', 'newcomer', email='new@example.com')
+        self.admin.users['kc-4']['enabled'] = False
+        self.admin.events.append({'time': watermark + 1, 'type': 'REGISTER', 'userId': 'kc-9'})
+        self.admin.admin_events.append({'time': watermark + 2, 'resourcePath': 'users/kc-4'})
+        # Already applied by the previous pass
+        self.admin.admin_events.append({'time': watermark - 1, 'resourcePath': 'users/kc-0'})
+
+        stats = self.sync.run()
+
+        self.assertEqual(stats['mode'], 'incremental')
+        self.assertEqual((stats['seen'], stats['created'], stats['updated']), (2, 1, 1))
+        self.assertFalse(User.objects.get(username='user4').is_active)
+        self.assertEqual(SyncState.objects.get(name=SYNC_STATE_NAME).watermark, watermark + 2)
+
+    def test_incremental_group_sync_follows_membership_events(self):
+        self.sync.run(full=True)
+        watermark = SyncState.objects.get(name=SYNC_STATE_NAME).watermark
+        self.admin.member_listings = 0
+
+        self.admin.groups['developers'] = ['kc-1', 'kc-3']
+        self.admin.admin_events += [
+            {'time': watermark + 1, 'resourceType': 'GROUP_MEMBERSHIP', 'operationType': 'DELETE',
+             'resourcePath': 'users/kc-0/groups/developers'},
+            {'time': watermark + 2, 'resourceType': 'GROUP_MEMBERSHIP', 'operationType': 'CREATE',
+             'resourcePath': 'users/kc-3/groups/developers'},
+        ]
+
+        stats = self.sync.run()
+
+        self.assertEqual(stats['memberships_changed'], 2)
+        self.assertEqual(self.admin.member_listings, 0)
+        self.assertEqual(
+            set(User.objects.filter(groups__name='developers').values_list('username', flat=True)),
+            {'user1', 'user3'}
+        )
+
+    def test_deleted_users_are_deactivated(self):
+        self.sync.run(full=True)
+        watermark = SyncState.objects.get(name=SYNC_STATE_NAME).watermark
+
+        del self.admin.users['kc-2']
+        self.admin.admin_events.append({'time': watermark + 1, 'resourceType': 'USER',
+                                        'operationType': 'DELETE', 'resourcePath': 'users/kc-2'})
+        stats = self.sync.run()
+
+        self.assertEqual(stats['deactivated'], 1)
+        self.assertFalse(User.objects.get(username='user2').is_active)
+
+        # A full pass catches deletions whose events were missed
+        del self.admin.users['kc-3']
+        stats = self.sync.run(full=True)
+
+        self.assertEqual(stats['deactivated'], 1)
+        self.assertFalse(User.objects.get(username='user3').is_active)
+        self.assertTrue(User.objects.get(username='user4').is_active)
+
+    def test_renamed_users_keep_their_row(self):
+        self.sync.run(full=True)
+        original = User.objects.get(keycloak_id='kc-1').pk
+
+        self.admin.users['kc-1']['username'] = 'renamed'
+        stats = self.sync.run(full=True)
+        self.assertEqual((stats['created'], stats['updated']), (0, 1))
+        self.assertEqual(User.objects.get(keycloak_id='kc-1').pk, original)
+        self.assertEqual(User.objects.get(pk=original).username, 'renamed')
+
+        # Incrementally, and with the old name handed to a new Keycloak user in the same pass
+        watermark = SyncState.objects.get(name=SYNC_STATE_NAME).watermark
+        self.admin.users['kc-1']['username'] = 'renamed-again'
+        self.admin.add_user('kc-7', 'renamed')
+        self.admin.admin_events += [
+            {'time': watermark + 1, 'resourceType': 'USER', 'operationType': 'UPDATE', 'resourcePath': 'users/kc-1'},
+            {'time': watermark + 2, 'resourceType': 'USER', 'operationType': 'CREATE', 'resourcePath': 'users/kc-7'},
+        ]
+        self.sync.page_size = 10
+        stats = self.sync.run()
+
+        self.assertEqual((stats['created'], stats['updated']), (1, 1))
+        self.assertEqual(User.objects.get(pk=original).username, 'renamed-again')
+        self.assertEqual(User.objects.get(username='renamed').keycloak_id, 'kc-7')
+        self.assertEqual(SyncState.objects.get(name=SYNC_STATE_NAME).watermark, watermark + 2)
+
+    def test_name_still_held_by_another_keycloak_user_is_skipped(self):
+        self.sync.run(full=True)
+        # kc-1 was renamed in Keycloak, but only the newcomer's event is seen
+        self.admin.users['kc-1']['username'] = 'elsewhere'
+        self.admin.add_user('kc-7', 'user1')
+        watermark = SyncState.objects.get(name=SYNC_STATE_NAME).watermark
+        self.admin.events.append({'time': watermark + 1, 'type': 'REGISTER', 'userId': 'kc-7'})
+
+        stats = self.sync.run()
+
+        self.assertEqual(stats['created'], 0)
+        self.assertEqual(User.objects.get(username='user1').keycloak_id, 'kc-1')
+        self.assertEqual(SyncState.objects.get(name=SYNC_STATE_NAME).watermark, watermark + 1)
+
+        self.sync.run(full=True)
+        self.assertEqual(User.objects.get(username='user1').keycloak_id, 'kc-7')
+
+    def test_synced_users_are_welcomed_like_interactive_ones(self):
+        self.sync.run(full=True)
+
+        synced = User.objects.filter(keycloak_id__isnull=False)
+        self.assertEqual(UserActivity.objects.filter(user__in=synced).count(), 5)
+        self.assertEqual(Notification.objects.filter(recipient__in=synced, notification_type='system_update').count(), 5)
+
+        self.sync.run(full=True)
+        self.assertEqual(Notification.objects.filter(recipient__in=synced).count(), 5)
+
+
+class RoleCacheTest(TestCase):
+    """Role checks are answered from the cache filled at login"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='grace', email='grace@example.com')
+        self.claims = {
+            'realm_access': {'roles': ['developer']},
+            'resource_access': {settings.KEYCLOAK_CONFIG['CLIENT_ID']: {'roles': ['canvas-editor']}},
+            'groups': ['/guilds/frontend'],
+        }
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_claims_fill_cache_without_keycloak(self):
+        roles.remember_claims(self.user, self.claims)
+
+        user = self.fresh_user()
+        with mock.patch.object(roles, 'fetch_keycloak_roles') as fetch:
+            self.assertTrue(has_role(user, 'developer'))
+            self.assertTrue(has_role(user, 'canvas-editor'))
+            self.assertFalse(has_role(user, 'admin'))
+            self.assertTrue(has_group(user, 'frontend'))
+        fetch.assert_not_called()
+
+    def test_cache_miss_loads_once_then_memoises(self):
+        user = self.fresh_user()
+        with mock.patch.object(roles, 'fetch_keycloak_roles', return_value={'admin'}) as fetch:
+            self.assertTrue(has_role(user, 'admin'))
+            self.assertTrue(has_role(self.fresh_user(), 'admin'))
+        fetch.assert_called_once_with('grace')
+
+    def test_group_change_invalidates(self):
+        roles.remember_claims(self.user, {'realm_access': {'roles': []}})
+        group = Group.objects.create(name='reviewers')
+
+        self.fresh_user().groups.add(group)
+
+        with mock.patch.object(roles, 'fetch_keycloak_roles', return_value=set()):
+            self.assertTrue(has_group(self.fresh_user(), 'reviewers'))
+
+    def test_permission_classes(self):
+        roles.remember_claims(self.user, self.claims)
+        request = RequestFactory().get('/')
+        request.user = self.fresh_user()
+
+        self.assertTrue(role_required('developer')().has_permission(request, None))
+        self.assertFalse(role_required('admin')().has_permission(request, None))
+
+        view = type('View', (), {'required_groups': ['frontend']})()
+        self.assertTrue(InGroup().has_permission(request, view))
+
+
+class CanvasOutboxTest(TestCase):
+    """Canvas fan-out coalesces per tick and never builds a backlog"""
+
+    def test_state_supersedes_older_deltas(self):
+        outbox = CanvasOutbox()
+        outbox.add_delta(3, [{'op': 'add', 'path': '/a', 'value': 1}])
+        outbox.add_delta(5, [{'op': 'remove', 'path': '/a'}])
+        outbox.set_state(4, {'a': 1})
+
+        state, deltas, resync = outbox.drain()
+        self.assertEqual(state['version'], 4)
+        self.assertEqual([delta['version'] for delta in deltas], [5])
+        self.assertFalse(resync)
+        self.assertFalse(outbox)
+
+    def test_overflow_switches_to_resync(self):
+        outbox = CanvasOutbox(max_pending=3)
+        for version in range(1, 10):
+            outbox.add_delta(version, [])
+
+        state, deltas, resync = outbox.drain()
+        self.assertIsNone(state)
+        self.assertEqual(deltas, [])
+        self.assertTrue(resync)
+
+    def test_frames_round_trip(self):
+        payload = {'type': 'canvas_frame', 'deltas': [{'version': 1, 'ops': []}]}
+        frame = encode_frame(payload)
+        self.assertIn('bytes_data', frame)
+        self.assertEqual(decode_frame(**frame), payload)
+        self.assertEqual(decode_frame(**encode_frame(payload, compress=False)), payload)
+
+    def test_decompression_bomb_is_rejected(self):
+        bomb = zlib.compress(b'[' + b' ' * (8 * 1024 * 1024) + b']', 9)
+        self.assertLess(len(bomb), 64 * 1024)
+        with self.assertRaises(ValueError):
+            decode_frame(bytes_data=bomb, max_size=1024 * 1024)
+
+
+class CanvasConsumerTest(TestCase):
+    """ws/canvas: members connect, deltas are applied and fanned out to everyone"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(username='painter', email='painter@example.com')
+        self.guest = User.objects.create(username='guest', email='guest@example.com')
+        self.stranger = User.objects.create(username='stranger', email='stranger@example.com')
+        self.session = CanvasSession.objects.create(
+            user=self.owner, session_name='mural', canvas_data={'shapes': []}
+        )
+        self.session.collaborators.add(self.guest)
+
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/canvas/{self.session.pk}/?compress=0')
+        communicator.scope['user'] = user
+        return communicator
+
+    async def receive_frame(self, communicator):
+        return json.loads(await communicator.receive_from(timeout=2))
+
+    @async_to_sync
+    async def test_delta_is_applied_and_fanned_out(self):
+        owner, guest = self.communicator(self.owner), self.communicator(self.guest)
+        for communicator in (owner, guest):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            frame = await self.receive_frame(communicator)
+            self.assertEqual(frame['state'], {'version': 0, 'canvas_data': {'shapes': []}, 'user': None})
+
+        ops = [{'op': 'add', 'path': '/shapes/-', 'value': {'kind': 'circle'}}]
+        await guest.send_json_to({'type': 'canvas_delta', 'base_version': 0, 'ops': ops})
+
+        for communicator in (owner, guest):
+            frame = await self.receive_frame(communicator)
+            self.assertEqual(frame['type'], 'canvas_frame')
+            self.assertEqual(frame['deltas'], [{'version': 1, 'ops': ops, 'user': 'guest'}])
+            await communicator.disconnect()
+
+        self.assertEqual(await database_sync_to_async(canvas.load_state)(self.session.pk),
+                         (1, {'shapes': [{'kind': 'circle'}]}))
+
+    @async_to_sync
+    async def test_stale_delta_gets_a_conflict(self):
+        await database_sync_to_async(canvas.apply_delta)(self.session, self.owner, 0, [{'op': 'add', 'path': '/title', 'value': 'x'}])
+        communicator = self.communicator(self.owner)
+        await communicator.connect()
+        await self.receive_frame(communicator)
+
+        await communicator.send_json_to({'type': 'canvas_delta', 'base_version': 0, 'ops': []})
+        frame = await self.receive_frame(communicator)
+        self.assertEqual(frame['type'], 'canvas_conflict')
+        self.assertEqual(frame['current_version'], 1)
+        await communicator.disconnect()
+
+    @async_to_sync
+    async def test_non_member_is_refused(self):
+        communicator = self.communicator(self.stranger)
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4003)
+
+
+class CounterBufferTest(TestCase):
+    """Buffered counters reach the database in batches; bad rows do not block the rest"""
+
+    def setUp(self):
+        owner = get_user_model().objects.create(username='counter-owner', email='counter@example.com')
+        self.projects = [
+            Project.objects.create(title=f'p{n}', slug=f'p{n}', description='d', owner=owner)
+            for n in range(3)
+        ]
+        project_counters.store.take()
+
+    def test_rejected_group_is_dropped_and_others_flush(self):
+        good, other, bad = self.projects
+        project_counters.increment(good.pk, 'view_count')
+        project_counters.increment(other.pk, 'view_count')
+        # Would drive a PositiveIntegerField below zero
+        project_counters.increment(bad.pk, 'like_count', -5)
+
+        with self.assertLogs('hello_world.core.counters', level='ERROR'):
+            self.assertEqual(project_counters.flush(), 3)
+
+        self.assertEqual(
+            list(Project.objects.filter(pk__in=[good.pk, other.pk]).values_list('view_count', flat=True)),
+            [1, 1]
+        )
+        self.assertEqual(Project.objects.get(pk=bad.pk).like_count, 0)
+        self.assertEqual(project_counters.pending(bad.pk), {})
+
+        project_counters.increment(good.pk, 'view_count')
+        self.assertEqual(project_counters.flush(), 1)
+        self.assertEqual(Project.objects.get(pk=good.pk).view_count, 2)
+
+    def test_live_counts_include_pending_increments(self):
+        project = self.projects[0]
+        project.increment_view_count()
+        project.increment_counter('like_count', 2)
+
+        self.assertEqual(project.live_counts, {'view_count': 1, 'like_count': 2, 'fork_count': 0, 'download_count': 0})
+        self.assertEqual(Project.objects.get(pk=project.pk).view_count, 0)
+
+        project_counters.flush()
+        project.refresh_from_db()
+        self.assertEqual(project.live_counts['view_count'], 1)
+
+    def test_exit_flush_writes_buffered_counters(self):
+        project = self.projects[0]
+        project.increment_view_count()
+
+        with mock.patch.object(counters, '_stop', threading.Event()) as stop, \
+                mock.patch.object(counters, '_flusher', object()):
+            counters._flush_on_shutdown()
+            self.assertTrue(stop.is_set())
+        self.assertEqual(Project.objects.get(pk=project.pk).view_count, 1)
+        self.assertEqual(project_counters.pending(project.pk), {})
+
+    def test_exit_without_buffered_work_touches_no_database(self):
+        with mock.patch.object(counters, '_stop', threading.Event()), \
+                mock.patch.object(counters, '_flusher', None), \
+                mock.patch.object(counters, 'flush_all') as flush_all:
+            counters._flush_on_shutdown()
+        flush_all.assert_not_called()
+
+
+class PresenceFlushTest(TestCase):
+    """Presence writes are batched; shutdown never sweeps and failures re-queue"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='present', email='present@example.com')
+        cache.clear()
+        presence.flush()
+
+    def test_exit_flush_does_not_sweep(self):
+        with mock.patch.object(counters, '_stop', threading.Event()) as stop, \
+                mock.patch.object(presence, '_next_sweep', 0), \
+                mock.patch.object(presence, '_expired_users', return_value=set()) as expired:
+            stop.set()
+            presence.flush()
+        expired.assert_not_called()
+
+    def test_failed_flush_requeues_presence(self):
+        presence.touch(self.user.pk)
+        with mock.patch.object(presence.model.objects, 'filter', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                presence.flush()
+
+        presence.flush()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_online)
+
+
+class MessageReactionTest(TestCase):
+    """Reactions are rows with cached counts, broadcast at most once per tick"""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = get_user_model().objects.create(username='alice', email='alice@example.com')
+        self.bob = get_user_model().objects.create(username='bob', email='bob@example.com')
+        room = ChatRoom.objects.create(name='hall', slug='hall', owner=self.alice)
+        self.message = ChatMessage.objects.create(room=room, sender=self.alice, content='hi')
+
+    def test_counts_follow_adds_and_removes(self):
+        self.assertTrue(reactions.add_reaction(self.message.pk, self.alice.pk, '👍'))
+        self.assertFalse(reactions.add_reaction(self.message.pk, self.alice.pk, '👍'))
+        self.assertEqual(reactions.get_reaction_counts(self.message.pk), {'👍': 1})
+
+        reactions.add_reaction(self.message.pk, self.bob.pk, '👍')
+        reactions.add_reaction(self.message.pk, self.bob.pk, '🎉')
+        self.assertTrue(reactions.remove_reaction(self.message.pk, self.alice.pk, '👍'))
+        self.assertFalse(reactions.remove_reaction(self.message.pk, self.alice.pk, '👍'))
+        self.assertEqual(reactions.get_reaction_counts(self.message.pk), {'👍': 1, '🎉': 1})
+
+        cache.clear()
+        self.assertEqual(reactions.get_reaction_counts(self.message.pk), {'👍': 1, '🎉': 1})
+
+    def test_oversized_emoji_is_rejected_before_the_database(self):
+        for emoji in ('x' * (reactions.MAX_EMOJI_LENGTH + 1), '', ['👍']):
+            with self.assertRaises(ValidationError):
+                reactions.add_reaction(self.message.pk, self.alice.pk, emoji)
+        self.assertFalse(MessageReaction.objects.exists())
+
+    def test_cold_fill_keeps_a_newer_counter(self):
+        reactions.add_reaction(self.message.pk, self.alice.pk, '👍')
+        cache.clear()
+        # Stands in for an incr that landed after the totals were read
+        cache.set(reactions._count_key(self.message.pk, '👍'), 2)
+
+        reactions.get_reaction_counts(self.message.pk)
+
+        self.assertEqual(cache.get(reactions._count_key(self.message.pk, '👍')), 2)
+
+    def test_broadcasts_are_coalesced_per_message(self):
+        sent = []
+
+        class ChannelLayer:
+            async def group_send(self, group_name, event):
+                sent.append((group_name, event['reaction_data']['message_id']))
+
+        async def burst():
+            broadcaster = reactions.ReactionBroadcaster(tick=0.01)
+            layer = ChannelLayer()
+            for _ in range(50):
+                broadcaster.schedule(layer, 'chat_hall', 'm1')
+            broadcaster.schedule(layer, 'chat_hall', 'm2')
+            await asyncio.sleep(0.05)
+
+        with mock.patch.object(reactions, 'get_reaction_counts', return_value={'👍': 50}):
+            asyncio.run(burst())
+
+        self.assertEqual(sorted(sent), [('chat_hall', 'm1'), ('chat_hall', 'm2')])
+
+
+class RoomSearchIndexTest(TestCase):
+    """Chat messages are searchable exactly while their room is public"""
+
+    def test_room_type_change_refiles_messages(self):
+        owner = get_user_model().objects.create(username='host', email='host@example.com')
+        room = ChatRoom.objects.create(name='den', slug='den', owner=owner, room_type='private')
+        for n in range(3):
+            ChatMessage.objects.create(room=room, sender=owner, content=f'hello {n}')
+        self.assertEqual(SearchDocument.objects.filter(kind='message').count(), 0)
+
+        room.room_type = 'public'
+        room.save()
+        self.assertEqual(SearchDocument.objects.filter(kind='message').count(), 3)
+
+        room.room_type = 'private'
+        room.save(update_fields=['room_type'])
+        self.assertEqual(SearchDocument.objects.filter(kind='message').count(), 0)
+
+
+class SearchTest(TestCase):
+    """Ranked full-text search over the FTS5 index"""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create(username='searcher', email='searcher@example.com')
+
+    def project(self, title, description='', **fields):
+        return Project.objects.create(
+            title=title, slug=title.lower().replace(' ', '-'), description=description, owner=self.owner, **fields
+        )
+
+    def fts_matches(self, term):
+        """Rows the FTS table itself returns, bypassing the object lookup in search()"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH %s', [term])
+            return cursor.fetchone()[0]
+
+    def test_title_match_outranks_body_match(self):
+        body_hit = self.project('Weather station', 'Built with django and a raspberry pi')
+        title_hit = self.project('Django blog', 'A small publishing site')
+        self.project('Garden planner', 'Tracks what to plant')
+
+        hits = search.search('django')
+        self.assertEqual([hit['object'] for hit in hits], [title_hit, body_hit])
+        self.assertGreater(hits[0]['rank'], hits[1]['rank'])
+        self.assertIn('<mark>', hits[0]['title'])
+
+    def test_terms_are_prefix_matched_and_all_required(self):
+        match = self.project('Djangonaut tools', 'Helpers for deployment')
+        self.project('Djangonaut notes', 'Reading list')
+
+        self.assertEqual([hit['object'] for hit in search.search('djan help')], [match])
+        self.assertEqual(search.search('flask'), [])
+        self.assertEqual(search.search('  ?!  '), [])
+
+    def test_kinds_filter(self):
+        project = self.project('Orbit tracker', 'Satellite passes')
+        person = get_user_model().objects.create(username='orbit-fan', email='orbit@example.com')
+
+        self.assertEqual({hit['kind'] for hit in search.search('orbit')}, {'project', 'user'})
+        self.assertEqual([hit['object'] for hit in search.search('orbit', kinds=['user'])], [person])
+        self.assertEqual([hit['object'] for hit in search.search('orbit', kinds=['project', 'bogus'])], [project])
+
+    def test_pages_cover_every_hit_once(self):
+        projects = {self.project(f'Recipe {n}', 'soup ' * (n + 1)) for n in range(7)}
+
+        seen = []
+        for offset in range(0, 7, 3):
+            seen.extend(hit['object'] for hit in search.search('recipe', limit=3, offset=offset))
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), projects)
+        self.assertEqual(search.search('recipe', limit=3, offset=7), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        project = self.project('Comet log', 'Sightings')
+
+        project.title = 'Meteor log'
+        project.save()
+        self.assertEqual((self.fts_matches('comet'), self.fts_matches('meteor')), (0, 1))
+        self.assertEqual([hit['object'] for hit in search.search('meteor')], [project])
+
+        project.visibility = 'private'
+        project.save()
+        self.assertEqual(self.fts_matches('meteor'), 0)
+
+        project.visibility = 'public'
+        project.save()
+        self.assertEqual(self.fts_matches('meteor'), 1)
+        project.delete()
+        self.assertEqual(self.fts_matches('meteor'), 0)
+        self.assertEqual(search.search('meteor'), [])
+
+
+class SessionStoreTest(TestCase):
+    """Sessions are written when dirty or due for an expiry refresh, never just for being read"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.store = sessions.SessionStore()
+        self.store['user'] = 'ada'
+        self.store.save()
+        self.saved_at = timezone.now()
+
+    def expire_date(self):
+        return Session.objects.get(session_key=self.store.session_key).expire_date
+
+    def respond(self, change=None, at=None):
+        """Run one request through the middleware; returns the session cookie it set, if any"""
+        def view(request):
+            self.seen = dict(request.session.items())
+            if change:
+                change(request.session)
+            return HttpResponse()
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = self.store.session_key
+        with mock.patch('django.utils.timezone.now', return_value=at or timezone.now()):
+            response = SessionMiddleware(view)(request)
+        return response.cookies.get(settings.SESSION_COOKIE_NAME)
+
+    def test_clean_session_is_not_written(self):
+        expire_date = self.expire_date()
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.respond())
+        self.assertEqual(self.seen, {'user': 'ada'})
+
+        # A cache miss reads the row once and still has nothing to write
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.respond())
+        self.assertEqual(self.expire_date(), expire_date)
+
+    def test_dirty_session_is_written(self):
+        cookie = self.respond(lambda session: session.__setitem__('theme', 'dark'))
+
+        self.assertEqual(cookie.value, self.store.session_key)
+        self.assertEqual(Session.objects.get(session_key=cookie.value).get_decoded(), {'user': 'ada', 'theme': 'dark'})
+
+    def test_expiry_refreshes_only_after_the_window(self):
+        interval = datetime.timedelta(seconds=sessions.get_refresh_interval())
+        expire_date = self.expire_date()
+
+        self.assertIsNone(self.respond(at=self.saved_at + interval - datetime.timedelta(minutes=1)))
+        self.assertEqual(self.expire_date(), expire_date)
+
+        later = self.saved_at + interval + datetime.timedelta(minutes=1)
+        self.assertIsNotNone(self.respond(at=later))
+        self.assertGreater(self.expire_date(), expire_date + interval)
+        self.assertEqual(self.seen, {'user': 'ada'})
+
+        # The refresh restarts the window, whether the next read hits the cache or the database
+        self.assertIsNone(self.respond(at=later + datetime.timedelta(minutes=1)))
+        cache.clear()
+        self.assertIsNone(self.respond(at=later + datetime.timedelta(minutes=1)))
+
+    def test_legacy_stamp_is_dropped_from_the_payload(self):
+        self.store[sessions.LEGACY_REFRESHED_AT_KEY] = 0
+        self.store.save()
+        cache.clear()
+
+        self.respond(lambda session: session.__setitem__('theme', 'dark'))
+        self.assertEqual(self.seen, {'user': 'ada'})
+        self.assertEqual(sessions.SessionStore(self.store.session_key).load(), {'user': 'ada', 'theme': 'dark'})
+
+
+class DeveloperDirectoryTest(TestCase):
+    """Directory entries follow users; pages are keyset-paginated"""
+
+    def setUp(self):
+        cache.clear()
+
+    def developer(self, username, skills=(), level='apprentice', **fields):
+        return get_user_model().objects.create(
+            username=username, email=f'{username}@example.com', skills=list(skills), experience_level=level, **fields
+        )
+
+    def usernames(self, **filters):
+        users, _ = directory.search_directory(**filters)
+        return [user.username for user in users]
+
+    def test_filters_use_normalized_skills(self):
+        self.developer('ada', skills=['Django', 'React'], level='master')
+        self.developer('bob', skills=['django '], title='Go developer')
+        self.developer('cy', skills=['Machine  Learning'], level='master')
+
+        self.assertEqual(self.usernames(skill='DJANGO'), ['bob', 'ada'])
+        self.assertEqual(self.usernames(skill='django', experience='master'), ['ada'])
+        self.assertEqual(self.usernames(skill='machine learning', experience='master'), ['cy'])
+        self.assertEqual(self.usernames(experience='master'), ['cy', 'ada'])
+        self.assertEqual(self.usernames(skill='cobol'), [])
+        self.assertEqual(self.usernames(text='go dev'), ['bob'])
+        self.assertEqual(DirectoryTag.objects.filter(slug='django').count(), 1)
+
+    def test_edits_and_deactivation_follow_the_user(self):
+        ada = self.developer('ada', skills=['Django'])
+
+        ada.skills = ['Rust']
+        ada.save(update_fields=['skills'])
+        self.assertEqual(self.usernames(skill='django'), [])
+        self.assertEqual(self.usernames(skill='rust'), ['ada'])
+
+        ada.experience_level = 'expert'
+        ada.save(update_fields=['experience_level'])
+        self.assertEqual(self.usernames(skill='rust', experience='expert'), ['ada'])
+
+        ada.is_active = False
+        ada.save(update_fields=['is_active'])
+        self.assertEqual(self.usernames(), [])
+        self.assertFalse(DirectoryEntryTag.objects.filter(is_listed=True).exists())
+
+    def test_keyset_pages_cover_everyone_once(self):
+        for n in range(7):
+            self.developer(f'dev{n}', skills=['Python'])
+
+        for filters in ({'skill': 'python'}, {}):
+            seen, after = [], None
+            while True:
+                users, after = directory.search_directory(after=after, limit=3, **filters)
+                seen.extend(user.username for user in users)
+                if after is None:
+                    break
+            self.assertEqual(seen, [f'dev{n}' for n in reversed(range(7))])
+
+    def test_facets_count_listed_developers(self):
+        self.developer('ada', skills=['Django'], level='master')
+        self.developer('bob', skills=['Django', 'Go'], level='master')
+        hidden = self.developer('cy', skills=['Django'])
+        hidden.is_active = False
+        hidden.save(update_fields=['is_active'])
+
+        facets = directory.directory_facets()
+        self.assertEqual(facets['experience'], [('master', 2)])
+        self.assertEqual(facets['skills'], [('Django', 2), ('Go', 1)])
+
+    def test_rebuild_restores_entries(self):
+        self.developer('ada', skills=['Django'])
+        DirectoryEntryTag.objects.all().delete()
+
+        self.assertEqual(directory.rebuild_directory(), 1)
+        self.assertEqual(self.usernames(skill='django'), ['ada'])
+
+    def test_views_page_by_cursor(self):
+        for n in range(3):
+            self.developer(f'dev{n}', skills=['Python'])
+
+        response = self.client.get('/api/developers/', {'skill': 'python', 'limit': 2})
+        self.assertEqual([dev['username'] for dev in response.json()['results']], ['dev2', 'dev1'])
+        after = response.json()['next_cursor']
+        response = self.client.get('/api/developers/', {'skill': 'python', 'limit': 2, 'after': after})
+        self.assertEqual(([dev['username'] for dev in response.json()['results']], response.json()['next_cursor']),
+                         (['dev0'], None))
+        self.assertEqual(self.client.get('/api/developers/', {'after': 'abc'}).status_code, 400)
+
+        # The page falls back to the first page for a malformed cursor
+        with mock.patch('hello_world.core.views.render', return_value=HttpResponse()) as render:
+            self.client.get('/developers/', {'after': 'abc'})
+        context = render.call_args.args[2]
+        self.assertEqual([dev.username for dev in context['developers']], ['dev2', 'dev1', 'dev0'])
@@ -55,6 +55,7 @@ urlpatterns = [
     
     # API Endpoints - The Digital Servants
     path('api/ai-chat/', views.api_ai_chat, name='api_ai_chat'),
+    path('api/developers/', views.api_developers, name='api_developers'),
     
     # Health & Monitoring
     path('health/', views.health_check, name='health_check'),
@@ -24,6 +24,10 @@ from .models import (
     CustomUser, Project, ProjectCollaboration, ChatRoom, ChatMessage,
     AIConversation, AIMessage, Notification, UserActivity
 )
+from . import directory
+from .search import search
+
+SEARCH_PAGE_SIZE = 20
 
 
 # Core Views - The Main Palace Halls
@@ -152,14 +156,39 @@ def projects_view(request):
     return render(request, 'core/projects.html', context)
 
 
+def _directory_page(request, limit, after):
+    """One directory page for the request's filters; next_cursor comes back as ?after="""
+    return directory.search_directory(
+        experience=request.GET.get('experience'),
+        skill=request.GET.get('skill'),
+        text=request.GET.get('search'),
+        after=after,
+        limit=limit,
+    )
+
+
 def developers_view(request):
     """
     Developer Directory - The Royal Court
-    Discover talented developers in the kingdom
+    Discover talented developers in the kingdom, filtered through the
+    indexed directory and keyset-paginated
     """
     
+    # A malformed cursor just starts from the first page
+    try:
+        after = int(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        after = None
+    developers, next_cursor = _directory_page(request, limit=16, after=after)
+    
     context = {
         'page_title': 'Developer Directory - The Royal Court',
+        'developers': developers,
+        'next_cursor': next_cursor,
+        'facets': directory.directory_facets(),
+        'current_experience': request.GET.get('experience'),
+        'current_skill': request.GET.get('skill'),
+        'search_query': request.GET.get('search'),
     }
     
     return render(request, 'core/developers.html', context)
@@ -222,6 +251,37 @@ def api_ai_chat(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@require_http_methods(["GET"])
+def api_developers(request):
+    """
+    Developer Directory API - The Royal Court as JSON
+    Filters: experience, skill, search. Pass next_cursor back as ?after=.
+    """
+    
+    try:
+        developers, next_cursor = _directory_page(
+            request, limit=request.GET.get('limit', directory.DIRECTORY_PAGE_SIZE), after=request.GET.get('after')
+        )
+    except ValueError:
+        return JsonResponse({'error': 'after and limit must be integers'}, status=400)
+    
+    return JsonResponse({
+        'results': [
+            {
+                'id': developer.pk,
+                'username': developer.username,
+                'name': developer.get_full_name(),
+                'title': developer.title,
+                'experience_level': developer.experience_level,
+                'skills': developer.skills,
+            }
+            for developer in developers
+        ],
+        'next_cursor': next_cursor,
+        'facets': directory.directory_facets(),
+    })
+
+
 def generate_ai_response(message, mode):
     """
     Generate AI response based on mode
@@ -257,9 +317,29 @@ def search_view(request):
     """
     
     query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type')
+    
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    
+    # Fetch one extra hit to know whether there is a next page
+    results = []
+    if query:
+        results = search(
+            query,
+            kinds=[kind] if kind else None,
+            limit=SEARCH_PAGE_SIZE + 1,
+            offset=(page - 1) * SEARCH_PAGE_SIZE
+        )
     
     context = {
         'query': query,
+        'current_type': kind,
+        'results': results[:SEARCH_PAGE_SIZE],
+        'page': page,
+        'has_next': len(results) > SEARCH_PAGE_SIZE,
         'page_title': f'Search Results for "{query}"' if query else 'Search - The Royal Archive',
     }
     
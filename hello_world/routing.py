@@ -21,7 +21,7 @@ websocket_urlpatterns = [
     re_path(r'ws/ai-chat/(?P<conversation_id>[\w-]+)/$', consumers.ChatConsumer.as_asgi()),
     
     # Canvas Collaboration Routes - The Creative Forge
-    re_path(r'ws/canvas/(?P<canvas_id>[\w-]+)/$', consumers.CollaborationConsumer.as_asgi()),
+    re_path(r'ws/canvas/(?P<canvas_id>[\w-]+)/$', consumers.CanvasConsumer.as_asgi()),
     
     # General Real-time Routes
     re_path(r'ws/general/$', consumers.ChatConsumer.as_asgi()),
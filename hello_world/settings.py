@@ -72,6 +72,7 @@ LOCAL_APPS = [
     # Our Magnificent Applications
     'hello_world.core.apps.CoreConfig',
     'backend.apps.agents.apps.AgentsConfig',
+    'backend.apps.core.apps.CoreConfig',  # Projects, canvas sessions and their blob store
 ]
 
 # 👑 The Complete Royal Application Suite
@@ -88,6 +89,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hello_world.core.middleware.PresenceMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -222,10 +224,57 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
+# Cache Configuration - The Royal Treasury of Fast Lookups
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'glorious-space',
+        }
+    }
+
+# Channel Layers - WebSocket fan-out, shared across processes when Redis is configured
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Seconds between flushes of buffered project view/like/fork/download counters
+COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=10, cast=int)
+
+# Presence - online within PRESENCE_TIMEOUT; last_active written at most once per interval
+PRESENCE_TIMEOUT = 300
+PRESENCE_PERSIST_INTERVAL = 300
+
+# Canvas fan-out - updates coalesced per tick; slow clients resync past the delta cap
+CANVAS_TICK = 0.05
+CANVAS_MAX_PENDING_DELTAS = 64
+CANVAS_MAX_FRAME_BYTES = 4 * 1024 * 1024  # Decompressed size limit for client frames
+
 # Session Configuration
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_COOKIE_NAME = 'glorious_sessionid'
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_ENGINE = 'hello_world.core.sessions'
+SESSION_SAVE_EVERY_REQUEST = False  # Writes only on change; expiry slides via SESSION_REFRESH_INTERVAL
+SESSION_REFRESH_INTERVAL = 3600  # Re-save an unchanged session at most once an hour
 
 # Allauth Configuration - Social Authentication
 ACCOUNT_AUTHENTICATION_METHOD = 'email'
@@ -302,12 +351,16 @@ KEYCLOAK_CONFIG = {
     'REALM': config('KEYCLOAK_REALM', default='glorious-space'),
     'CLIENT_ID': config('KEYCLOAK_CLIENT_ID', default='glorious-space-client'),
     'CLIENT_SECRET': config('KEYCLOAK_CLIENT_SECRET', default=''),
+    'AUDIENCE': config('KEYCLOAK_AUDIENCE', default=''),  # Expected "aud" claim; if empty, "azp" must be CLIENT_ID
     'ADMIN_CLIENT_ID': config('KEYCLOAK_ADMIN_CLIENT_ID', default='admin-cli'),
     'ADMIN_USERNAME': config('KEYCLOAK_ADMIN_USERNAME', default='admin'),
     'ADMIN_PASSWORD': config('KEYCLOAK_ADMIN_PASSWORD', default=''),
     'VERIFY_SSL': config('KEYCLOAK_VERIFY_SSL', default=True, cast=bool),
 }
 
+# Seconds a user's cached Keycloak roles/groups stay valid before reloading
+ROLE_CACHE_TTL = 300
+
 # OAuth2 Settings for Django OAuth Toolkit
 OAUTH2_PROVIDER = {
     'SCOPES': {